@@ -0,0 +1,93 @@
+"""
+HTML size and `file_html` encode time of the bundled datasets, with sources sent as typed NumPy arrays (binary, base64
+encoded) against the same sources sent as Python lists (JSON number arrays).
+
+Usage (from the repository root):
+    python benchmarks/array_encoding.py --repeat 5
+"""
+import argparse
+import os
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+from bokeh.embed import file_html
+from bokeh.layouts import Column
+from bokeh.models import ColumnDataSource
+from bokeh.resources import CDN
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_PATH = os.path.join(REPO_ROOT, 'static', 'data')
+sys.path.insert(0, REPO_ROOT)
+
+from plot_functions import plot_single_line, plot_multiple_lines, plot_multiple_bar_chart, \
+    plot_dual_axis_dual_bar_line, plot_table  # noqa: E402
+
+
+def make_layouts() -> dict:
+    """
+    :return: dictionary with a function per bundled dataset that builds a new layout with its chart and table
+    """
+    daily_sales = pd.read_csv(os.path.join(DATA_PATH, 'daily_sales.csv'), parse_dates=['date'])
+    sales_by_store = pd.read_csv(os.path.join(DATA_PATH, 'daily_sales_by_store.csv'), parse_dates=['date'])
+    yearly_sales = pd.read_csv(os.path.join(DATA_PATH, 'yearly_sales_by_store.csv'))
+    max_profit = pd.read_csv(os.path.join(DATA_PATH, 'max_profit_by_age_group.csv'), index_col=[0]).melt(
+        id_vars=['IntervationName', 'Profit'], value_vars=['TruePositiveRate0', 'TruePositiveRate1'],
+        var_name='GroupName', value_name='TruePositiveRate')
+
+    return {
+        'daily_sales.csv': lambda: Column(
+            plot_single_line(daily_sales, x_axis='date', y_axis='sales', title='Total sales'),
+            plot_table(daily_sales)),
+        'daily_sales_by_store.csv': lambda: Column(
+            plot_multiple_lines(sales_by_store, x_axis='date', y_axis='sales', category_column='store',
+                                title='Total sales'),
+            plot_table(sales_by_store)),
+        'yearly_sales_by_store.csv': lambda: Column(
+            plot_multiple_bar_chart(yearly_sales, title='Total sales by store and year', x_axis='year',
+                                    y_axis='sales', x_axis_categories='store'),
+            plot_table(yearly_sales)),
+        'max_profit_by_age_group.csv': lambda: Column(
+            plot_dual_axis_dual_bar_line(max_profit, title='TPR by group and profit', groups_name='IntervationName',
+                                         bar_value_name='TruePositiveRate', bar_variable_name='GroupName',
+                                         line_variable_name='Profit'),
+            plot_table(max_profit)),
+    }
+
+
+def as_lists(layout):
+    """ Replaces the arrays of every source in the layout by Python lists, as sources were built before """
+    for source in list(layout.select({'type': ColumnDataSource})):
+        data = {column: values.tolist() if isinstance(values, np.ndarray) else list(values)
+                for column, values in source.data.items()}
+        source.data = {}  # Bokeh considers lists equal to arrays with the same values and would skip the update
+        source.data = data
+    return layout
+
+
+def measure(layout, repeat: int) -> tuple:
+    """
+    :return: HTML size in bytes and best encode time in seconds
+    """
+    html = file_html(layout, CDN)
+    seconds = min(timeit.repeat(lambda: file_html(layout, CDN), number=1, repeat=repeat))
+    return len(html.encode()), seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print('{:<30} {:>12} {:>12} {:>11} {:>11}'.format('dataset', 'lists (KB)', 'arrays (KB)', 'lists (s)',
+                                                      'arrays (s)'))
+    for dataset, build_layout in make_layouts().items():
+        list_bytes, list_seconds = measure(as_lists(build_layout()), args.repeat)
+        array_bytes, array_seconds = measure(build_layout(), args.repeat)
+        print('{:<30} {:>12.1f} {:>12.1f} {:>11.4f} {:>11.4f}'.format(dataset, list_bytes / 1e3, array_bytes / 1e3,
+                                                                      list_seconds, array_seconds))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Byte-identical builds of the catalogue: builds every chart twice with `build_chart`, each time in a new interpreter per
+chart (so with its own hash seed, as sets of strings are ordered by their hash), and compares the two pages of each
+chart byte for byte. The pages are written in temporary directories and the build manifest is not touched.
+
+Exits with status 1 if a chart has two different pages.
+
+Usage (from the repository root):
+    python benchmarks/build_determinism.py
+    python benchmarks/build_determinism.py line_plot/line_chart.py
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from build_catalogue import build_chart, discover_charts  # noqa: E402
+
+
+def build_pages(charts: list, output_dir: str) -> list:
+    """ :return: HTML page of every chart, each one built in a new interpreter """
+    charts = [dict(chart, output_path=os.path.join(output_dir, chart['output_file'])) for chart in charts]
+    with multiprocessing.get_context('spawn').Pool(processes=os.cpu_count() or 1, maxtasksperchild=1) as pool:
+        pool.map(build_chart, charts, chunksize=1)
+
+    pages = []
+    for chart in charts:
+        with open(chart['output_path'], 'rb') as page:
+            pages.append(page.read())
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('charts', nargs='*', help='scripts to build (default: all charts)')
+    args = parser.parse_args()
+
+    charts = discover_charts()
+    if args.charts:
+        names = {os.path.normpath(name) for name in args.charts}
+        charts = [chart for chart in charts if os.path.normpath(chart['name']) in names]
+
+    with tempfile.TemporaryDirectory() as first_dir, tempfile.TemporaryDirectory() as second_dir:
+        first_pages, second_pages = build_pages(charts, first_dir), build_pages(charts, second_dir)
+
+    failures = 0
+    print('{:<62} {:>10}  {}'.format('chart', 'KB', 'identical'))
+    for chart, first, second in zip(charts, first_pages, second_pages):
+        failures += first != second
+        print('{:<62} {:>10.1f}  {}'.format(chart['name'], len(first) / 1e3, first == second))
+
+    if failures:
+        print('\n{} failure(s)'.format(failures))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Load time of each bundled dataset: the CSV file parsed with `data_loading.read_dataset` against its memory-mapped
+Feather copy read with `data_loading.read_cached`, as a dataframe and as a pyarrow.Table, for all columns and for one
+column. Copies are written to a temporary folder; the time to write each copy is reported too.
+
+Usage (from the repository root):
+    python benchmarks/cached_loading.py --repeat 20
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from data_loading import DATASETS, DATA_PATH, cache_file, read_cached, read_dataset  # noqa: E402
+
+
+def best_time(function, repeat: int) -> float:
+    """ :return: shortest time of repeat calls of function, in milliseconds """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    print('{:<26} {:>9} {:>9} {:>10} {:>10} {:>10} {:>11}'.format('dataset', 'CSV (KB)', 'write', 'CSV', 'cached',
+                                                                   'arrow', 'one column'))
+    with tempfile.TemporaryDirectory() as cache_dir:
+        # imports pandas and pyarrow, so that their import time is not counted in the first write
+        read_cached(next(iter(DATASETS)), cache_dir=os.path.join(cache_dir, 'warm-up'))
+        for name, dataset in DATASETS.items():
+            start = time.perf_counter()
+            cache_file(name, cache_dir=cache_dir)
+            write = (time.perf_counter() - start) * 1e3
+            column = [column for column in read_dataset(name).columns if column not in dataset.parse_dates][0]
+            times = [
+                best_time(lambda: read_dataset(name), args.repeat),
+                best_time(lambda: read_cached(name, cache_dir=cache_dir), args.repeat),
+                best_time(lambda: read_cached(name, arrow=True, cache_dir=cache_dir), args.repeat),
+                best_time(lambda: read_cached(name, columns=[column], cache_dir=cache_dir), args.repeat)
+            ]
+            print('{:<26} {:>9.1f} {:>7.1f}ms {:>8.2f}ms {:>8.2f}ms {:>8.2f}ms {:>9.2f}ms'.format(
+                name, os.path.getsize(os.path.join(DATA_PATH, dataset.file)) / 1e3, write, *times))
+
+
+if __name__ == '__main__':
+    main()
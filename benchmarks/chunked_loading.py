@@ -0,0 +1,82 @@
+"""
+Peak memory and time of a weekly rollup of a large extract of daily sales by store: the whole file read with
+`pd.read_csv` and `pd.to_datetime` (as the examples did) against `data_loading.read_rollup` in chunks.
+
+The extract is `daily_sales_by_store.csv` repeated --scale times as new stores, written to a temporary file. Each
+mode runs in a new process and reports its peak resident memory above the memory after the imports.
+
+Usage (from the repository root):
+    python benchmarks/chunked_loading.py --scale 100 --chunksize 200000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+
+def write_extract(path: str, scale: int):
+    from data_loading import read_dataset
+
+    df = read_dataset('daily_sales_by_store')
+    stores = df['store'].max()
+    with open(path, 'w') as extract:
+        for copy in range(scale):
+            df.assign(store=df['store'] + copy * stores).to_csv(extract, header=copy == 0, index=False,
+                                                                date_format='%Y-%m-%d')
+
+
+def run(mode: str, path: str, chunksize: int) -> dict:
+    """ Runs one mode in this process and returns its time and peak memory in MB """
+    import pandas as pd
+    from data_loading import read_rollup
+    from rollups import rollup
+
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if mode == 'read_csv':
+        df = pd.read_csv(path)
+        df['date'] = pd.to_datetime(df['date'])
+        result = rollup(df, 'date', 'sales', 'week', by='store')
+    else:
+        result = read_rollup(path, 'date', 'sales', 'week', by='store', dtypes={'store': 'int16', 'sales': 'int32'},
+                             chunksize=chunksize)
+    seconds = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    unit = 2 ** 20 if sys.platform == 'darwin' else 2 ** 10
+    return dict(seconds=seconds, peak_mb=(peak - baseline) / unit, rows=len(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=int, default=100, help='copies of daily_sales_by_store.csv in the extract')
+    parser.add_argument('--chunksize', type=int, default=200000)
+    parser.add_argument('--run', nargs=2, metavar=('MODE', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(run(args.run[0], args.run[1], args.chunksize)))
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'extract.csv')
+        write_extract(path, args.scale)
+        print('extract: {:,.1f} MB, {:,} rows'.format(os.path.getsize(path) / 2 ** 20, 18260 * args.scale))
+        print('{:<12} {:>10} {:>14} {:>10}'.format('mode', 'time (s)', 'peak (MB)', 'rows'))
+        for mode in ('read_csv', 'read_rollup'):
+            output = subprocess.run([sys.executable, __file__, '--chunksize', str(args.chunksize), '--run', mode, path],
+                                    check=True, stdout=subprocess.PIPE, universal_newlines=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print('{:<12} {:>10.2f} {:>14.1f} {:>10,}'.format(mode, result['seconds'], result['peak_mb'],
+                                                              result['rows']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Data preparation of plot_dual_axis_dual_bar_line: previous iterrows implementation against the vectorized one.
+
+Builds long data with two bar variables per group and prints the best time of each path for every number of groups.
+The results of the vectorized path are checked in tests/test_preparation.py.
+
+Usage (from the repository root):
+    python benchmarks/dual_axis_preparation.py --groups 10 1000 100000 --repeat 3
+"""
+import argparse
+import os
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from plot_functions import _interleave_grouped_bars  # noqa: E402
+
+BAR_COLOURS = ["#8c9eff", "#536dfe"]
+
+
+def make_long_data(group_number: int) -> pd.DataFrame:
+    """
+    :param group_number: number of groups
+    :return: long dataframe shaped like the melted max_profit_by_age_group.csv
+    """
+    random = np.random.RandomState(0)
+    groups = np.array(['Group{}'.format(i) for i in range(group_number)], dtype=object)
+    profit = random.randint(500, 800, group_number)
+    return pd.DataFrame({
+        'IntervationName': np.tile(groups, 2),
+        'Profit': np.tile(profit, 2),
+        'GroupName': np.repeat(['+ 40', '< 40'], group_number),
+        'TruePositiveRate': random.rand(2 * group_number).round(2)
+    })
+
+
+def legacy_preparation(df: pd.DataFrame) -> dict:
+    """ Data preparation as it was done before the vectorized implementation """
+    bar_variables = df['GroupName'].unique()
+    df0 = df[df['GroupName'] == bar_variables[0]].reset_index(drop=True)
+    df1 = df[df['GroupName'] == bar_variables[1]].reset_index(drop=True)
+
+    multi_bar_values = [[df0.loc[index, 'TruePositiveRate'],
+                         df1.loc[index, 'TruePositiveRate']]
+                        for index, row in df0.iterrows()]
+
+    multi_bar_values = [item for sublist in multi_bar_values for item in sublist]
+
+    groups = df['IntervationName'].unique()
+    index_tuple = [(group_, bar_variable) for group_ in groups for bar_variable in bar_variables]
+    colours = BAR_COLOURS * len(groups)
+
+    return dict(x=index_tuple, bar_values=multi_bar_values, colours=colours)
+
+
+def vectorized_preparation(df: pd.DataFrame) -> dict:
+    return _interleave_grouped_bars(
+        groups=df['IntervationName'].values,
+        bar_variables=df['GroupName'].values,
+        bar_values=df['TruePositiveRate'].values,
+        line_values=df['Profit'].values,
+        bar_colours=BAR_COLOURS
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--groups', type=int, nargs='+', default=[10, 1000, 100000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print('{:>10} {:>14} {:>14} {:>9}'.format('groups', 'legacy (s)', 'vectorized (s)', 'speed-up'))
+    for group_number in args.groups:
+        df = make_long_data(group_number)
+        legacy_time = min(timeit.repeat(lambda: legacy_preparation(df), number=1, repeat=args.repeat))
+        vectorized_time = min(timeit.repeat(lambda: vectorized_preparation(df), number=1, repeat=args.repeat))
+        print('{:>10} {:>14.4f} {:>14.4f} {:>8.1f}x'.format(group_number, legacy_time, vectorized_time,
+                                                             legacy_time / vectorized_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Import-time budget for plot_functions.
+
+Imports the module in fresh interpreters, keeps the fastest run and exits with status 1 when it goes above the budget
+or when importing it pulls in any of the heavy dependencies that should only load when a plot function is called.
+
+Usage (from the repository root):
+    python benchmarks/import_time.py --budget 0.05 --repeat 7
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ['pandas', 'numpy', 'bokeh', 'matplotlib', 'scipy']
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import plot_functions
+elapsed = time.perf_counter() - start
+print(json.dumps({'seconds': elapsed, 'heavy': sorted(m for m in %r if m in sys.modules)}))
+""" % (HEAVY_MODULES,)
+
+
+def measure_import(repeat: int) -> dict:
+    """
+    Imports plot_functions in `repeat` fresh interpreters
+    :param repeat: number of fresh interpreters to run
+    :return: fastest import time in seconds and heavy modules loaded by the import
+    """
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.check_output([sys.executable, '-c', PROBE], cwd=REPO_ROOT)
+        runs.append(json.loads(output.decode()))
+
+    return {
+        'seconds': min(run['seconds'] for run in runs),
+        'heavy': sorted(set(module for run in runs for module in run['heavy']))
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--budget', type=float, default=0.05, help='maximum import time in seconds (default: 0.05)')
+    parser.add_argument('--repeat', type=int, default=7, help='number of fresh interpreters (default: 7)')
+    args = parser.parse_args()
+
+    result = measure_import(args.repeat)
+    print('import plot_functions: {:.2f} ms (budget {:.2f} ms)'.format(result['seconds'] * 1000, args.budget * 1000))
+
+    failed = False
+    if result['heavy']:
+        print('FAIL: importing plot_functions loaded {}'.format(', '.join(result['heavy'])))
+        failed = True
+    if result['seconds'] > args.budget:
+        print('FAIL: import time is above budget')
+        failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
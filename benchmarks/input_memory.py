@@ -0,0 +1,165 @@
+"""
+Memory used by the plot functions compared with the size of their input.
+
+Builds frames shaped like the bundled datasets, then runs each plot function in a process of its own, which:
+- measures the peak resident memory (RSS) added by the call, from the high-water mark of the process that is reset
+  just before the call (Linux); elsewhere, the peak of the allocations traced by tracemalloc is measured instead,
+  which is higher: it also counts memory that is reserved but never written, such as the hash tables that pandas
+  sizes for every row when it factorizes a column,
+- checks that the input frame was not modified.
+The bar chart frame is 10 times smaller than the others, one bar per row, drawn with nested_factors=False: the
+default nested factors are a Python tuple per bar, several times the size of its row. --extra-columns adds unused
+columns, as in production extracts; they make the input larger but not the work of the plot functions, so the default
+is none.
+
+Exits with status 1 if a frame was modified or if a peak is above --max-ratio times the input size.
+
+Usage (from the repository root):
+    python benchmarks/input_memory.py --rows 1000000 --max-ratio 2
+"""
+import argparse
+import ctypes
+import ctypes.util
+import json
+import os
+import subprocess
+import sys
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from plot_functions import plot_single_line, plot_multiple_lines, plot_multiple_bar_chart  # noqa: E402
+
+
+def add_extra_columns(df: pd.DataFrame, extra_columns: int) -> pd.DataFrame:
+    for i in range(extra_columns):
+        df['unused_{}'.format(i)] = np.arange(len(df), dtype=np.float64)
+    return df
+
+
+def make_cases(rows: int, extra_columns: int) -> list:
+    """
+    :return: list of (name, plot function, input dataframe, keyword arguments)
+    """
+    stores = 10
+    dates = pd.date_range('2013-01-01', periods=rows // stores, freq='min')
+    random = np.random.RandomState(0)
+
+    daily_sales = add_extra_columns(pd.DataFrame({
+        'date': dates.values[random.permutation(len(dates))],
+        'sales': random.randint(10000, 20000, len(dates)),
+    }), extra_columns)
+
+    sales_by_store = add_extra_columns(pd.DataFrame({
+        'date': np.repeat(dates.values, stores),
+        'store': np.tile(np.arange(1, stores + 1), len(dates)),
+        'sales': random.randint(1000, 2000, len(dates) * stores),
+    }), extra_columns)
+
+    years = np.arange(rows // stores // 10)
+    yearly_sales_by_store = add_extra_columns(pd.DataFrame({
+        'year': np.repeat(years, stores),
+        'store': np.tile(np.arange(1, stores + 1), len(years)),
+        'sales': random.randint(500000, 1000000, len(years) * stores),
+    }), extra_columns).set_index(['year', 'store'])
+
+    return [
+        ('plot_single_line', plot_single_line, daily_sales,
+         dict(x_axis='date', y_axis='sales', title='Total sales')),
+        ('plot_multiple_lines', plot_multiple_lines, sales_by_store,
+         dict(x_axis='date', y_axis='sales', category_column='store', title='Total sales')),
+        ('plot_multiple_bar_chart', plot_multiple_bar_chart, yearly_sales_by_store,
+         dict(x_axis='year', y_axis='sales', x_axis_categories='store', title='Total sales by store and year',
+              nested_factors=False)),
+        ('plot_multiple_bar_chart/rollup', plot_multiple_bar_chart, sales_by_store,
+         dict(x_axis='date', y_axis='sales', x_axis_categories='store', title='Total sales', resolution='auto')),
+    ]
+
+
+def _status_kilobytes(field: str) -> int:
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    raise KeyError(field)
+
+
+def measure_case(case: str, rows: int, extra_columns: int, traced: bool = False) -> dict:
+    """
+    Calls the plot function of one case on its input, in the current process.
+    :param traced: measure the allocations traced by tracemalloc instead of the RSS
+    :return: dictionary with the input size, the peak memory of the call in bytes, how it was measured and whether the
+    input is unchanged
+    """
+    for name, plot_function, df, kwargs in make_cases(1000, 0):
+        plot_function(df, **kwargs)  # imports the dependencies before measuring
+
+    name, plot_function, df, kwargs = next(case_ for case_ in make_cases(rows, extra_columns) if case_[0] == case)
+    input_bytes = df.memory_usage(deep=True, index=True).sum()
+    checksum = pd.util.hash_pandas_object(df, index=True).values.sum()
+    columns, index_names = list(df.columns), list(df.index.names)
+
+    try:
+        if traced:
+            raise OSError('tracemalloc asked for')
+        # memory freed while building the input is given back to the system, so that the call cannot reuse it unseen
+        ctypes.CDLL(ctypes.util.find_library('c')).malloc_trim(0)
+        # writing 5 to clear_refs resets the high-water mark of the resident memory (VmHWM) to the current RSS
+        with open('/proc/self/clear_refs', 'w') as clear_refs:
+            clear_refs.write('5')
+        method, before = 'rss', _status_kilobytes('VmRSS')
+    except (OSError, AttributeError):
+        method = 'traced'
+        tracemalloc.start()
+    p = plot_function(df, **kwargs)
+    if method == 'rss':
+        peak = (_status_kilobytes('VmHWM') - before) * 1024
+    else:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    del p
+
+    unchanged = (list(df.columns) == columns and list(df.index.names) == index_names and
+                 pd.util.hash_pandas_object(df, index=True).values.sum() == checksum)
+    return dict(input_bytes=int(input_bytes), peak=int(peak), method=method, unchanged=bool(unchanged))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--extra-columns', type=int, default=0)
+    parser.add_argument('--max-ratio', type=float, default=2.0,
+                        help='maximum peak memory of a call divided by the input size (default: 2.0)')
+    parser.add_argument('--traced', action='store_true', help='measure allocations with tracemalloc instead of RSS')
+    parser.add_argument('--case', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(measure_case(args.case, args.rows, args.extra_columns, args.traced)))
+        return 0
+
+    failed = False
+    print('{:<32} {:>12} {:>12} {:>7} {:>7}  {}'.format(
+        'function', 'input (MB)', 'peak (MB)', 'ratio', 'peak of', 'input unchanged'))
+    # a fixed mmap threshold makes glibc give every large block back to the system when it is freed, instead of keeping
+    # it for later allocations, so that the RSS follows the memory in use
+    environment = dict(os.environ, MALLOC_MMAP_THRESHOLD_='131072')
+    for name, _, _, _ in make_cases(1000, 0):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--case', name, '--rows', str(args.rows),
+             '--extra-columns', str(args.extra_columns)] + (['--traced'] if args.traced else []),
+            check=True, stdout=subprocess.PIPE, universal_newlines=True, env=environment).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        ratio = result['peak'] / result['input_bytes']
+        failed |= (not result['unchanged']) or ratio > args.max_ratio
+        print('{:<32} {:>12.1f} {:>12.1f} {:>7.2f} {:>7}  {}'.format(
+            name, result['input_bytes'] / 1e6, result['peak'] / 1e6, ratio, result['method'], result['unchanged']))
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""
+Browser-independent cost of `plot_multiple_lines` against the number of series: one `line` renderer per series over a
+wide pivoted source (multi_line=False) against one `multi_line` renderer over ragged per-series arrays
+(multi_line=True). Series start on different dates, so the pivoted source is padded with NaN.
+
+For each mode it reports the build time, the `json_item` serialization time, the size of the JSON document, the number
+of renderers and the number of values held by the data sources (which the browser has to decode and iterate).
+
+Usage (from the repository root):
+    python benchmarks/multi_line.py --series 10 100 1000 --points 365
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from bokeh.embed import json_item
+from bokeh.models import ColumnDataSource, GlyphRenderer
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from plot_functions import plot_multiple_lines  # noqa: E402
+
+
+def make_sales(series: int, points: int, seed: int = 0) -> pd.DataFrame:
+    """
+    :return: long dataframe with daily sales of each store, every store starting on a random day of the first year
+    """
+    random = np.random.RandomState(seed)
+    dates = pd.date_range('2018-01-01', periods=points + 365)
+    starts = random.randint(0, 365, series)
+    rows = np.concatenate([np.arange(start, start + points) for start in starts])
+    return pd.DataFrame({
+        'date': dates.values[rows],
+        'store': np.repeat(np.arange(series), points),
+        'sales': random.gamma(2, 500, series * points).round(2)
+    })
+
+
+def source_values(model) -> int:
+    """ :return: number of values in all the data sources of the model, counting every element of ragged columns """
+    count = 0
+    for source in model.select({'type': ColumnDataSource}):
+        for values in source.data.values():
+            count += sum(len(value) for value in values) if isinstance(values[0], np.ndarray) else len(values)
+    return count
+
+
+def measure(df: pd.DataFrame, multi_line: bool) -> dict:
+    start = time.perf_counter()
+    p = plot_multiple_lines(df, title='Sales', x_axis='date', y_axis='sales', category_column='store',
+                            multi_line=multi_line)
+    built = time.perf_counter()
+    document = json.dumps(json_item(p))
+    serialized = time.perf_counter()
+    return dict(
+        build=built - start,
+        serialize=serialized - built,
+        kilobytes=len(document.encode()) / 1e3,
+        renderers=len(list(p.select({'type': GlyphRenderer}))),
+        values=source_values(p)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--series', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--points', type=int, default=365, help='points per series')
+    args = parser.parse_args()
+
+    print('{:>7} {:<11} {:>9} {:>13} {:>10} {:>10} {:>11}'.format('series', 'mode', 'build (s)', 'serialize (s)',
+                                                                   'JSON (KB)', 'renderers', 'values'))
+    for series in args.series:
+        df = make_sales(series, args.points)
+        for mode, multi_line in (('lines', False), ('multi_line', True)):
+            result = measure(df, multi_line)
+            print('{:>7} {:<11} {:>9.3f} {:>13.3f} {:>10.1f} {:>10} {:>11}'.format(
+                series, mode, result['build'], result['serialize'], result['kilobytes'], result['renderers'],
+                result['values']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""
+Headless check and timing of the output backends of `plot_single_line`, `plot_multiple_lines` and
+`plot_dual_axis_dual_bar_line`: for each number of points and each output_backend (canvas, webgl and auto), it builds
+the figure, serializes it with `json_item` and `file_html`, and checks that the document holds the expected backend.
+
+With --export it also renders each page to PNG in headless Chrome (needs selenium and chromedriver). WebGL is often
+missing in headless browsers, in which case BokehJS draws on canvas: the export still has to succeed. If no browser
+can be started, the export is reported as unavailable and the rest of the run goes on.
+
+Exits with status 1 if a document does not build or holds another backend than expected.
+
+Usage (from the repository root):
+    python benchmarks/output_backend.py --points 10000 100000 1000000
+    python benchmarks/output_backend.py --points 200000 --export
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from bokeh.embed import file_html, json_item
+from bokeh.resources import INLINE
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from plot_functions import (WEBGL_THRESHOLD, plot_dual_axis_dual_bar_line, plot_multiple_lines,  # noqa: E402
+                            plot_single_line)
+
+BACKENDS = ('canvas', 'webgl', 'auto')
+LINES = 10
+
+
+def make_cases(points: int, seed: int = 0) -> list:
+    """
+    :return: list of (name, function building the figure from keyword arguments) drawing about `points` points each
+    """
+    random = np.random.RandomState(seed)
+    dates = pd.date_range('2013-01-01', periods=points, freq='min').values
+    single = pd.DataFrame({'date': dates, 'sales': random.gamma(2, 500, points)})
+    by_store = pd.DataFrame({
+        'date': np.repeat(dates[:points // LINES], LINES),
+        'store': np.tile(np.arange(LINES), points // LINES),
+        'sales': random.gamma(2, 500, points // LINES * LINES)
+    })
+    # two bars and one line point per group
+    groups = np.array(['group {}'.format(group) for group in range(max(points // 3, 1))], dtype=object)
+    profit = pd.DataFrame({
+        'group': np.repeat(groups, 2),
+        'age': np.tile(np.array(['+ 40', '< 40'], dtype=object), len(groups)),
+        'rate': random.uniform(0.4, 0.6, 2 * len(groups)),
+        'profit': np.repeat(random.randint(700, 800, len(groups)), 2)
+    })
+    return [
+        ('plot_single_line', lambda **kwargs: plot_single_line(single, 'date', 'sales', 'Sales', **kwargs)),
+        ('plot_multiple_lines',
+         lambda **kwargs: plot_multiple_lines(by_store, 'Sales', 'date', 'sales', 'store', **kwargs)),
+        ('plot_dual_axis_dual_bar_line',
+         lambda **kwargs: plot_dual_axis_dual_bar_line(profit, 'Profit', 'group', 'rate', 'age', 'profit', **kwargs))
+    ]
+
+
+def create_driver():
+    """ :return: headless Chrome driver, or None and the reason if it cannot be started """
+    try:
+        from selenium import webdriver
+
+        options = webdriver.ChromeOptions()
+        options.add_argument('--headless')
+        return webdriver.Chrome(options=options), None
+    except Exception as error:  # selenium missing, no chromedriver, no browser...
+        return None, '{}: {}'.format(type(error).__name__, str(error).strip().splitlines()[0] if str(error) else '')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--points', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--export', action='store_true', help='also render each page to PNG in headless Chrome')
+    args = parser.parse_args()
+
+    driver, unavailable = create_driver() if args.export else (None, None)
+    if unavailable:
+        print('export unavailable, only the documents are checked ({})\n'.format(unavailable))
+
+    # the first call of each function imports pandas and Bokeh modules, which is not counted in the first case
+    for _, build in make_cases(100):
+        json_item(build())
+
+    failures = 0
+    print('{:<30} {:>9} {:<7} {:<7} {:>9} {:>9} {:>11} {:>11}'.format(
+        'function', 'points', 'mode', 'backend', 'build (s)', 'json (s)', 'HTML (KB)', 'export (s)'))
+    try:
+        for points in args.points:
+            for name, build in make_cases(points):
+                for backend in BACKENDS:
+                    expected = backend if backend != 'auto' else 'webgl' if points > WEBGL_THRESHOLD else 'canvas'
+                    start = time.perf_counter()
+                    try:
+                        p = build(output_backend=backend)
+                        built = time.perf_counter() - start
+                        start = time.perf_counter()
+                        item = json.dumps(json_item(p))
+                        serialized = time.perf_counter() - start
+                        html = file_html(p, INLINE, name)
+                    except Exception as error:
+                        failures += 1
+                        print('{:<30} {:>9,} {:<7} build failed: {!r}'.format(name, points, backend, error))
+                        continue
+                    # canvas is the default of Bokeh, which is left out of the document
+                    in_document = expected == 'canvas' or '"output_backend": "{}"'.format(expected) in item
+                    if p.output_backend != expected or not in_document:
+                        failures += 1
+                        print('{:<30} {:>9,} {:<7} document does not use {}'.format(name, points, backend, expected))
+
+                    exported = '-'
+                    if driver is not None:
+                        from bokeh.io.export import get_screenshot_as_png
+                        start = time.perf_counter()
+                        try:
+                            get_screenshot_as_png(p, driver=driver, timeout=120)
+                            exported = '{:.3f}'.format(time.perf_counter() - start)
+                        except Exception as error:
+                            failures += 1
+                            exported = 'failed: {}'.format(type(error).__name__)
+
+                    print('{:<30} {:>9,} {:<7} {:<7} {:>9.3f} {:>9.3f} {:>11,.0f} {:>11}'.format(
+                        name, points, backend, p.output_backend, built, serialized, len(html.encode()) / 1e3,
+                        exported))
+    finally:
+        if driver is not None:
+            driver.quit()
+
+    if failures:
+        print('\n{} failure(s)'.format(failures))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
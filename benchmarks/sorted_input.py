@@ -0,0 +1,90 @@
+"""
+Timing of the date ordering of `plot_single_line` on sorted, nearly-sorted (1% of the rows swapped with their
+neighbour) and shuffled inputs: for each number of rows, the one-pass check of the order, the stable argsort and take
+of the projected columns it replaces when the dates are sorted, and the "prepare data" stage of `plot_single_line`.
+
+Exits with status 1 if a chart does not draw its dates in ascending order.
+
+Usage (from the repository root):
+    python benchmarks/sorted_input.py --rows 100000 1000000 10000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from plot_functions import _column_arrays, plot_single_line  # noqa: E402
+from profiling import profile_stages  # noqa: E402
+
+ORDERS = ('sorted', 'nearly-sorted', 'shuffled')
+
+
+def make_frame(rows: int, order: str, seed: int = 0) -> pd.DataFrame:
+    """ :return: dataframe with one date per minute and its sales, with the rows in the given order """
+    random = np.random.RandomState(seed)
+    rows_order = np.arange(rows)
+    if order == 'nearly-sorted':
+        swapped = random.choice(max(rows - 1, 1), size=rows // 100, replace=False)
+        rows_order[swapped], rows_order[swapped + 1] = rows_order[swapped + 1], rows_order[swapped]
+    elif order == 'shuffled':
+        random.shuffle(rows_order)
+    dates = pd.date_range('2013-01-01', periods=rows, freq='min').values
+    return pd.DataFrame({'date': dates[rows_order], 'sales': random.gamma(2, 500, rows)[rows_order]})
+
+
+def best_of(function, repeat: int) -> float:
+    """ :return: shortest time of repeat calls of function, in seconds """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[100000, 1000000, 10000000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    # the first call imports pandas and Bokeh modules, which is not counted in the first case
+    plot_single_line(make_frame(100, 'shuffled'), 'date', 'sales', 'Sales')
+
+    failures = 0
+    print('{:<14} {:>11} {:>10} {:>12} {:>14}'.format('order', 'rows', 'check (s)', 'argsort (s)', 'prepare (s)'))
+    for rows in args.rows:
+        for order in ORDERS:
+            df = make_frame(rows, order)
+            data = _column_arrays(df, ['date', 'sales'])
+            dates = data['date']
+            checked = best_of(lambda: (dates[1:] >= dates[:-1]).all(), args.repeat)
+            sorted_ = best_of(lambda: [values.take(np.argsort(dates, kind='mergesort')) for values in data.values()],
+                              args.repeat)
+
+            prepare = []
+            for _ in range(args.repeat):
+                with profile_stages() as profile:
+                    p = plot_single_line(df, 'date', 'sales', 'Sales')
+                prepare += [record.seconds for record in profile.records
+                            if record.function == 'plot_single_line' and record.stage == 'prepare data']
+            x = p.renderers[0].data_source.data['date']
+            if len(x) > 1 and not (x[1:] >= x[:-1]).all():
+                failures += 1
+                print('{:<14} {:>11,} dates are not in ascending order'.format(order, rows))
+                continue
+            print('{:<14} {:>11,} {:>10.4f} {:>12.4f} {:>14.4f}'.format(order, rows, checked, sorted_, min(prepare)))
+
+    if failures:
+        print('\n{} failure(s)'.format(failures))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
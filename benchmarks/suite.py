@@ -0,0 +1,293 @@
+"""
+Benchmark suite of the plot functions at several data scales, with results stored per commit so that they can be
+compared between commits.
+
+Synthetic frames are shaped like the bundled datasets and scaled by --scales: the daily series get `scale` points per
+day over the same five years, the yearly bars `scale` times as many years (the bar colours limit the number of
+stores) and the dual axis chart `scale` times as many groups. For each plot function and scale it times, separately:
+- construct: the call of the plot function,
+- json: `json_item` and `json.dumps` of the result,
+- html: `file_html` of the result written to a file,
+and reports the peak memory allocated during each step (tracemalloc, in a separate run so that tracing does not slow
+the timed run down) and the size of the JSON and HTML output.
+
+Every case runs at every scale, except the table above --max-table-rows rows (see make_cases). The frame of each case
+is built just before it runs and freed after it, so the peak memory of the suite is the one of its largest case. The
+default scales run in about 1 GB of resident memory, most of it for plot_multiple_lines at 1,000x; at 10,000x its
+frame alone has 183 million rows.
+
+Results are written to benchmarks/results/<commit>.json; --compare prints the ratio of each time to a previous result
+and exits with status 1 if one is above --threshold.
+
+Usage (from the repository root):
+    python benchmarks/suite.py --scales 1 100 1000 --repeat 3
+    python benchmarks/suite.py --scales 10000 --functions plot_single_line
+    python benchmarks/suite.py --scales 1 100 --compare <commit of a previous run> --threshold 1.2
+"""
+import argparse
+import contextlib
+import datetime
+import gc
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from functools import partial
+
+import numpy as np
+import pandas as pd
+import bokeh
+from bokeh.embed import file_html, json_item
+from bokeh.resources import CDN
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(REPO_ROOT, 'benchmarks', 'results')
+sys.path.insert(0, REPO_ROOT)
+
+from plot_functions import (plot_dual_axis_dual_bar_line, plot_multiple_bar_chart, plot_multiple_lines,  # noqa: E402
+                            plot_single_line, plot_table)
+
+PHASES = ('construct', 'json', 'html')
+DAYS = 1826
+STORES = 10
+
+
+def daily_dates(scale: int) -> np.ndarray:
+    """ :return: scale dates per day from 2013-01-01 to 2017-12-31 """
+    return pd.date_range('2013-01-01', periods=DAYS * scale, freq=pd.Timedelta(days=1) / scale).values
+
+
+def make_daily_sales(scale: int, random) -> pd.DataFrame:
+    """ :return: frame like daily_sales.csv (rows in no particular order) """
+    dates = daily_dates(scale)[random.permutation(DAYS * scale)]
+    day_num = pd.DatetimeIndex(dates).dayofweek.values.astype(np.int8)
+    return pd.DataFrame({
+        'date': dates,
+        'sales': random.randint(10000, 30000, len(dates)).astype(np.int32),
+        'day': np.array(['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'],
+                        dtype=object)[day_num],
+        'day_num': day_num
+    })
+
+
+def make_daily_sales_by_store(scale: int, random) -> pd.DataFrame:
+    """ :return: frame like daily_sales_by_store.csv """
+    dates = daily_dates(scale)
+    return pd.DataFrame({
+        'date': np.repeat(dates, STORES),
+        'store': np.tile(np.arange(1, STORES + 1, dtype=np.int16), len(dates)),
+        'sales': random.randint(500, 3000, len(dates) * STORES).astype(np.int32)
+    })
+
+
+def make_yearly_sales_by_store(scale: int, random) -> pd.DataFrame:
+    """ :return: frame like yearly_sales_by_store.csv, with scale times as many years """
+    years, stores = np.arange(2013, 2013 + 5 * scale), np.arange(1, STORES + 1, dtype=np.int16)
+    return pd.DataFrame({
+        'year': np.repeat(years, len(stores)),
+        'store': np.tile(stores, len(years)),
+        'sales': random.randint(500000, 1100000, len(years) * len(stores))
+    })
+
+
+def make_profit_by_group(scale: int, random) -> pd.DataFrame:
+    """ :return: max_profit_by_age_group.csv melted as in the dual axis example, with scale times as many groups """
+    groups = ['Intervention{}'.format(group) for group in range(5 * scale)]
+    return pd.DataFrame({
+        'IntervationName': np.repeat(groups, 2).astype(object),
+        'Profit': np.repeat(random.randint(700, 800, len(groups)), 2),
+        'GroupName': np.tile(np.array(['+ 40', '< 40'], dtype=object), len(groups)),
+        'TruePositiveRate': random.uniform(0.4, 0.6, 2 * len(groups)).round(2)
+    })
+
+
+def make_cases(scale: int) -> list:
+    """
+    :return: list of (name, plot function, number of input rows, function building the input dataframe, keyword
+    arguments) with the arguments of the examples; each frame is built from a random generator of its own, so that it
+    does not depend on the cases that run before it
+    """
+    return [
+        ('plot_single_line', plot_single_line, DAYS * scale,
+         lambda: make_daily_sales(scale, np.random.RandomState(0)),
+         dict(x_axis='date', y_axis='sales', title='Total sales')),
+        ('plot_multiple_lines', plot_multiple_lines, DAYS * scale * STORES,
+         lambda: make_daily_sales_by_store(scale, np.random.RandomState(1)),
+         dict(title='Total sales', x_axis='date', y_axis='sales', category_column='store')),
+        ('plot_multiple_bar_chart', plot_multiple_bar_chart, 5 * scale * STORES,
+         lambda: make_yearly_sales_by_store(scale, np.random.RandomState(2)),
+         dict(title='Total sales by store and year', x_axis='year', y_axis='sales', x_axis_categories='store')),
+        ('plot_dual_axis_dual_bar_line', plot_dual_axis_dual_bar_line, 2 * 5 * scale,
+         lambda: make_profit_by_group(scale, np.random.RandomState(3)),
+         dict(title='TPR by group and profit', groups_name='IntervationName', bar_value_name='TruePositiveRate',
+              bar_variable_name='GroupName', line_variable_name='Profit')),
+        # the only case capped by --max-table-rows: a table page holds every row as HTML, several GB at 10,000x
+        ('plot_table', plot_table, DAYS * scale,
+         lambda: make_daily_sales(scale, np.random.RandomState(0)), dict())
+    ]
+
+
+def run_phases(plot_function, df: pd.DataFrame, kwargs: dict, html_path: str, measure):
+    """
+    Runs the three steps of a case, each one inside measure(phase).
+    :return: sizes of the JSON and HTML output in bytes
+    """
+    with measure('construct'):
+        model = plot_function(df, **kwargs)
+    with measure('json'):
+        json_bytes = len(json.dumps(json_item(model)).encode())
+    with measure('html'):
+        with open(html_path, 'w', encoding='utf-8') as html_file:
+            html_file.write(file_html(model, CDN, 'benchmark'))
+    return json_bytes, os.path.getsize(html_path)
+
+
+@contextlib.contextmanager
+def timed(seconds: dict, phase: str):
+    """ Stores the time of the block in seconds[phase] """
+    start = time.perf_counter()
+    yield
+    seconds[phase] = time.perf_counter() - start
+
+
+@contextlib.contextmanager
+def peak_memory(peak_mb: dict, phase: str):
+    """ Stores the peak memory allocated during the block in peak_mb[phase], tracemalloc must be tracing """
+    tracemalloc.reset_peak()
+    start = tracemalloc.get_traced_memory()[0]
+    yield
+    peak_mb[phase] = (tracemalloc.get_traced_memory()[1] - start) / 2 ** 20
+
+
+def run_case(plot_function, df: pd.DataFrame, kwargs: dict, repeat: int) -> dict:
+    """ :return: best time and peak memory of each phase, and the output sizes """
+    with tempfile.TemporaryDirectory() as directory:
+        html_path = os.path.join(directory, 'chart.html')
+        best = {}
+        for _ in range(repeat):
+            seconds = {}
+            json_bytes, html_bytes = run_phases(plot_function, df, kwargs, html_path, partial(timed, seconds))
+            best = {phase: min(value, best.get(phase, value)) for phase, value in seconds.items()}
+
+        peak_mb = {}
+        tracemalloc.start()
+        try:
+            run_phases(plot_function, df, kwargs, html_path, partial(peak_memory, peak_mb))
+        finally:
+            tracemalloc.stop()
+
+    return dict(seconds=best, peak_mb=peak_mb, json_bytes=json_bytes, html_bytes=html_bytes)
+
+
+def git_commit() -> str:
+    """ :return: short hash of HEAD, with -dirty if the tree has changes, or 'unknown' outside a git repository """
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                                         stderr=subprocess.DEVNULL, universal_newlines=True).strip()
+        status = subprocess.check_output(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=REPO_ROOT,
+                                         stderr=subprocess.DEVNULL, universal_newlines=True)
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+    return commit + ('-dirty' if status.strip() else '')
+
+
+def load_results(reference: str) -> dict:
+    """
+    :param reference: path of a results file, or commit (or its prefix) of a file in benchmarks/results
+    :return: stored results
+    """
+    if os.path.isfile(reference):
+        path = reference
+    else:
+        matches = sorted(glob.glob(os.path.join(RESULTS_DIR, glob.escape(reference) + '*.json')))
+        if not matches:
+            raise FileNotFoundError('No results for {} in {}'.format(reference, RESULTS_DIR))
+        path = matches[0]
+    with open(path) as results_file:
+        return json.load(results_file)
+
+
+def compare(results: dict, reference: dict, threshold: float) -> bool:
+    """
+    Prints the ratio of each time to the reference.
+    :return: True if no time is above threshold times its reference
+    """
+    reference_cases = {(case['name'], case['scale']): case for case in reference['cases']}
+    print('\ncompared with {} ({})'.format(reference['commit'], reference['date']))
+    print('{:<30} {:>6} {:<10} {:>10} {:>10} {:>7}'.format('function', 'scale', 'phase', 'before', 'now', 'ratio'))
+    passed = True
+    for case in results['cases']:
+        before = reference_cases.get((case['name'], case['scale']))
+        if before is None or 'seconds' not in case or 'seconds' not in before:
+            continue
+        for phase in PHASES:
+            ratio = case['seconds'][phase] / before['seconds'][phase]
+            regression = ratio > threshold
+            passed &= not regression
+            print('{:<30} {:>6} {:<10} {:>9.3f}s {:>9.3f}s {:>6.2f}x{}'.format(
+                case['name'], case['scale'], phase, before['seconds'][phase], case['seconds'][phase], ratio,
+                ' <- regression' if regression else ''))
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 100, 1000])
+    parser.add_argument('--functions', nargs='+', help='names of the plot functions to run (default: all)')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs of each case, the best one is kept')
+    parser.add_argument('--max-table-rows', type=int, default=2000000,
+                        help='skip the table case if it has more input rows (0: none)')
+    parser.add_argument('--results-dir', default=RESULTS_DIR)
+    parser.add_argument('--compare', metavar='COMMIT_OR_FILE', help='previous results to compare with')
+    parser.add_argument('--threshold', type=float, default=1.2, help='time ratio reported as a regression')
+    args = parser.parse_args()
+    # read before the results of this run are written, as they can replace the reference of the same commit
+    reference = load_results(args.compare) if args.compare else None
+
+    results = dict(commit=git_commit(), date=datetime.datetime.now().isoformat(timespec='seconds'),
+                   python=platform.python_version(), bokeh=bokeh.__version__, pandas=pd.__version__,
+                   numpy=np.__version__, machine=platform.platform(), cases=[])
+
+    # the first call of each function imports pandas and Bokeh modules, which is not counted in the first case
+    for _, plot_function, _, make_frame, kwargs in make_cases(1):
+        json_item(plot_function(make_frame().head(10), **kwargs))
+
+    print('{:<30} {:>6} {:>10} {:>10} {:>10} {:>10} {:>22} {:>10} {:>10}'.format(
+        'function', 'scale', 'rows', 'construct', 'json', 'html', 'peak MB (c / j / h)', 'JSON KB', 'HTML KB'))
+    for scale in args.scales:
+        for name, plot_function, rows, make_frame, kwargs in make_cases(scale):
+            if args.functions and name not in args.functions:
+                continue
+            case = dict(name=name, scale=scale, rows=rows)
+            if plot_function is plot_table and args.max_table_rows and rows > args.max_table_rows:
+                print('{:<30} {:>6} {:>10,} skipped (above --max-table-rows)'.format(name, scale, rows))
+                results['cases'].append(dict(case, skipped=True))
+                continue
+            df = make_frame()
+            case.update(run_case(plot_function, df, kwargs, args.repeat))
+            # Bokeh models hold reference cycles, collected here so that the next frame does not add to this one
+            del df
+            gc.collect()
+            results['cases'].append(case)
+            print('{:<30} {:>6} {:>10,} {:>9.3f}s {:>9.3f}s {:>9.3f}s {:>22} {:>10,.0f} {:>10,.0f}'.format(
+                name, scale, rows, *(case['seconds'][phase] for phase in PHASES),
+                ' / '.join('{:.1f}'.format(case['peak_mb'][phase]) for phase in PHASES),
+                case['json_bytes'] / 1e3, case['html_bytes'] / 1e3))
+
+    os.makedirs(args.results_dir, exist_ok=True)
+    path = os.path.join(args.results_dir, '{}.json'.format(results['commit']))
+    with open(path, 'w') as results_file:
+        json.dump(results, results_file, indent=1)
+    print('\nresults written to {}'.format(os.path.relpath(path)))
+
+    if reference is not None and not compare(results, reference, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
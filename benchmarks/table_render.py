@@ -0,0 +1,132 @@
+"""
+Cost of `plot_table` on large tables: cells styled and formatted by a per-cell `HTMLTemplateFormatter` (as before)
+against one stylesheet with native `NumberFormatter`/`DateFormatter`/`StringFormatter`.
+
+It always reports the build and `file_html` time and the size of the page. With --browser it also opens each page in
+headless Chrome (needs selenium and chromedriver) and times, in the browser, the first render of the table and a
+scroll through all its rows, which is where the formatters run.
+
+Usage (from the repository root):
+    python benchmarks/table_render.py --rows 10000 100000
+    python benchmarks/table_render.py --rows 100000 --browser
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from bokeh.embed import file_html
+from bokeh.layouts import Column, widgetbox
+from bokeh.models import ColumnDataSource
+from bokeh.models.widgets import DataTable, Div, HTMLTemplateFormatter, TableColumn
+from bokeh.resources import INLINE
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from plot_functions import plot_table  # noqa: E402
+
+HEADER_STYLE = "color: #757575; font-family: Courier; font-weight:800"
+TABLE_STYLE = "color: #757575; font-family: Courier; font-weight:normal"
+
+# Scrolls the grid of the page from top to bottom, one viewport at a time, and returns the elapsed milliseconds
+SCROLL_SCRIPT = """
+var viewport = document.querySelector('.slick-viewport');
+var start = performance.now();
+for (var top = 0; top < viewport.scrollHeight; top += viewport.clientHeight) {
+    viewport.scrollTop = top;
+    viewport.dispatchEvent(new Event('scroll'));
+    document.querySelectorAll('.slick-cell').length;
+}
+return performance.now() - start;
+"""
+
+
+def make_sales(rows: int, seed: int = 0) -> pd.DataFrame:
+    random = np.random.RandomState(seed)
+    return pd.DataFrame({
+        'date': pd.Timestamp('2013-01-01') + pd.to_timedelta(random.randint(0, 1826, rows), unit='D'),
+        'store': random.randint(1, 11, rows),
+        'item': np.char.add('item ', random.randint(1, 51, rows).astype(str)),
+        'sales': random.gamma(2, 500, rows).round(2)
+    })
+
+
+def template_table(df: pd.DataFrame):
+    """ plot_table as it was: every cell wrapped in a div by an HTMLTemplateFormatter, dates as strings """
+    data = {column: df[column].astype(str).values if df[column].dtype.kind == 'M' else df[column].values
+            for column in df.columns}
+    template = """
+    <div style="{}">
+        <%= value %>
+    </div>
+    """.format(TABLE_STYLE)
+    data_table = DataTable(source=ColumnDataSource(data=data),
+                           columns=[TableColumn(field=column, title=column,
+                                                formatter=HTMLTemplateFormatter(template=template))
+                                    for column in df.columns],
+                           fit_columns=True, header_row=True, index_position=None, height=250)
+    return Column(Div(text="<style>.slick-header.ui-state-default{" + HEADER_STYLE + "}</style>"),
+                  widgetbox(data_table))
+
+
+def measure(build_table, df: pd.DataFrame, driver=None) -> dict:
+    start = time.perf_counter()
+    html = file_html(build_table(df), INLINE)
+    result = dict(python=time.perf_counter() - start, kilobytes=len(html.encode()) / 1e3)
+
+    if driver is not None:
+        with tempfile.NamedTemporaryFile('w', suffix='.html', delete=False, encoding='utf-8') as page:
+            page.write(html)
+        try:
+            start = time.perf_counter()
+            driver.get('file://' + page.name)
+            driver.execute_async_script("""
+                var done = arguments[arguments.length - 1];
+                (function wait() { document.querySelector('.slick-cell') ? done() : setTimeout(wait, 5); })();
+            """)
+            result['first_render'] = time.perf_counter() - start
+            result['scroll'] = driver.execute_script(SCROLL_SCRIPT) / 1e3
+        finally:
+            os.remove(page.name)
+    return result
+
+
+def create_driver():
+    from selenium import webdriver
+
+    options = webdriver.ChromeOptions()
+    options.add_argument('--headless')
+    driver = webdriver.Chrome(options=options)
+    driver.set_script_timeout(120)
+    return driver
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--browser', action='store_true', help='also time the render in headless Chrome')
+    args = parser.parse_args()
+
+    driver = create_driver() if args.browser else None
+    try:
+        print('{:>8} {:<11} {:>10} {:>10} {:>12} {:>10}'.format('rows', 'formatter', 'python (s)', 'HTML (KB)',
+                                                                'render (s)', 'scroll (s)'))
+        for rows in args.rows:
+            df = make_sales(rows)
+            for name, build_table in (('template', template_table), ('native', plot_table)):
+                result = measure(build_table, df, driver)
+                print('{:>8} {:<11} {:>10.3f} {:>10.1f} {:>12} {:>10}'.format(
+                    rows, name, result['python'], result['kilobytes'],
+                    '{:.3f}'.format(result['first_render']) if 'first_render' in result else '-',
+                    '{:.3f}'.format(result['scroll']) if 'scroll' in result else '-'))
+    finally:
+        if driver is not None:
+            driver.quit()
+
+
+if __name__ == '__main__':
+    main()
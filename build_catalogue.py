@@ -0,0 +1,307 @@
+"""
+Headless build of every chart of the catalogue.
+
+Finds the example scripts (`*_plot/*.py` with a `create_layout()` function), renders each layout with `file_html`
+instead of `show()` in a pool of processes and writes the HTML next to its script (or in --output-dir).
+
+A chart is only rebuilt when its script, its data files, the shared modules or the Bokeh version changed since the last
+build, which is recorded in .catalogue_build.json together with the timing of each chart. The ids of each page are
+normalized after file_html, so that it is byte-identical from one build to the next (see normalize_ids); this is
+checked against the HTML of one Bokeh version, and the build fails with any other.
+
+Usage (from the repository root):
+    python build_catalogue.py --jobs 4
+    python build_catalogue.py --force line_plot/line_chart.py
+"""
+import argparse
+import ast
+import glob
+import hashlib
+import importlib.util
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+DATA_PATH = os.path.join(REPO_ROOT, 'static', 'data')
+CHART_SCRIPTS = '*_plot/*.py'
+MANIFEST = os.path.join(REPO_ROOT, '.catalogue_build.json')
+# ids of the document, of its root element and of its JSON script in the pages, random or counted in file_html
+DOCUMENT_ID = 'catalogue-document'
+ROOT_ELEMENT_ID = 'catalogue-root'
+DOCUMENT_JSON_ID = 'catalogue-json'
+# first id of the models of a page, as the simple ids of Bokeh
+FIRST_MODEL_ID = 1001
+# version whose pages normalize_ids was checked against: the HTML of file_html is not part of the public API of Bokeh
+BOKEH_VERSION = '1.4.0'
+
+
+def discover_charts(root: str = REPO_ROOT) -> list:
+    """
+    Reads the example scripts without running them.
+    :param root: root of the repository
+    :return: list of charts, sorted by script, as dictionaries with the script, its data files, output file and title
+    """
+    charts = []
+    for script in sorted(glob.glob(os.path.join(root, CHART_SCRIPTS))):
+        with open(script, encoding='utf-8') as script_file:
+            tree = ast.parse(script_file.read(), filename=script)
+
+        functions = {node.name for node in tree.body if isinstance(node, ast.FunctionDef)}
+        constants = {
+            node.targets[0].id: node.value
+            for node in tree.body
+            if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name)
+        }
+        if 'create_layout' not in functions or 'OUTPUT_FILE' not in constants:
+            continue
+
+        charts.append(dict(
+            name=os.path.relpath(script, root),
+            script=script,
+            data_files=[os.path.join(DATA_PATH, data_file) for data_file in ast.literal_eval(constants['DATA_FILES'])]
+            if 'DATA_FILES' in constants else [],
+            output_file=ast.literal_eval(constants['OUTPUT_FILE']),
+            title=ast.literal_eval(constants['TITLE']) if 'TITLE' in constants else 'Bokeh Plot',
+        ))
+    return charts
+
+
+def chart_fingerprint(chart: dict, root: str = REPO_ROOT) -> str:
+    """
+    :return: hash of the chart script, its data files, the shared modules in the root of the repository and the Bokeh
+    version
+    """
+    import bokeh
+
+    digest = hashlib.sha1(bokeh.__version__.encode())
+    shared_modules = sorted(glob.glob(os.path.join(root, '*.py')))
+    for path in [chart['script']] + chart['data_files'] + shared_modules:
+        digest.update(os.path.relpath(path, root).encode())
+        with open(path, 'rb') as dependency:
+            for block in iter(lambda: dependency.read(2 ** 20), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def render_html(layout, title: str) -> str:
+    """
+    Renders the page with file_html(layout, CDN, title) and normalizes its ids (see normalize_ids), so that the page of
+    a layout is the same in every build.
+    :param layout: Bokeh model of the page
+    :param title: title of the page
+    :return: HTML of the page
+    """
+    import bokeh
+    from bokeh.embed import file_html
+    from bokeh.resources import CDN
+
+    if bokeh.__version__ != BOKEH_VERSION:
+        raise RuntimeError('Pages are normalized for the HTML of Bokeh {}, found Bokeh {}: check normalize_ids against '
+                           'its pages and update BOKEH_VERSION'.format(BOKEH_VERSION, bokeh.__version__))
+    return normalize_ids(file_html(layout, CDN, title))
+
+
+def normalize_ids(html: str) -> str:
+    """
+    file_html gives the document and its root element random uuids, and numbers the models in the order they were
+    created: Bokeh creates the default model of some properties, e.g. the formatter of an axis, the first time the
+    property is read, which happens while it walks the models of the document in the order of a set. Replaces the
+    uuids by fixed ids, and numbers the models again in the order they are reached from the roots of the document,
+    reading attributes in the order of their names, so that the same layout gets the same ids in every build.
+    :param html: page written by file_html with a single document
+    :return: same page with normalized ids
+    """
+    import html as html_escaping
+
+    json_id, escaped_json = _find_once(
+        html, r'<script type="application/json" id="([^"]+)">\s*(.*?)\s*</script>', 'the JSON of the document')
+    render_items, = _find_once(html, r'var render_items = (\[.*?\]);', 'the render items')
+    (document_id, document_json), = json.loads(html_escaping.unescape(escaped_json)).items()
+    render_item, = json.loads(render_items)
+
+    models = {reference['id']: reference for reference in document_json['roots']['references']}
+    new_ids = {}
+
+    def number(value):
+        if isinstance(value, dict):
+            if _is_reference(value, models):
+                if value['id'] not in new_ids:
+                    new_ids[value['id']] = str(FIRST_MODEL_ID + len(new_ids))
+                    number(models[value['id']]['attributes'])
+                return
+            for key in sorted(value):
+                number(value[key])
+        elif isinstance(value, list):
+            for item in value:
+                number(item)
+
+    for root_id in document_json['roots']['root_ids']:
+        number({'id': root_id, 'type': models[root_id]['type']})
+    # models that no root refers to come last, in the order of their previous ids
+    for model_id in sorted(models, key=lambda model_id: (len(model_id), model_id)):
+        number({'id': model_id, 'type': models[model_id]['type']})
+
+    def renumber(value):
+        if isinstance(value, dict):
+            if _is_reference(value, models):
+                return dict(value, id=new_ids[value['id']])
+            return {key: renumber(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [renumber(item) for item in value]
+        return value
+
+    references = [dict(model, id=new_ids[model['id']], attributes=renumber(model['attributes']))
+                  for model in document_json['roots']['references']]
+    document_json['roots'] = dict(
+        references=sorted(references, key=lambda reference: int(reference['id'])),
+        root_ids=[new_ids[root_id] for root_id in document_json['roots']['root_ids']]
+    )
+    if render_item['docid'] != document_id or len(render_item['roots']) != 1:
+        raise RuntimeError('Expected a page with one document and one root, as written by file_html')
+    (root_id, root_element_id), = render_item['roots'].items()
+
+    replacements = [
+        (escaped_json, html_escaping.escape(_compact_json({DOCUMENT_ID: document_json}), quote=False)),
+        (render_items, _compact_json([dict(docid=DOCUMENT_ID, roots={new_ids[root_id]: ROOT_ELEMENT_ID})])),
+        ('id="{}" data-root-id="{}"'.format(root_element_id, root_id),
+         'id="{}" data-root-id="{}"'.format(ROOT_ELEMENT_ID, new_ids[root_id])),
+        ('<script type="application/json" id="{}">'.format(json_id),
+         '<script type="application/json" id="{}">'.format(DOCUMENT_JSON_ID)),
+        ("document.getElementById('{}')".format(json_id), "document.getElementById('{}')".format(DOCUMENT_JSON_ID)),
+    ]
+    for old, new in replacements:
+        if html.count(old) != 1:
+            raise RuntimeError('Expected {!r} once in the page written by file_html'.format(old[:80]))
+        html = html.replace(old, new)
+    return html
+
+
+def _is_reference(value: dict, models: dict) -> bool:
+    """ :return: True if value refers to one of the models, as {"id": ..., "type": ...} with an optional subtype """
+    return ({'id', 'type'} <= set(value) <= {'id', 'type', 'subtype'} and isinstance(value['id'], str) and
+            value['id'] in models)
+
+
+def _find_once(html: str, pattern: str, description: str) -> tuple:
+    """ :return: groups of the single match of pattern in html, raises RuntimeError if it is not found once """
+    matches = list(re.finditer(pattern, html, flags=re.DOTALL))
+    if len(matches) != 1:
+        raise RuntimeError('Expected {} once in the page written by file_html, found {}'.format(
+            description, len(matches)))
+    return matches[0].groups()
+
+
+def _compact_json(value) -> str:
+    """ :return: JSON of value as Bokeh writes it in pages: sorted keys and no spaces """
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), allow_nan=False)
+
+
+def build_chart(chart: dict) -> dict:
+    """
+    Runs create_layout() of one chart script and writes its HTML page. Runs in a worker process.
+    :param chart: chart as returned by discover_charts, with its output path
+    :return: timing in seconds of each step and size of the page in bytes
+    """
+    from bokeh.settings import settings
+
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    # numbered ids rather than uuids for the models, whatever BOKEH_SIMPLE_IDS is in the environment
+    settings.simple_ids.set_value(True)
+
+    start = time.perf_counter()
+    spec = importlib.util.spec_from_file_location('catalogue_chart', chart['script'])
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    layout = module.create_layout()
+    built = time.perf_counter()
+
+    html = render_html(layout, chart['title'])
+    serialized = time.perf_counter()
+
+    with open(chart['output_path'], 'w', encoding='utf-8') as output:
+        output.write(html)
+    written = time.perf_counter()
+
+    return dict(
+        name=chart['name'],
+        build_seconds=built - start,
+        serialize_seconds=serialized - built,
+        write_seconds=written - serialized,
+        bytes=len(html.encode('utf-8'))
+    )
+
+
+def build_catalogue(names: list = None, jobs: int = None, force: bool = False, output_dir: str = None) -> list:
+    """
+    :param names: scripts to build, relative to the repository root (default: all charts)
+    :param jobs: number of worker processes (default: number of CPUs)
+    :param force: rebuild charts even if nothing changed
+    :param output_dir: directory for the HTML pages (default: next to each script)
+    :return: list with the result of every chart, built or skipped
+    """
+    charts = discover_charts()
+    if names:
+        names = {os.path.normpath(name) for name in names}
+        charts = [chart for chart in charts if os.path.normpath(chart['name']) in names]
+
+    manifest = {}
+    if os.path.exists(MANIFEST):
+        with open(MANIFEST, encoding='utf-8') as manifest_file:
+            manifest = json.load(manifest_file)
+
+    pending, results = [], []
+    for chart in charts:
+        directory = output_dir or os.path.dirname(chart['script'])
+        chart['output_path'] = os.path.join(directory, chart['output_file'])
+        chart['fingerprint'] = chart_fingerprint(chart)
+
+        previous = manifest.get(chart['name'], {})
+        if (not force and previous.get('fingerprint') == chart['fingerprint'] and
+                previous.get('output_path') == chart['output_path'] and os.path.exists(chart['output_path'])):
+            results.append(dict(previous, name=chart['name'], skipped=True))
+        else:
+            pending.append(chart)
+
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    if pending:
+        with multiprocessing.Pool(processes=min(jobs or os.cpu_count() or 1, len(pending)), maxtasksperchild=1) as pool:
+            for chart, result in zip(pending, pool.map(build_chart, pending, chunksize=1)):
+                result.update(fingerprint=chart['fingerprint'], output_path=chart['output_path'], skipped=False)
+                manifest[chart['name']] = {key: value for key, value in result.items() if key != 'skipped'}
+                results.append(result)
+
+        with open(MANIFEST, 'w', encoding='utf-8') as manifest_file:
+            json.dump(manifest, manifest_file, indent=2, sort_keys=True)
+
+    return sorted(results, key=lambda result: result['name'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('charts', nargs='*', help='scripts to build (default: all charts)')
+    parser.add_argument('--jobs', type=int, default=None, help='number of worker processes (default: CPUs)')
+    parser.add_argument('--force', action='store_true', help='rebuild charts even if nothing changed')
+    parser.add_argument('--output-dir', default=None, help='directory for the HTML pages (default: next to scripts)')
+    args = parser.parse_args()
+
+    results = build_catalogue(args.charts, jobs=args.jobs, force=args.force, output_dir=args.output_dir)
+
+    print('{:<62} {:>8} {:>10} {:>8} {:>10}'.format('chart', 'build', 'serialize', 'write', 'KB'))
+    for result in results:
+        if result['skipped']:
+            print('{:<62} {:>39}'.format(result['name'], 'up to date'))
+        else:
+            print('{:<62} {:>7.2f}s {:>9.2f}s {:>7.2f}s {:>10.1f}'.format(
+                result['name'], result['build_seconds'], result['serialize_seconds'], result['write_seconds'],
+                result['bytes'] / 1e3))
+
+
+if __name__ == '__main__':
+    main()
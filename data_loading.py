@@ -0,0 +1,323 @@
+"""
+Reading of the catalogue datasets (or larger extracts with the same columns) with only the columns a chart needs,
+explicit dtypes and dates parsed during the read:
+
+    df = read_dataset('daily_sales_by_store', columns=['date', 'sales'])
+
+Files that do not fit in memory are read in chunks and reduced on the way, so that peak memory depends on the chunk
+size and on the size of the result, not on the size of the file:
+
+    weekly = read_rollup('extract.csv', 'date', 'sales', 'week', by='store', dtypes={'store': 'int16'},
+                         parse_dates=['date'])
+    lines = read_decimated('daily_sales_by_store', 'date', 'sales', points=800, by='store')
+
+Scripts that read the same files again and again can read them with read_cached instead, from a typed columnar copy
+of each CSV file that is written the first time and memory-mapped afterwards:
+
+    df = read_cached('daily_sales_by_store', columns=['date', 'sales'])
+    table = read_cached('daily_sales_by_store', arrow=True)  # pyarrow.Table, accepted by the plot functions
+"""
+from __future__ import annotations
+
+import glob
+import hashlib
+import json
+import os
+from collections import namedtuple
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'data')
+
+# Rows read at a time by iter_dataset, read_rollup and read_decimated
+DEFAULT_CHUNKSIZE = 500000
+
+# Folder of the columnar copies written by read_cached (ignored by git)
+CACHE_DIR = os.path.join(DATA_PATH, '.cache')
+# Changed when the format of the copies changes, so that older copies are written again
+_CACHE_VERSION = 1
+
+Dataset = namedtuple('Dataset', ['file', 'dtypes', 'parse_dates', 'index_col'])
+
+DATASETS = {
+    'daily_sales': Dataset(
+        file='daily_sales.csv',
+        dtypes={'sales': 'int32', 'day': 'object', 'day_num': 'int8'},
+        parse_dates=['date'],
+        index_col=None
+    ),
+    'daily_sales_by_store': Dataset(
+        file='daily_sales_by_store.csv',
+        dtypes={'store': 'int16', 'sales': 'int32'},
+        parse_dates=['date'],
+        index_col=None
+    ),
+    'yearly_sales_by_store': Dataset(
+        file='yearly_sales_by_store.csv',
+        dtypes={'year': 'int16', 'store': 'int16', 'sales': 'int64'},
+        parse_dates=[],
+        index_col=None
+    ),
+    'max_profit_by_age_group': Dataset(
+        file='max_profit_by_age_group.csv',
+        dtypes={'IntervationName': 'object', 'Profit': 'int64', 'TruePositiveRate0': 'float64',
+                'TruePositiveRate1': 'float64'},
+        parse_dates=[],
+        index_col=0
+    ),
+}
+
+
+def read_dataset(dataset: str, columns: list = None, dtypes: dict = None, parse_dates: list = None) -> pd.DataFrame:
+    """
+    :param dataset: name of a dataset in DATASETS or path of a CSV file
+    :param columns: columns to read (default: all)
+    :param dtypes: dtype of each column, added to the ones of the dataset
+    :param parse_dates: columns parsed as dates, added to the ones of the dataset
+    :return: dataframe with the columns
+    """
+    import pandas as pd
+
+    return pd.read_csv(**_read_csv_arguments(dataset, columns, dtypes, parse_dates))
+
+
+def iter_dataset(dataset: str, columns: list = None, dtypes: dict = None, parse_dates: list = None,
+                 chunksize: int = DEFAULT_CHUNKSIZE):
+    """
+    Same as read_dataset, one chunk of rows at a time.
+    :param chunksize: number of rows of each chunk
+    :return: iterator of dataframes
+    """
+    import pandas as pd
+
+    return pd.read_csv(chunksize=chunksize, **_read_csv_arguments(dataset, columns, dtypes, parse_dates))
+
+
+def read_cached(dataset: str, columns: list = None, dtypes: dict = None, parse_dates: list = None,
+                arrow: bool = False, cache_dir: str = CACHE_DIR):
+    """
+    Same as read_dataset, from an uncompressed Feather (Arrow IPC) copy of the CSV file. The copy is written the first
+    time and whenever the content of the CSV file or the dtypes change, and is memory-mapped afterwards: only the
+    columns asked for are read, and numbers and dates are not copied when arrow is True. Without pyarrow, the CSV file
+    is read as in read_dataset.
+    :param dataset: name of a dataset in DATASETS or path of a CSV file
+    :param columns: columns to read (default: all)
+    :param dtypes: dtype of each column, added to the ones of the dataset
+    :param parse_dates: columns parsed as dates, added to the ones of the dataset
+    :param arrow: return the pyarrow.Table instead of converting it to a dataframe
+    :param cache_dir: folder of the copies
+    :return: dataframe with the columns, or pyarrow.Table if arrow is True
+    """
+    try:
+        import pyarrow as pa
+        from pyarrow import feather
+    except ImportError:
+        return read_dataset(dataset, columns, dtypes, parse_dates)
+
+    path = cache_file(dataset, dtypes, parse_dates, cache_dir)
+    if columns is not None:
+        columns = list(columns)
+        if not arrow:
+            # columns of the index (e.g. of max_profit_by_age_group) are read too, so that it is restored
+            index_columns = pa.ipc.open_file(pa.memory_map(path)).schema.pandas_metadata['index_columns']
+            columns += [column for column in index_columns if isinstance(column, str) and column not in columns]
+    table = feather.read_table(path, columns=columns, memory_map=True)
+    return table if arrow else table.to_pandas(split_blocks=True)
+
+
+def cache_file(dataset: str, dtypes: dict = None, parse_dates: list = None, cache_dir: str = CACHE_DIR) -> str:
+    """
+    Writes the Feather copy of a CSV file if there is none for its content and read arguments. Copies are named after
+    the file and a key made of the hash of the file and the read arguments; older copies of the same file are removed.
+    :param dataset: name of a dataset in DATASETS or path of a CSV file
+    :param dtypes: dtype of each column, added to the ones of the dataset
+    :param parse_dates: columns parsed as dates, added to the ones of the dataset
+    :param cache_dir: folder of the copies
+    :return: path of the copy
+    """
+    import pandas as pd
+    from pyarrow import feather
+
+    arguments = _read_csv_arguments(dataset, None, dtypes, parse_dates)
+    csv_path = arguments['filepath_or_buffer']
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    key = json.dumps([_CACHE_VERSION, _file_hash(csv_path, name, cache_dir), sorted(arguments['dtype'].items()),
+                      arguments['parse_dates'], arguments['index_col']], default=str)
+    path = os.path.join(cache_dir, '{}-{}.feather'.format(name, hashlib.sha1(key.encode()).hexdigest()[:16]))
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(cache_dir, exist_ok=True)
+    # written to a temporary file first, so that parallel builds never read a partial copy
+    temporary = '{}.{}.tmp'.format(path, os.getpid())
+    feather.write_feather(pd.read_csv(**arguments), temporary, compression='uncompressed')
+    os.replace(temporary, path)
+    for old_copy in glob.glob(os.path.join(glob.escape(cache_dir), glob.escape(name) + '-*.feather')):
+        if old_copy != path:
+            try:
+                os.remove(old_copy)
+            except OSError:
+                pass
+    return path
+
+
+def _file_hash(path: str, name: str, cache_dir: str) -> str:
+    """
+    SHA-1 of the content of a file, stored next to the copies with the mtime and size of the file. The file is only
+    read again when its mtime or size change, and a file that is touched without changing keeps its copy.
+    :return: hexadecimal hash
+    """
+    stat = os.stat(path)
+    signature = dict(path=os.path.abspath(path), mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+    hash_path = os.path.join(cache_dir, name + '.sha1.json')
+    try:
+        with open(hash_path) as hash_file:
+            stored = json.load(hash_file)
+        if all(stored.get(field) == value for field, value in signature.items()):
+            return stored['sha1']
+    except (OSError, ValueError):
+        pass
+
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as data_file:
+        for block in iter(lambda: data_file.read(2 ** 20), b''):
+            sha1.update(block)
+    os.makedirs(cache_dir, exist_ok=True)
+    temporary = '{}.{}.tmp'.format(hash_path, os.getpid())
+    with open(temporary, 'w') as hash_file:
+        json.dump(dict(signature, sha1=sha1.hexdigest()), hash_file)
+    os.replace(temporary, hash_path)
+    return sha1.hexdigest()
+
+
+def read_rollup(dataset: str, date_column: str, value_column: str, resolution: str, aggregation: str = 'sum',
+                by: str = None, dtypes: dict = None, parse_dates: list = None,
+                chunksize: int = DEFAULT_CHUNKSIZE) -> pd.DataFrame:
+    """
+    Aggregates a file per period (and category) one chunk at a time: each chunk is reduced to partial sums, counts or
+    maximums, which are combined at the end. Gives the same result as rollups.rollup on the whole file.
+    :param dataset: name of a dataset in DATASETS or path of a CSV file
+    :param date_column: column with the dates
+    :param value_column: column with the values to aggregate
+    :param resolution: day, week, month or year
+    :param aggregation: sum, mean or max
+    :param by: column with the categories aggregated separately (default: none)
+    :param chunksize: number of rows read at a time
+    :return: dataframe with the first day of each period in date_column, the categories in by and the aggregated
+    values in value_column
+    """
+    import numpy as np
+    import pandas as pd
+    from rollups import rollup_arrays, AGGREGATIONS
+
+    if aggregation not in AGGREGATIONS:
+        raise ValueError('{} is not an aggregation. Select one of: {}'.format(aggregation, ', '.join(AGGREGATIONS)))
+
+    columns = [date_column, value_column] + ([] if by is None else [by])
+    partial_aggregation = 'max' if aggregation == 'max' else 'sum'
+    partials = []
+    for chunk in iter_dataset(dataset, columns, dtypes, _with_date(parse_dates, date_column), chunksize):
+        dates, values = chunk[date_column].values, chunk[value_column].values
+        categories = None if by is None else chunk[by].values
+        rolled = rollup_arrays(dates, values, resolution, partial_aggregation, categories)
+        partial = {date_column: rolled['periods'], value_column: rolled['values']}
+        if aggregation == 'mean':
+            counts = rollup_arrays(dates, (~pd.isna(values)).astype(np.int64), resolution, 'sum', categories)
+            partial['count'] = counts['values']
+        if by is not None:
+            partial[by] = rolled['categories']
+        partials.append(pd.DataFrame(partial))
+
+    keys = [date_column] + ([] if by is None else [by])
+    if not partials:
+        return pd.DataFrame(columns=keys + [value_column])
+    combined = pd.concat(partials, ignore_index=True).groupby(keys, sort=True).agg(partial_aggregation)
+    if aggregation == 'mean':
+        combined[value_column] = combined[value_column] / combined['count']
+    return combined[[value_column]].reset_index()
+
+
+def read_decimated(dataset: str, x_column: str, y_column: str, points: int, method: str = 'lttb', by: str = None,
+                   dtypes: dict = None, parse_dates: list = None, chunksize: int = DEFAULT_CHUNKSIZE) -> pd.DataFrame:
+    """
+    Reads a file one chunk at a time and keeps, for each line, only the points that preserve its shape. Each chunk is
+    decimated to `points` points per line and the kept points are decimated again at the end, so the result is close
+    to (not exactly) the decimation of the whole file, and only holds original rows.
+    :param dataset: name of a dataset in DATASETS or path of a CSV file
+    :param x_column: column with the x values, numbers or dates (add it to parse_dates for a CSV path)
+    :param y_column: column with the y values
+    :param points: number of points kept per line
+    :param method: lttb or minmax
+    :param by: column with the line of each row (default: a single line); rows without a line are left out
+    :param chunksize: number of rows read at a time
+    :return: dataframe with the kept rows of x_column, by and y_column, sorted by line and x
+    """
+    import numpy as np
+    import pandas as pd
+
+    columns = [x_column, y_column] + ([] if by is None else [by])
+    kept = []
+    for chunk in iter_dataset(dataset, columns, dtypes, parse_dates, chunksize):
+        kept.append(_decimate_lines(chunk, x_column, y_column, points, method, by))
+
+    if not kept:
+        return pd.DataFrame(columns=columns)
+    result = _decimate_lines(pd.concat(kept, ignore_index=True), x_column, y_column, points, method, by)
+    order = np.lexsort([result[x_column].values] + ([] if by is None else [result[by].values]))
+    return result.iloc[order].reset_index(drop=True)[columns]
+
+
+def _decimate_lines(df: pd.DataFrame, x_column: str, y_column: str, points: int, method: str, by: str = None):
+    """
+    :return: rows of df kept by the decimation of each line
+    """
+    import numpy as np
+    import pandas as pd
+    from decimation import decimate
+
+    if by is None:
+        return df.iloc[decimate(df[x_column].values, [df[y_column].values], points, method)]
+
+    # rows without a line (code -1) are left out, as in plot_multiple_lines
+    codes, categories = pd.factorize(df[by].values)
+    if not len(categories):
+        return df.iloc[:0]
+    order = np.argsort(codes, kind='mergesort')
+    order = order[codes[order] >= 0]
+    bounds = np.searchsorted(codes[order], np.arange(1, len(categories)))
+    x_values, y_values = df[x_column].values, df[y_column].values
+    rows = [line[decimate(x_values[line], [y_values[line]], points, method)] for line in np.split(order, bounds)]
+    return df.iloc[np.concatenate(rows)] if rows else df.iloc[:0]
+
+
+def _with_date(parse_dates: list, column: str) -> list:
+    """ :return: parse_dates with column, so that the date column of a CSV path is parsed as dates """
+    return list(dict.fromkeys((parse_dates or []) + [column]))
+
+
+def _read_csv_arguments(dataset: str, columns: list = None, dtypes: dict = None, parse_dates: list = None) -> dict:
+    """
+    :return: keyword arguments of pandas.read_csv for the dataset, limited to the given columns
+    """
+    if dataset in DATASETS:
+        spec = DATASETS[dataset]
+        path = os.path.join(DATA_PATH, spec.file)
+        dtypes = dict(spec.dtypes, **(dtypes or {}))
+        parse_dates = list(dict.fromkeys(spec.parse_dates + list(parse_dates or [])))
+        index_col = spec.index_col
+    else:
+        path, dtypes, parse_dates, index_col = dataset, dict(dtypes or {}), list(parse_dates or []), None
+
+    if columns is not None:
+        columns = list(columns)
+        dtypes = {column: dtype for column, dtype in dtypes.items() if column in columns}
+        parse_dates = [column for column in parse_dates if column in columns]
+
+    arguments = dict(filepath_or_buffer=path, dtype=dtypes, parse_dates=parse_dates, index_col=index_col)
+    if columns is not None:
+        # the index column of the catalogue datasets has no name in the header, pandas calls it 'Unnamed: 0'
+        arguments['usecols'] = columns if index_col is None else \
+            lambda column: column in columns or column == 'Unnamed: {}'.format(index_col)
+    return arguments
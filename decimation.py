@@ -0,0 +1,124 @@
+"""
+Shape-preserving downsampling of line series before they are sent to the browser.
+
+Both methods keep original points only, so the values shown by the hover tooltips are still the true values of the
+kept points:
+
+- lttb: Largest-Triangle-Three-Buckets. Keeps the point of each bucket that forms the largest triangle with the point
+  kept in the previous bucket and the average of the next bucket.
+- minmax: splits the x range in buckets of equal width (two points per pixel) and keeps the minimum and maximum of
+  each bucket, so every peak and trough of the original series is drawn.
+"""
+import numpy as np
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets. Bucket edges, bucket averages and the triangle areas inside each bucket are
+    computed with NumPy; only the walk from one bucket to the next, which depends on the point kept in the previous
+    bucket, is a loop over the buckets (one per output point).
+
+    :param x: sorted x values as floats
+    :param y: y values as floats, without NaN
+    :param points: number of points to keep, including the first and the last one
+    :return: sorted indices of the points to keep
+    """
+    length = len(x)
+    if points >= length or points < 3:
+        return np.arange(length)
+
+    edges = np.linspace(1, length - 1, points - 1).astype(np.int64)
+    starts, ends = edges[:-1], edges[1:]
+    counts = ends - starts
+
+    average_x = np.add.reduceat(x[:length - 1], starts) / counts
+    average_y = np.add.reduceat(y[:length - 1], starts) / counts
+    next_x = np.append(average_x[1:], x[-1])
+    next_y = np.append(average_y[1:], y[-1])
+
+    kept = np.empty(points, dtype=np.int64)
+    kept[0], kept[-1] = 0, length - 1
+    previous = 0
+    for bucket, (start, end) in enumerate(zip(starts, ends)):
+        previous_x, previous_y = x[previous], y[previous]
+        areas = np.abs(
+            (previous_x - next_x[bucket]) * (y[start:end] - previous_y) -
+            (previous_x - x[start:end]) * (next_y[bucket] - previous_y)
+        )
+        previous = start + int(np.argmax(areas))
+        kept[bucket + 1] = previous
+
+    return kept
+
+
+def minmax_indices(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """
+    Per-pixel-bucket min/max decimation. Buckets have the same width in x, each one keeps its minimum and maximum.
+
+    :param x: sorted x values as floats
+    :param y: y values as floats, without NaN
+    :param points: number of points to keep, two per bucket
+    :return: sorted indices of the points to keep
+    """
+    length = len(x)
+    if points >= length or x[-1] == x[0]:
+        return np.arange(length)
+
+    bucket_number = max(points // 2, 1)
+    buckets = ((x - x[0]) / (x[-1] - x[0]) * bucket_number).astype(np.int64)
+    np.minimum(buckets, bucket_number - 1, out=buckets)
+
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    bucket_of_point = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, length]))
+
+    kept = [np.array([0, length - 1])]
+    for reduce in (np.minimum, np.maximum):
+        extremes = np.flatnonzero(y == reduce.reduceat(y, starts)[bucket_of_point])
+        extreme_buckets = bucket_of_point[extremes]
+        kept.append(extremes[np.r_[True, extreme_buckets[1:] != extreme_buckets[:-1]]])
+
+    return np.unique(np.concatenate(kept))
+
+
+DECIMATION_METHODS = {
+    'lttb': lttb_indices,
+    'minmax': minmax_indices
+}
+
+
+def decimate(x, ys: list, points: int, method: str = 'lttb') -> np.ndarray:
+    """
+    Chooses the points to keep for one or more series that share the same x values. Each series is decimated on its
+    own non-NaN values and the indices kept for all series are merged, so every series keeps its shape.
+
+    :param x: x values (numbers or datetime64), sorted or not
+    :param ys: list with the y values of each series
+    :param points: number of points to keep per series
+    :param method: decimation method, one of DECIMATION_METHODS (default: lttb)
+    :return: indices of the points to keep, in ascending order of x
+    """
+    if method not in DECIMATION_METHODS:
+        raise ValueError('{} is not a decimation method. Select one of the following methods: {}'
+                         .format(method, ', '.join(DECIMATION_METHODS)))
+    select_indices = DECIMATION_METHODS[method]
+
+    x = np.asarray(x)
+    if x.dtype.kind == 'M':
+        x = x.view(np.int64)
+    x = x.astype(np.float64)
+
+    order = None
+    if len(x) > 1 and not np.all(x[1:] >= x[:-1]):
+        order = np.argsort(x, kind='mergesort')
+        x = x[order]
+
+    kept = []
+    for y in ys:
+        y = np.asarray(y, dtype=np.float64)
+        if order is not None:
+            y = y[order]
+        valid = np.flatnonzero(~np.isnan(y))
+        kept.append(valid[select_indices(x[valid], y[valid], points)])
+
+    kept = np.unique(np.concatenate(kept)) if kept else np.arange(len(x))
+    return kept if order is None else order[kept]
@@ -0,0 +1,178 @@
+"""
+Line charts that are created once and then updated in place, for Bokeh server apps fed by a stream of rows.
+
+    chart = live_multiple_lines(df, title='Sales', x_axis='date', y_axis='sales', category_column='store', rollover=365)
+    curdoc().add_root(chart.figure)
+    chart.stream(new_rows)        # appends rows, keeps the last 365 x values
+    chart.patch(corrected_rows)   # replaces the y values of x values already in the chart
+
+Updates go through `ColumnDataSource.stream` and `ColumnDataSource.patch`, so the message sent to the browser only
+holds the new or changed values, not the history.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from plot_functions import plot_single_line, plot_multiple_lines, _column_arrays, _pivot_arrays, _row_max, \
+    _sort_order, _typed_array, _HOVER_ANCHOR
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class LiveLineChart:
+    """
+    Handle of a line chart built by live_single_line or live_multiple_lines: its figure, its data source and the
+    columns the new rows are read from.
+    """
+
+    def __init__(self, figure, source, x_axis: str, y_axis: str, category_column: str = None, rollover: int = None):
+        """
+        :param figure: Bokeh figure with the lines
+        :param source: data source of the lines, with the x column and one column per line
+        :param x_axis: column of the new rows with the x values
+        :param y_axis: column of the new rows with the y values
+        :param category_column: column of the new rows with the line of each row, None for a single line
+        :param rollover: maximum number of x values kept in the chart (default: all)
+        """
+        import numpy as np
+
+        self.figure = figure
+        self.source = source
+        self.x_axis = x_axis
+        self.y_axis = y_axis
+        self.category_column = category_column
+        self.rollover = rollover
+        if category_column is None:
+            self.lines = [y_axis]
+        else:
+            self.lines = [column for column in source.column_names if column not in (x_axis, _HOVER_ANCHOR)]
+
+        # Browsers keep the type of a streamed column, so columns narrowed to small integers are widened once here
+        # to hold any new value. Float columns are copied too: they can be views of the dataframe the chart was
+        # created from, which patch would otherwise modify in place.
+        source.data.update({column: values.astype(np.float64) for column, values in source.data.items()
+                            if values.dtype.kind in 'iubf'})
+
+    @property
+    def size(self) -> int:
+        """ :return: number of x values in the chart """
+        return len(self.source.data[self.x_axis])
+
+    def stream(self, df: pd.DataFrame):
+        """
+        Appends the rows of df to the chart. Their x values must not be before the last x value of the chart.
+        :param df: dataframe with the same columns the chart was created from
+        """
+        import numpy as np
+
+        if not len(df):
+            return
+        new_data = self._rows(df)
+        x_values = new_data[self.x_axis]
+
+        if self.size and x_values[0] < self.source.data[self.x_axis][-1]:
+            raise ValueError('New rows must not be before the last {} of the chart'.format(self.x_axis))
+        if _HOVER_ANCHOR in self.source.data:
+            new_data[_HOVER_ANCHOR] = _row_max([new_data[line] for line in self.lines])
+
+        self.source.stream({column: np.asarray(values, dtype=np.float64) for column, values in new_data.items()},
+                           rollover=self.rollover)
+
+    def patch(self, df: pd.DataFrame):
+        """
+        Replaces the y values of x values that are already in the chart; lines without a row in df keep their values.
+        :param df: dataframe with the same columns the chart was created from
+        """
+        import numpy as np
+
+        if not len(df):
+            return
+        new_data = self._rows(df)
+        chart_x = self.source.data[self.x_axis]
+        rows = np.searchsorted(chart_x, new_data[self.x_axis])
+        if (rows >= len(chart_x)).any() or (chart_x[np.minimum(rows, len(chart_x) - 1)] != new_data[self.x_axis]).any():
+            raise KeyError('Rows to patch must have a {} that is already in the chart'.format(self.x_axis))
+
+        patches = {}
+        for line in self.lines:
+            values = new_data[line]
+            present = ~np.isnan(values)
+            if present.any():
+                patches[line] = list(zip(rows[present].tolist(), values[present].tolist()))
+
+        if _HOVER_ANCHOR in self.source.data:
+            lines = {line: self.source.data[line][rows].copy() for line in self.lines}
+            for line in self.lines:
+                present = ~np.isnan(new_data[line])
+                lines[line][present] = new_data[line][present]
+            patches[_HOVER_ANCHOR] = list(zip(rows.tolist(), _row_max(list(lines.values())).tolist()))
+
+        self.source.patch(patches)
+
+    def _rows(self, df: pd.DataFrame) -> dict:
+        """
+        :return: dictionary with the x column and one float64 column per line of the chart (NaN where df has no row),
+        sorted by x
+        """
+        import numpy as np
+
+        if self.category_column is None:
+            data = _column_arrays(df, [self.x_axis, self.y_axis])
+            order = _sort_order(data[self.x_axis])
+            if order is not None:
+                data = {column: values.take(order) for column, values in data.items()}
+            return {self.x_axis: _typed_array(data[self.x_axis]), self.y_axis: data[self.y_axis].astype(np.float64)}
+
+        data = _column_arrays(df, [self.x_axis, self.category_column, self.y_axis])
+        x_values, categories, table = _pivot_arrays(data[self.x_axis], data[self.category_column], data[self.y_axis])
+        categories = categories.astype(str).tolist()
+        unknown = set(categories).difference(self.lines)
+        if unknown:
+            raise KeyError('The chart has no line for {}: {}'.format(self.category_column, ', '.join(sorted(unknown))))
+
+        rows = {self.x_axis: _typed_array(x_values)}
+        for line in self.lines:
+            rows[line] = table[:, categories.index(line)].astype(np.float64) if line in categories else \
+                np.full(len(x_values), np.nan)
+        return rows
+
+
+def live_single_line(df: pd.DataFrame, x_axis: str, y_axis: str, title: str, rollover: int = None,
+                     **kwargs) -> LiveLineChart:
+    """
+    Creates a single line chart that can be updated with LiveLineChart.stream and LiveLineChart.patch.
+    :param df: dataframe with the first rows of the chart
+    :param rollover: maximum number of points kept in the chart (default: all)
+    :param kwargs: same parameters as plot_single_line, except downsample and source_registry
+    :return: LiveLineChart with the figure
+    """
+    _check_live_kwargs(kwargs)
+    p = plot_single_line(df, x_axis=x_axis, y_axis=y_axis, title=title, **kwargs)
+    return LiveLineChart(p, p.renderers[0].data_source, x_axis, y_axis, rollover=rollover)
+
+
+def live_multiple_lines(df: pd.DataFrame, title: str, x_axis: str, y_axis: str, category_column: str,
+                        rollover: int = None, **kwargs) -> LiveLineChart:
+    """
+    Creates a multiple line chart that can be updated with LiveLineChart.stream and LiveLineChart.patch. The lines are
+    the categories of df; rows of other categories cannot be added later.
+    :param df: dataframe with the first rows of the chart
+    :param rollover: maximum number of x values kept in the chart (default: all)
+    :param kwargs: same parameters as plot_multiple_lines, except downsample, source_registry and multi_line
+    :return: LiveLineChart with the figure
+    """
+    _check_live_kwargs(kwargs)
+    if kwargs.get('multi_line'):
+        raise ValueError('Live charts draw one line per category, multi_line is not supported')
+    p = plot_multiple_lines(df, title=title, x_axis=x_axis, y_axis=y_axis, category_column=category_column,
+                            multi_line=False, **kwargs)
+    return LiveLineChart(p, p.renderers[0].data_source, x_axis, y_axis, category_column=category_column,
+                         rollover=rollover)
+
+
+def _check_live_kwargs(kwargs: dict):
+    """ Raises ValueError for the options of the plot functions that cannot be used with a stream """
+    for option in ('downsample', 'source_registry'):
+        if kwargs.get(option):
+            raise ValueError('{} cannot be used in a live chart, its source is updated in place'.format(option))
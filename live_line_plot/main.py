@@ -0,0 +1,79 @@
+"""
+Bokeh server app that replays the daily sales by store as a live stream.
+
+Run from the root of the repository:
+    bokeh serve --show live_line_plot
+
+Every update appends the next day to both charts, keeping the last 365 days, and now and then corrects the sales of a
+day that is already shown. The updates stop after the last day of the file.
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from bokeh.io import curdoc
+from bokeh.layouts import Column
+from bokeh.models.widgets import Div
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_PATH = os.path.join(REPO_ROOT, 'static', 'data')
+sys.path.insert(0, REPO_ROOT)
+
+from live_charts import live_single_line, live_multiple_lines  # noqa: E402
+
+UPDATE_MILLISECONDS = 500
+ROLLOVER_DAYS = 365
+INITIAL_DAYS = 90
+
+df = pd.read_csv(os.path.join(DATA_PATH, 'daily_sales_by_store.csv'), parse_dates=['date'])
+df = df[df['store'] < 6]
+total_sales = df.groupby('date', as_index=False)['sales'].sum()
+dates = total_sales['date'].values
+
+single_line = live_single_line(
+    total_sales[total_sales['date'] < dates[INITIAL_DAYS]],
+    x_axis='date',
+    y_axis='sales',
+    title='Total sales',
+    rollover=ROLLOVER_DAYS,
+    plot_width=900
+)
+multiple_lines = live_multiple_lines(
+    df[df['date'] < dates[INITIAL_DAYS]],
+    title='Total sales by store',
+    x_axis='date',
+    y_axis='sales',
+    category_column='store',
+    rollover=ROLLOVER_DAYS,
+    plot_width=900,
+    tooltip_mode='nearest'
+)
+
+state = dict(day=INITIAL_DAYS, random=np.random.RandomState(0), callback=None)
+
+
+def update():
+    day = state['day']
+    if day >= len(dates):
+        curdoc().remove_periodic_callback(state['callback'])
+        return
+    single_line.stream(total_sales[total_sales['date'] == dates[day]])
+    multiple_lines.stream(df[df['date'] == dates[day]])
+
+    if state['random'].rand() < 0.2:
+        corrected_day = dates[day - state['random'].randint(0, min(day, ROLLOVER_DAYS))]
+        correction = df[df['date'] == corrected_day].assign(sales=lambda rows: (rows['sales'] * 1.5).round())
+        multiple_lines.patch(correction)
+        single_line.patch(correction.groupby('date', as_index=False)['sales'].sum())
+
+    state['day'] += 1
+
+
+curdoc().add_root(Column(
+    Div(text="<h2 style='margin-block-end:0'> Live sales (replayed from daily_sales_by_store.csv) </h2>"),
+    single_line.figure,
+    multiple_lines.figure
+))
+state['callback'] = curdoc().add_periodic_callback(update, UPDATE_MILLISECONDS)
+curdoc().title = 'Live line charts'
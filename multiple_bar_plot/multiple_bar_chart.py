@@ -1,64 +1,74 @@
-import pandas as pd
+from data_loading import read_cached
 from bokeh.plotting import output_file, show
 from bokeh.layouts import Column, Row, layout
-from plot_functions import plot_multiple_bar_chart, plot_table
+from plot_functions import plot_multiple_bar_chart, plot_table, SourceRegistry
 from bokeh.models.widgets import Div
 
+DATA_FILES = ['yearly_sales_by_store.csv']
+OUTPUT_FILE = 'multiple_bar_chart.html'
+TITLE = 'Multiple bar chart'
 
-df = pd.read_csv('../static/data/yearly_sales_by_store.csv')
 
-output_file("multiple_bar_chart.html")
+def create_layout():
+    df = read_cached('yearly_sales_by_store')
 
-p_mandatory = plot_multiple_bar_chart(
-    df,
-    title='Total sales by store and year',
-    x_axis='year',
-    y_axis='sales',
-    x_axis_categories='store',
-)
+    sources = SourceRegistry()
 
-p_optional = plot_multiple_bar_chart(
-    df,
-    title='Total sales by store and year',
-    x_axis='year',
-    y_axis='sales',
-    x_axis_categories='store',
-    md_color_shade='indigo',
-    bar_width=0.95,
-    y_tooltip_format='{0,0}',
-    y_num_tick_formatter='0.0a',
-    plot_width=800,
-    plot_height=500,
-    x_label_orientation=0.5,
-    y_axis_label='Sales',
-    x_axis_label='Year',
-    x_categories='Store Nr',
-    show_legend=True
-)
+    p_mandatory = plot_multiple_bar_chart(
+        df,
+        title='Total sales by store and year',
+        x_axis='year',
+        y_axis='sales',
+        x_axis_categories='store',
+        source_registry=sources
+    )
 
-data_table = plot_table(
-    df
-)
+    p_optional = plot_multiple_bar_chart(
+        df,
+        title='Total sales by store and year',
+        x_axis='year',
+        y_axis='sales',
+        x_axis_categories='store',
+        md_color_shade='indigo',
+        bar_width=0.95,
+        y_tooltip_format='{0,0}',
+        y_num_tick_formatter='0.0a',
+        plot_width=800,
+        plot_height=500,
+        x_label_orientation=0.5,
+        y_axis_label='Sales',
+        x_axis_label='Year',
+        x_categories='Store Nr',
+        show_legend=True,
+        source_registry=sources
+    )
 
-text_mandatory = Div(
-    text="""
-    <h2 style='margin-block-end:0'> Graph 1: Using mandatory parameters only </h2>
-    """
-)
-text_optional= Div(
-    text="""
-    <h2 style='margin-block-end:0'> Graph 2: Using additional and optional function parameters </h2>
-    """
-)
-text_table = Div(
-    text="""
-    <h2 style='margin-block-end:0'> Data used in graph</h2>
-    <span style='color: #616161'><i>Scrollable table</i></span>
-    """
-)
+    data_table = plot_table(
+        df,
+        source_registry=sources
+    )
 
-show(
-    layout(
+    text_mandatory = Div(
+        text="""
+        <h2 style='margin-block-end:0'> Graph 1: Using mandatory parameters only </h2>
+        """
+    )
+    text_optional = Div(
+        text="""
+        <h2 style='margin-block-end:0'> Graph 2: Using additional and optional function parameters </h2>
+        """
+    )
+    text_table = Div(
+        text="""
+        <h2 style='margin-block-end:0'> Data used in graph</h2>
+        <span style='color: #616161'><i>Scrollable table</i></span>
+        """
+    )
+    return layout(
         Column(text_mandatory, p_mandatory, text_optional, p_optional, text_table, data_table)
     )
-)
\ No newline at end of file
+
+
+if __name__ == '__main__':
+    output_file(OUTPUT_FILE, title=TITLE)
+    show(create_layout())
@@ -0,0 +1,176 @@
+"""
+Table for Bokeh server apps that only sends one page of rows to the browser. The dataframe stays in the server: pages
+are fetched when the buttons are clicked, and sorting and filtering are done on the whole dataframe with pandas.
+
+    table = plot_paged_table(df, page_size=100)
+    curdoc().add_root(table.layout)
+
+The size of the document and of each update depends on the page size, not on the number of rows of the dataframe.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from plot_functions import _column_arrays, _column_names, _typed_array, _table_columns, _table_stylesheet
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Option of the sort and filter selects that leaves the rows as they are in the dataframe
+NO_COLUMN = '(none)'
+
+
+class PagedTable:
+    """
+    Handle of a paged table: its Bokeh layout, the data source of the current page and the state of the view (page,
+    sort and filter). The widgets of the layout call the methods of this class, which can also be called directly.
+    """
+
+    def __init__(self, df: pd.DataFrame, page_size: int = 100, columns: list = None,
+                 header_style: str = "color: #757575; font-family: Courier; font-weight:800",
+                 table_style: str = "color: #757575; font-family: Courier; font-weight:normal",
+                 height: int = 250):
+        """
+        :param df: dataframe or pyarrow.Table with the data for the table, it is neither copied nor modified
+        :param page_size: number of rows sent to the browser at a time
+        :param columns: column names to show in the table (default: all)
+        :param header_style: CSS style of the header
+        :param table_style: CSS style of the cells
+        :param height: height of the table in pixels
+        """
+        from bokeh.layouts import Column, Row, widgetbox
+        from bokeh.models import ColumnDataSource
+        from bokeh.models.widgets import Button, DataTable, Div, Select, TextInput, Toggle
+
+        self.df = df
+        self.columns = _column_names(df) if columns is None else list(columns)
+        self.page_size = page_size
+        self.page = 0
+        self.sort_column = None
+        self.ascending = True
+        self.filter_column = None
+        self.filter_text = ''
+
+        self._arrays = _column_arrays(df, self.columns)
+        self._sort_orders = {}
+        self._positions = None
+
+        self.source = ColumnDataSource(data={column: [] for column in self.columns})
+        css_class, stylesheet = _table_stylesheet(header_style, table_style)
+        data_table = DataTable(source=self.source,
+                               columns=_table_columns(self._arrays),
+                               fit_columns=True,
+                               header_row=True,
+                               index_position=None,
+                               sortable=False,
+                               height=height,
+                               css_classes=[css_class]
+                               )
+
+        self._status = Div()
+        previous_button = Button(label='Previous', width=90)
+        next_button = Button(label='Next', width=90)
+        sort_select = Select(title='Sort by', value=NO_COLUMN, options=[NO_COLUMN] + self.columns, width=150)
+        descending_toggle = Toggle(label='Descending', active=False, width=100)
+        filter_select = Select(title='Filter', value=NO_COLUMN, options=[NO_COLUMN] + self.columns, width=150)
+        filter_input = TextInput(title='contains', value='', width=150)
+
+        previous_button.on_click(lambda: self.set_page(self.page - 1))
+        next_button.on_click(lambda: self.set_page(self.page + 1))
+        sort_select.on_change('value', lambda attr, old, new: self.sort(new, not descending_toggle.active))
+        descending_toggle.on_change('active', lambda attr, old, new: self.sort(sort_select.value, not new))
+        filter_select.on_change('value', lambda attr, old, new: self.filter(new, filter_input.value))
+        filter_input.on_change('value', lambda attr, old, new: self.filter(filter_select.value, new))
+
+        self.layout = Column(
+            Div(text=stylesheet),
+            Row(widgetbox(sort_select), widgetbox(descending_toggle), widgetbox(filter_select),
+                widgetbox(filter_input)),
+            widgetbox(data_table),
+            Row(widgetbox(previous_button), widgetbox(next_button), self._status)
+        )
+        self._show_page()
+
+    @property
+    def rows(self) -> int:
+        """ :return: number of rows that pass the filter """
+        return len(self._arrays[self.columns[0]]) if self._positions is None else len(self._positions)
+
+    @property
+    def pages(self) -> int:
+        """ :return: number of pages, at least 1 """
+        return max(-(-self.rows // self.page_size), 1)
+
+    def set_page(self, page: int):
+        """
+        :param page: number of the page to show, starting at 0; it is clipped to the existing pages
+        """
+        self.page = min(max(page, 0), self.pages - 1)
+        self._show_page()
+
+    def sort(self, column: str = None, ascending: bool = True):
+        """
+        Sorts all the rows by one column, missing values last, and goes back to the first page.
+        :param column: column name, None or NO_COLUMN to keep the order of the dataframe
+        :param ascending: sort order
+        """
+        self.sort_column = None if column in (None, NO_COLUMN) else column
+        self.ascending = ascending
+        self._update_view()
+
+    def filter(self, column: str = None, text: str = ''):
+        """
+        Keeps the rows whose value in column contains text (not case sensitive) and goes back to the first page.
+        :param column: column name, None or NO_COLUMN to keep all rows
+        :param text: text to look for, an empty text keeps all rows
+        """
+        self.filter_column = None if column in (None, NO_COLUMN) else column
+        self.filter_text = text
+        self._update_view()
+
+    def _update_view(self):
+        """ Computes the row positions of the filtered and sorted view """
+        import numpy as np
+        import pandas as pd
+
+        positions = None
+        if self.sort_column is not None:
+            key = (self.sort_column, self.ascending)
+            if key not in self._sort_orders:
+                self._sort_orders[key] = pd.Series(self._arrays[self.sort_column]).sort_values(
+                    ascending=self.ascending, kind='mergesort', na_position='last').index.values
+            positions = self._sort_orders[key]
+
+        if self.filter_column is not None and self.filter_text:
+            matches = pd.Series(self._arrays[self.filter_column]).astype(str).str.contains(
+                self.filter_text, case=False, regex=False).values
+            positions = np.flatnonzero(matches) if positions is None else positions[matches[positions]]
+
+        self._positions = positions
+        self.page = 0
+        self._show_page()
+
+    def _show_page(self):
+        """ Replaces the rows of the source by the rows of the current page """
+        start = self.page * self.page_size
+        stop = min(start + self.page_size, self.rows)
+        if self._positions is None:
+            rows = slice(start, stop)
+        else:
+            rows = self._positions[start:stop]
+
+        self.source.data = {column: _typed_array(values[rows]) for column, values in self._arrays.items()}
+        self._status.text = '<span style="color: #616161">Rows {:,} to {:,} of {:,} &middot; page {} of {}</span>' \
+            .format(min(start + 1, stop), stop, self.rows, self.page + 1, self.pages)
+
+
+def plot_paged_table(df: pd.DataFrame, page_size: int = 100, columns: list = None, **kwargs) -> PagedTable:
+    """
+    Creates a table that sends one page of rows at a time to the browser. It needs a Bokeh server to change pages.
+    :param df: dataframe with the data for the table
+    :param page_size: number of rows of each page
+    :param columns: column names to show in the table (default: all)
+    :param kwargs: header_style, table_style and height, as in plot_table
+    :return: PagedTable, add its layout to the document
+    """
+    return PagedTable(df, page_size=page_size, columns=columns, **kwargs)
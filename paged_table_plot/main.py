@@ -0,0 +1,35 @@
+"""
+Bokeh server app with a paged table of the daily sales by store.
+
+Run from the root of the repository:
+    bokeh serve --show paged_table_plot
+
+Only the rows of the current page are in the browser; changing the page, the sort or the filter fetches the new page
+from the server.
+"""
+import os
+import sys
+
+from bokeh.io import curdoc
+from bokeh.layouts import Column
+from bokeh.models.widgets import Div
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from data_loading import read_cached  # noqa: E402
+from paged_table import plot_paged_table  # noqa: E402
+
+# parses the dates and the dtypes of DATASETS, so that the date column is sorted and shown as dates
+df = read_cached('daily_sales_by_store')
+
+table = plot_paged_table(df, page_size=50, height=400)
+
+curdoc().add_root(Column(
+    Div(text="""
+        <h2 style='margin-block-end:0'> Daily sales by store </h2>
+        <span style='color: #616161'><i>Sorted, filtered and paged in the server</i></span>
+        """),
+    table.layout
+))
+curdoc().title = 'Paged table'
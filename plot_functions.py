@@ -1,30 +1,112 @@
-import pandas as pd
-import numpy as np
+from __future__ import annotations
+
+import threading
+import time
 import warnings
-import calendar
-import matplotlib.pyplot as plt
-
-from math import pi
-from scipy import stats
-
-from bokeh.plotting import figure, show
-from bokeh.models import \
-    HoverTool, \
-    ColumnDataSource, \
-    Legend, \
-    NumeralTickFormatter, \
-    FactorRange, \
-    LinearAxis, \
-    Range1d, \
-    LegendItem
-from bokeh.transform import jitter
-from bokeh.io import export_svgs
-from bokeh.layouts import gridplot
-
-from bokeh.models.widgets import DataTable, HTMLTemplateFormatter, TableColumn, Div
-from bokeh.layouts import widgetbox, Column
+from collections import namedtuple
+from functools import lru_cache, wraps
+from itertools import product
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from bokeh.plotting import figure
+
+# Heavy dependencies (pandas, bokeh) are imported inside the functions that use them: importing this module stays cheap
+# and each plot function only pays for the imports it needs, the first time it is called.
+
+TOOLTIP_MODES = ('all', 'nearest', 'top_k')
+
+OUTPUT_BACKENDS = ('auto', 'canvas', 'svg', 'webgl')
+# Number of points above which output_backend='auto' draws the glyphs with WebGL, pan and zoom on canvas get slow above
+WEBGL_THRESHOLD = 100000
+
+# Column of the invisible line that anchors the compact tooltips of plot_multiple_lines
+_HOVER_ANCHOR = '_hover_y'
+# Column of the x factors of plot_multiple_bar_chart when its categories are dodged instead of nested
+_BAR_X = '_x'
+
+# Timing of one stage (or, with stage None, of the whole call) of a plot function, see add_stage_callback. parent is
+# 'function/stage' of the plot function that made the call, if any.
+StageRecord = namedtuple('StageRecord', ['function', 'stage', 'start', 'seconds', 'parent', 'thread'])
+
+_STAGE_CALLBACKS = []
+_PROFILED_CALLS = threading.local()
+
+
+def add_stage_callback(callback):
+    """
+    Calls callback with a StageRecord at the end of each stage of the plot functions (prepare data, colours, figure,
+    source, glyphs, tooltips, legend, axis) and at the end of each call, in the thread of the call. Stages are only
+    timed while there is a callback; profiling.profile_stages collects them.
+    :param callback: function of one StageRecord
+    """
+    _STAGE_CALLBACKS.append(callback)
+
+
+def remove_stage_callback(callback):
+    """
+    :param callback: function added with add_stage_callback
+    """
+    _STAGE_CALLBACKS.remove(callback)
+
+
+class _StageTimer:
+    """ Times the consecutive stages of one call of a plot function """
+
+    def __init__(self, function: str, parent: _StageTimer = None):
+        self.function = function
+        self.parent = None if parent is None else parent.name
+        self.stage = None
+        self.start = self.stage_start = time.perf_counter()
+
+    @property
+    def name(self) -> str:
+        return self.function if self.stage is None else '{}/{}'.format(self.function, self.stage)
+
+    def next(self, stage: str = None):
+        """ Ends the current stage and starts the next one """
+        if self.stage is not None:
+            self._report(self.stage, self.stage_start, time.perf_counter() - self.stage_start)
+        self.stage, self.stage_start = stage, time.perf_counter()
+
+    def end(self):
+        self.next()
+        self._report(None, self.start, time.perf_counter() - self.start)
+
+    def _report(self, stage: str, start: float, seconds: float):
+        record = StageRecord(self.function, stage, start, seconds, self.parent, threading.current_thread().name)
+        for callback in list(_STAGE_CALLBACKS):
+            callback(record)
+
+
+def _profiled(function):
+    """ Times the calls of a plot function and the stages started inside them with _stage, if there are callbacks """
+
+    @wraps(function)
+    def profiled_function(*args, **kwargs):
+        if not _STAGE_CALLBACKS:
+            return function(*args, **kwargs)
+        parent = getattr(_PROFILED_CALLS, 'timer', None)
+        timer = _PROFILED_CALLS.timer = _StageTimer(function.__name__, parent)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            timer.end()
+            _PROFILED_CALLS.timer = parent
+
+    return profiled_function
+
+
+def _stage(name: str):
+    """ Ends the current stage of the plot function being profiled and starts the stage name; no-op otherwise """
+    if _STAGE_CALLBACKS:
+        timer = getattr(_PROFILED_CALLS, 'timer', None)
+        if timer is not None:
+            timer.next(name)
 
 
+@_profiled
 def plot_dual_axis_dual_bar_line(
         df: pd.DataFrame,
         title: str,
@@ -35,30 +117,40 @@ def plot_dual_axis_dual_bar_line(
         **kwargs
 ) -> figure:
     """
+    Creates a Bokeh chart with one bar per group and bar variable in the left axis and a line in the right axis. Any
+    number of bar variables per group is supported, as long as there are enough `bar_colours`.
+
     :param df: long dataframe with groups, groups' variables, bar names, bar values and line values
     :param title: title of plot
     :param groups_name: name for the column where the groups are
     :param bar_value_name: column name where value for each group's bar are
     :param bar_variable_name: column name where variables indicate to which group the bar value belongs to
     :param line_variable_name: column name for the line chart
+    :param kwargs: extra information, e.g. output_backend: canvas, svg, webgl or auto (default), which draws with WebGL
+    above webgl_threshold bars and line points (default: WEBGL_THRESHOLD)
     :return: figure with bar chart in left axis and line chart in right axis
     """
+    import numpy as np
+    from bokeh.plotting import figure
+    from bokeh.models import HoverTool, Legend, LegendItem, FactorRange, LinearAxis, Range1d
+    from bokeh.transform import factor_cmap
 
     """ Prepares data for y values (bars) and x axis (groups and bar variables) """
-    bar_variables = df[bar_variable_name].unique()
-    df0 = df[df[bar_variable_name] == bar_variables[0]].reset_index(drop=True)
-    df1 = df[df[bar_variable_name] == bar_variables[1]].reset_index(drop=True)
-
-    multi_bar_values = [[df0.loc[index, bar_value_name],
-                         df1.loc[index, bar_value_name]]
-                        for index, row in df0.iterrows()]
-
-    multi_bar_values = [item for sublist in multi_bar_values for item in sublist]
-
-    groups = df[groups_name].unique()
-    index_tuple = [(group_, bar_variable) for group_ in groups for bar_variable in bar_variables]
+    _stage('prepare data')
+    bar_colours = kwargs.get('bar_colours', ["#8c9eff", "#536dfe"])
+    data = _column_arrays(df, [groups_name, bar_variable_name, bar_value_name, line_variable_name])
+    bars = _interleave_grouped_bars(
+        groups=data[groups_name],
+        bar_variables=data[bar_variable_name],
+        bar_values=data[bar_value_name],
+        line_values=data[line_variable_name],
+        bar_colours=bar_colours
+    )
+    bar_variables = bars['bar_variables']
+    index_tuple = bars['x']
 
     """ figure"""
+    _stage('figure')
     hover_bar = HoverTool(names=['hover_info'])
     hover_line = HoverTool(names=['line_info'])
 
@@ -67,42 +159,36 @@ def plot_dual_axis_dual_bar_line(
         plot_height=kwargs.get('plot_height', 400),
         plot_width=kwargs.get('plot_width', 700),
         title=title,
-        tools=["save", hover_bar, hover_line])
+        tools=["save", hover_bar, hover_line],
+        output_backend=_output_backend(len(index_tuple) + len(bars['groups']), **kwargs))
+
+    _stage('source')
+    # values are named after their columns of df and bars are coloured from the x factors, so that charts and tables of
+    # the same rows share the source whatever their colours
+    bar_column, line_column = bar_value_name, line_variable_name
+    if len({'x', bar_column, line_column}) < 3:
+        bar_column, line_column = 'bar_values', 'line_values'
+    source_bars = _data_source({'x': index_tuple, bar_column: bars['bar_values'], line_column: bars['line_values']},
+                               **kwargs)
+    source_lines = _data_source({'x': bars['groups'], line_column: bars['group_line_values']}, **kwargs)
 
     """ multiple bar chart """
-    bar_colours = kwargs.get('bar_colours', ["#8c9eff", "#536dfe"])
-    colours = bar_colours * len(groups)
-
-    source_bars = ColumnDataSource(
-        data=dict(
-            x=index_tuple,
-            bar_values=multi_bar_values,
-            line_values=list(df[line_variable_name]),
-            colours=colours
-        )
-    )
+    _stage('glyphs')
     bar_chart = p.vbar(
         x='x',
-        top='bar_values',
+        top=bar_column,
         width=kwargs.get('bar_width', 0.9),
         source=source_bars,
-        color='colours',
+        color=factor_cmap('x', palette=bar_colours[:len(bar_variables)], factors=bar_variables, start=1, end=2),
         name='hover_info'
     )
 
     """ line chart """
-    source_lines = ColumnDataSource(
-        data=dict(
-            x=list(groups),
-            line_values=list(df0[line_variable_name]),
-        )
-    )
-
     right_axis_y_label = kwargs.get('right_axis_y_label', line_variable_name)
 
     line_chart = p.line(
         x='x',
-        y='line_values',
+        y=line_column,
         y_range_name=right_axis_y_label,
         line_color=kwargs.get('line_colour', "#ffca28"),
         line_width=kwargs.get('line_width', 2),
@@ -110,7 +196,7 @@ def plot_dual_axis_dual_bar_line(
     )
     line_chart = p.circle(
         x='x',
-        y='line_values',
+        y=line_column,
         y_range_name=right_axis_y_label,
         color=kwargs.get('line_colour', "#ffca28"),
         size=kwargs.get('circle_size', 7),
@@ -119,8 +205,9 @@ def plot_dual_axis_dual_bar_line(
     )
 
     """ left axis """
-    min_bar_value = df0[bar_value_name].min()
-    max_bar_value = df1[bar_value_name].max()
+    _stage('axis')
+    min_bar_value = np.nanmin(bars['bar_values'])
+    max_bar_value = np.nanmax(bars['bar_values'])
 
     p.y_range = Range1d(
         kwargs.get('min_left_y_range', min(0, min_bar_value * 1.1, min_bar_value * 0.9)),
@@ -131,8 +218,8 @@ def plot_dual_axis_dual_bar_line(
     p.yaxis.axis_label = left_axis_y_label
 
     """ right axis """
-    min_line_value = df[line_variable_name].min()
-    max_line_value = df[line_variable_name].max()
+    min_line_value = np.nanmin(bars['group_line_values'])
+    max_line_value = np.nanmax(bars['group_line_values'])
 
     p.extra_y_ranges = {
         right_axis_y_label: Range1d(
@@ -146,12 +233,14 @@ def plot_dual_axis_dual_bar_line(
     p = format_grid(p, **kwargs)
 
     """ hover tooltips """
+    _stage('tooltips')
     tooltips_bar = [
         (kwargs.get('x_tooltip_name', 'Group'), '@x'),
         (kwargs.get('bar_tooltip_name', left_axis_y_label),
-         '@bar_values' + kwargs.get('bar_tooltip_format', '')
+         '@{' + bar_column + '}' + kwargs.get('bar_tooltip_format', '')
          ),
-        (kwargs.get('line_tooltip_name', right_axis_y_label), '@line_values' + kwargs.get('line_tooltip_format', ''))
+        (kwargs.get('line_tooltip_name', right_axis_y_label),
+         '@{' + line_column + '}' + kwargs.get('line_tooltip_format', ''))
     ]
     hover_bar.tooltips = get_custom_hover_tooltips(tooltips_bar)
 
@@ -159,15 +248,18 @@ def plot_dual_axis_dual_bar_line(
 
     tooltips_line = [
         (kwargs.get('x_tooltip_name', 'Group'), '@x'),
-        (kwargs.get('line_tooltip_name', right_axis_y_label), '@line_values' + kwargs.get('line_tooltip_format', ''))
+        (kwargs.get('line_tooltip_name', right_axis_y_label),
+         '@{' + line_column + '}' + kwargs.get('line_tooltip_format', ''))
     ]
     hover_line.tooltips = get_custom_hover_tooltips(tooltips_line)
     p.add_tools(hover_line)
 
     """ legend"""
+    _stage('legend')
     legend = Legend(items=[
-        LegendItem(label=left_axis_y_label + ': ' + bar_variables[0], renderers=[bar_chart], index=0),
-        LegendItem(label=left_axis_y_label + ': ' + bar_variables[1], renderers=[bar_chart], index=1),
+        LegendItem(label=left_axis_y_label + ': ' + bar_variable, renderers=[bar_chart], index=i)
+        for i, bar_variable in enumerate(bar_variables)
+    ] + [
         LegendItem(label=right_axis_y_label, renderers=[line_chart], index=0),
     ], location=kwargs.get('legend_location', (10, 10)))
 
@@ -176,6 +268,65 @@ def plot_dual_axis_dual_bar_line(
     return p
 
 
+def _interleave_grouped_bars(groups, bar_variables, bar_values, line_values, bar_colours: list) -> dict:
+    """
+    Turns long data (one row per group and bar variable) into the arrays used by a grouped bar chart, with the bars of
+    each group next to each other. Rows are scattered straight into their position, so no pivot or sort is needed and
+    groups and bar variables keep their order of appearance.
+
+    :param groups: group of each row, rows without a group or bar variable are left out
+    :param bar_variables: bar variable of each row
+    :param bar_values: bar value of each row
+    :param line_values: line value of each row, taken once per group
+    :param bar_colours: one colour per bar variable
+    :return: dictionary with the nested x factors, bar values, line values and colours of every bar, plus the groups,
+    line values per group and bar variables (values keep their dtype if no bar is missing)
+    """
+    import numpy as np
+    import pandas as pd
+
+    group_codes, groups = pd.factorize(groups)
+    variable_codes, bar_variables = pd.factorize(bar_variables)
+    groups = np.asarray(groups).astype(str)
+    bar_variables = np.asarray(bar_variables).astype(str)
+    group_number, variable_number = len(groups), len(bar_variables)
+
+    if len(bar_colours) < variable_number:
+        raise IndexError("""There are more bar variables ({} variables) than colours ({} colours). 
+                            Add more bar_colours or reduce the bar variables.""".format(variable_number,
+                                                                                        len(bar_colours)))
+
+    if (group_codes < 0).any() or (variable_codes < 0).any():
+        valid = (group_codes >= 0) & (variable_codes >= 0)
+        group_codes, variable_codes = group_codes[valid], variable_codes[valid]
+        bar_values, line_values = np.asarray(bar_values)[valid], np.asarray(line_values)[valid]
+
+    positions = group_codes * variable_number + variable_codes
+    filled = np.zeros(group_number * variable_number, dtype=bool)
+    filled[positions] = True
+    if np.count_nonzero(filled) != len(positions):
+        raise ValueError('Index contains duplicate entries, cannot reshape')
+    if len(positions) == group_number * variable_number:
+        interleaved_bar_values = np.empty(group_number * variable_number, dtype=np.asarray(bar_values).dtype)
+        group_line_values = np.empty(group_number, dtype=np.asarray(line_values).dtype)
+    else:
+        interleaved_bar_values = np.full(group_number * variable_number, np.nan)
+        group_line_values = np.full(group_number, np.nan)
+    interleaved_bar_values[positions] = bar_values
+    group_line_values[group_codes] = line_values
+
+    return dict(
+        x=list(product(groups.tolist(), bar_variables.tolist())),
+        bar_values=interleaved_bar_values,
+        line_values=np.repeat(group_line_values, variable_number),
+        colours=np.tile(np.asarray(bar_colours[:variable_number]), group_number),
+        groups=groups.tolist(),
+        group_line_values=group_line_values,
+        bar_variables=bar_variables.tolist()
+    )
+
+
+@_profiled
 def plot_multiple_bar_chart(df: pd.DataFrame, title: str, x_axis: str, y_axis: str, x_axis_categories: str,
                             md_color_shade: str = 'lightblue', show_legend: bool = False, **kwargs) -> figure:
     """
@@ -188,35 +339,67 @@ def plot_multiple_bar_chart(df: pd.DataFrame, title: str, x_axis: str, y_axis: s
     :param x_axis_categories: column name in df used to assign x axis categories
     :param md_color_shade: the colour name used by Material Design
     :param show_legend: if legend should be shown
-    :param kwargs: extra information
+    :param kwargs: extra information, e.g. resolution='day', 'week', 'month', 'year' or 'auto' to aggregate the dates in
+    x_axis to one bar per period and category with aggregation (sum, mean or max; default: sum); auto picks the finest
+    resolution with bars of at least 10 pixels. nested_factors: label every bar with its category under the x axis
+    (default: True); if False, the categories are told apart by colour, legend and tooltip, which needs no Python
+    object per bar and suits charts with many bars
     :return: Bokeh figure with multiple bar chart
     """
+    import pandas as pd
+    from bokeh.plotting import figure
+    from bokeh.models import HoverTool, Legend, LegendItem, FactorRange
+    from bokeh.transform import dodge, factor_cmap
     """ prepare data """
-    if (x_axis in df.index.names) | (y_axis in df.index.names):
-        df.reset_index(inplace=True)
-
-    df_pivot = df.pivot(index=x_axis, columns=x_axis_categories, values=y_axis)
-
-    x = [(x_ind, y_ind) for x_ind in df_pivot.index.map(str) for y_ind in df_pivot.columns.map(str)]
+    _stage('prepare data')
+    if kwargs.get('resolution'):
+        from rollups import period_labels
+
+        data = _column_arrays(df, [x_axis, x_axis_categories, y_axis])
+        max_bars = kwargs.get('plot_width', 700) // 10
+        data, resolution = _rollup(data, x_axis, y_axis, x_axis_categories,
+                                   max(max_bars // max(len(pd.unique(data[x_axis_categories])), 1), 1), **kwargs)
+        data[x_axis] = period_labels(data[x_axis], resolution)
+        x_values, bar_variables, bar_values = _pivot_arrays(data[x_axis], data[x_axis_categories], data[y_axis])
+        del data
+    else:
+        x_values, bar_variables, bar_values = _pivot_columns(df, x_axis, x_axis_categories, y_axis)
+    # x labels straight to a list of str, without a fixed-width copy of every label (dates are formatted by NumPy)
+    if x_values.dtype.kind in 'mM':
+        x_values = x_values.astype(str)
+    x_values, bar_variables = [str(value) for value in x_values.tolist()], bar_variables.astype(str)
 
-    df_pivot_as_list = [item for sublist in df_pivot.as_matrix() for item in sublist]
+    bar_width = kwargs.get('bar_width', 0.9)
+    nested_factors = kwargs.get('nested_factors', True)
 
     """ colours """
+    _stage('colours')
     try:
         colours = create_multi_colour_pallete(md_color_shade)
     except KeyError:
-        md_colour_names = get_material_design_colours().keys()
+        md_colour_names = get_material_design_palette().colour_names
         warnings.warn(
             """{} is not in the colour palette of Material Design. Select one of the following colours:\n{}"""
                 .format(md_color_shade, ', '.join(md_colour_names))
         )
         colours = create_multi_colour_pallete('lightblue')
 
-    palette = colours[0:len(df_pivot.columns)] * len(df_pivot.index)
-
     """ bar chart """
-    source = ColumnDataSource(data=dict(x=x, y=df_pivot_as_list, palette=palette))
+    _stage('source')
+    # bar values are named after y_axis and coloured from the x factors, so that charts and tables of the same rows
+    # share the source whatever their colours
+    y_column = y_axis if y_axis != 'x' else 'y'
+    if nested_factors:
+        x = list(product(x_values, bar_variables.tolist()))
+        source = _data_source({'x': x, y_column: bar_values.ravel()}, **kwargs)
+    else:
+        # one x factor per x value and one column per category, drawn side by side by dodging each category's bars
+        x = x_values
+        source_data = {_BAR_X: x}
+        source_data.update((bar_variable, bar_values[:, i]) for i, bar_variable in enumerate(bar_variables.tolist()))
+        source = _data_source(source_data, **kwargs)
 
+    _stage('figure')
     custom_hover = HoverTool()
 
     p = figure(
@@ -226,29 +409,53 @@ def plot_multiple_bar_chart(df: pd.DataFrame, title: str, x_axis: str, y_axis: s
         plot_height=kwargs.get('plot_height', 400),
         tools=[custom_hover, 'save'])
 
-    if len(colours) < len(df_pivot.columns):
+    _stage('glyphs')
+    if len(colours) < len(bar_variables):
         raise IndexError("""There are more categories ({} categories) than colours ({} colours). 
-                            Increase number of colours or reduce category number.""".format(len(df_pivot.columns),
+                            Increase number of colours or reduce category number.""".format(len(bar_variables),
                                                                                             len(colours)))
-    bar_chart = p.vbar(
-        x='x',
-        top='y',
-        fill_color='palette',
-        source=source,
-        width=kwargs.get('bar_width', 0.9),
-        line_color="white",
-    )
+    if nested_factors:
+        bar_charts = [p.vbar(
+            x='x',
+            top=y_column,
+            fill_color=factor_cmap('x', palette=colours[0:len(bar_variables)], factors=bar_variables.tolist(),
+                                   start=1, end=2),
+            source=source,
+            width=bar_width,
+            line_color="white",
+        )] * len(bar_variables)
+    else:
+        dodged_width = bar_width / max(len(bar_variables), 1)
+        bar_charts = [
+            p.vbar(
+                x=dodge(_BAR_X, (i + 0.5) * dodged_width - bar_width / 2, range=p.x_range),
+                top=bar_variable,
+                fill_color=colours[i],
+                source=source,
+                width=dodged_width,
+                line_color="white",
+                name=bar_variable
+            )
+            for i, bar_variable in enumerate(bar_variables.tolist())
+        ]
 
     """ hover tooltips """
+    _stage('tooltips')
+    if nested_factors:
+        x_tooltip, y_tooltip = "@x", "@{" + y_column + "}"
+    else:
+        x_tooltip, y_tooltip = "@" + _BAR_X, "@$name"
     tooltips = [
-        ('{},{}'.format(x_axis, x_axis_categories), "@x" + kwargs.get('x_tooltip_format', '')),
-        (y_axis, "@y" + kwargs.get('y_tooltip_format', ''))
+        ('{},{}'.format(x_axis, x_axis_categories),
+         x_tooltip + kwargs.get('x_tooltip_format', '') + ('' if nested_factors else ', $name')),
+        (y_axis, y_tooltip + kwargs.get('y_tooltip_format', ''))
     ]
     custom_hover.tooltips = get_custom_hover_tooltips(tooltips)
 
     p.add_tools(custom_hover)
 
     """ axis """
+    _stage('axis')
     y_axis_label = kwargs.get('y_axis_label', y_axis)
     x_axis_label = kwargs.get('x_axis_label', x_axis)
     x_category_label = kwargs.get('x_categories', x_axis_categories)
@@ -259,10 +466,11 @@ def plot_multiple_bar_chart(df: pd.DataFrame, title: str, x_axis: str, y_axis: s
     p = format_grid(p, **kwargs)
 
     """ legend """
+    _stage('legend')
     if show_legend:
-        bar_variables = df[x_axis_categories].unique()
         legend = Legend(items=[
-            LegendItem(label=x_category_label + ': ' + bar_variables[i].astype(str), renderers=[bar_chart], index=i)
+            LegendItem(label=x_category_label + ': ' + bar_variables[i], renderers=[bar_charts[i]],
+                       index=i if nested_factors else None)
             for i in range(len(bar_variables))
         ], location=kwargs.get('legend_location', (10, 10)))
 
@@ -271,6 +479,7 @@ def plot_multiple_bar_chart(df: pd.DataFrame, title: str, x_axis: str, y_axis: s
     return p
 
 
+@_profiled
 def plot_single_line(df: pd.DataFrame, x_axis: str, y_axis: str, title: str, x_axis_type: str = 'datetime',
                      colour_name: str = 'blue', colour_code: str = '500', md_design_colour: bool = True,
                      show_legend: bool = False, **kwargs) -> figure:
@@ -286,24 +495,38 @@ def plot_single_line(df: pd.DataFrame, x_axis: str, y_axis: str, title: str, x_a
     :param colour_code: colour code used by material desgin
     :param md_design_colour: if we should use Material Design's colours, otherwise a hex code can be passed in line_colour
     :param show_legend: if legend should be shown
-    :param kwargs: extra information that can be passed
+    :param kwargs: extra information that can be passed, e.g. downsample='lttb' or 'minmax' to reduce the line to
+    downsample_points points (default: plot_width), output_backend: canvas, svg, webgl or auto (default), which draws
+    with WebGL above webgl_threshold points (default: WEBGL_THRESHOLD)
     :return: Bokehfigure with line chart
     """
+    from bokeh.plotting import figure
+    from bokeh.models import HoverTool, Legend, LegendItem
     """ prepare data """
-    if (x_axis in df.index.names) | (y_axis in df.index.names):
-        df.reset_index(inplace=True)
+    _stage('prepare data')
+    source_data = _column_arrays(df, [x_axis, y_axis])
 
     if x_axis_type == 'datetime':
-        df = df.sort_values(x_axis, ascending=True)
+        order = _sort_order(source_data[x_axis])
+        if order is not None:
+            # typed one column at a time, so that only one reordered copy is alive besides the typed columns
+            source_data = {column: _typed_array(values.take(order)) for column, values in source_data.items()}
+            del order
+    if kwargs.get('downsample'):
+        source_data = _downsample(source_data, x_axis, [y_axis], 700, **kwargs)
 
-    source = ColumnDataSource(df)
+    _stage('source')
+    source = _data_source(source_data, **kwargs)
 
     """ line plot """
+    _stage('figure')
     custom_hover = HoverTool()
 
     p = figure(x_axis_type=x_axis_type, title=title, plot_width=kwargs.get('plot_width', 700),
-               plot_height=kwargs.get('plot_height', 350), tools=[custom_hover, 'save'])
+               plot_height=kwargs.get('plot_height', 350), tools=[custom_hover, 'save'],
+               output_backend=_output_backend(len(source_data[x_axis]), **kwargs))
 
+    _stage('colours')
     if md_design_colour:
         line_colour = get_colour_hex_code(
             colour_name,
@@ -312,9 +535,11 @@ def plot_single_line(df: pd.DataFrame, x_axis: str, y_axis: str, title: str, x_a
     else:
         line_colour = kwargs.get('line_colour', '#2196f3')
 
+    _stage('glyphs')
     line_chart = p.line(x_axis, y_axis, line_width=kwargs.get('line_width', 1), color=line_colour, source=source)
 
     """ hover tooltips """
+    _stage('tooltips')
     x_axis_default_format = "{%F, %A}" if x_axis_type == 'datetime' else ''
     tooltips = [(x_axis, "@" + x_axis + kwargs.get('x_tooltip_format', x_axis_default_format)),
                 (y_axis, "@" + y_axis + kwargs.get('y_tooltip_format', '{0,0}'))]
@@ -323,6 +548,7 @@ def plot_single_line(df: pd.DataFrame, x_axis: str, y_axis: str, title: str, x_a
     p.add_tools(custom_hover)
 
     """ legend """
+    _stage('legend')
     if show_legend:
         legend = Legend(
             items=[LegendItem(label=kwargs.get('y_axis_label', y_axis), renderers=[line_chart], index=0)],
@@ -332,6 +558,7 @@ def plot_single_line(df: pd.DataFrame, x_axis: str, y_axis: str, title: str, x_a
         p.add_layout(legend, kwargs.get('legend_placement', 'below'))
 
     """ axis """
+    _stage('axis')
     p.xaxis.axis_label = kwargs.get('x_axis_label', x_axis)
     p.yaxis.axis_label = kwargs.get('y_axis_label', y_axis)
     p = format_axis(p, **kwargs)
@@ -340,6 +567,7 @@ def plot_single_line(df: pd.DataFrame, x_axis: str, y_axis: str, title: str, x_a
     return p
 
 
+@_profiled
 def plot_multiple_lines(df: pd.DataFrame, title: str, x_axis: str, y_axis: str, category_column: str,
                         x_axis_type: str = 'datetime', **kwargs):
     """
@@ -350,33 +578,61 @@ def plot_multiple_lines(df: pd.DataFrame, title: str, x_axis: str, y_axis: str,
     :param y_axis:
     :param category_column:
     :param x_axis_type:
-    :param kwargs:
+    :param kwargs: extra information, e.g. downsample='lttb' or 'minmax' to reduce each line to downsample_points points
+    (default: plot_width), multi_line=True to draw all lines with one multi_line glyph (default: only when there are
+    more categories than Material Design colours), resolution='day', 'week', 'month', 'year' or 'auto' to aggregate
+    the dates in x_axis per period and category with aggregation (sum, mean or max; default: sum), auto picks the finest
+    resolution with no more periods than the plot width in pixels, tooltip_mode: all (one row per category), nearest
+    (only the line nearest to the cursor) or top_k (the tooltip_top_k highest lines, default 5) at the hovered x; the
+    multi_line glyph always shows the line under the cursor, output_backend: canvas, svg, webgl or auto (default), which
+    draws with WebGL above webgl_threshold points of all lines together (default: WEBGL_THRESHOLD)
     :return:
     """
+    import pandas as pd
+    from bokeh.plotting import figure
+    from bokeh.models import HoverTool, Legend, LegendItem
 
     """ prepare data """
-    if (x_axis in df.index.names) | (y_axis in df.index.names):
-        df.reset_index(inplace=True)
-
-    df[category_column] = df[category_column].apply(str)
-    df_pivoted = df.pivot(index=x_axis, columns=category_column, values=y_axis)
+    _stage('prepare data')
+    data = _column_arrays(df, [x_axis, category_column, y_axis])
+    if kwargs.get('resolution'):
+        data, _ = _rollup(data, x_axis, y_axis, category_column, kwargs.get('plot_width', 800), **kwargs)
+    multi_line = kwargs.get('multi_line')
+    if multi_line is None:
+        multi_line = len(pd.unique(data[category_column])) > len(create_multi_colour_pallete())
+    if multi_line:
+        return _plot_multi_line(data, title, x_axis, y_axis, category_column, x_axis_type, **kwargs)
+
+    x_values, categories, lines = _pivot_arrays(data[x_axis], data[category_column], data[y_axis])
+    categories = categories.astype(str).tolist()
 
     """ Multiple line chart """
+    _stage('figure')
     custom_hover = HoverTool()
     p = figure(x_axis_type=x_axis_type, title=title, plot_width=kwargs.get('plot_width', 800),
                plot_height=kwargs.get('plot_height', 400), tools=[custom_hover, 'save'])
 
     legend_list = []
 
-    source = ColumnDataSource(df_pivoted)
-
-    colours = create_multi_colour_pallete()
-    if len(colours) < len(df[category_column].unique()):
-        raise IndexError("""There are more categorical ({} categories) columns than there are colours ({} colours). 
-                                Reduce categories or add more colours.""".format(str(len(df[category_column].unique())),
-                                                                                 str(len(colours))))
-
-    for ind, category_line in enumerate(df_pivoted.columns):
+    tooltip_mode = kwargs.get('tooltip_mode', 'all')
+    if tooltip_mode not in TOOLTIP_MODES:
+        raise ValueError('{} is not a tooltip mode. Select one of: {}'.format(tooltip_mode, ', '.join(TOOLTIP_MODES)))
+
+    _stage('source')
+    source_data = {x_axis: x_values}
+    source_data.update(zip(categories, lines.T))
+    if kwargs.get('downsample'):
+        source_data = _downsample(source_data, x_axis, categories, 800, **kwargs)
+    if tooltip_mode != 'all':
+        source_data[_HOVER_ANCHOR] = _row_max([source_data[category] for category in categories])
+    source = _data_source(source_data, **kwargs)
+    p.output_backend = _output_backend(len(source_data[x_axis]) * len(categories), **kwargs)
+
+    _stage('colours')
+    colours = create_category_colours(len(categories))
+
+    _stage('glyphs')
+    for ind, category_line in enumerate(categories):
         line_g = p.line(
             x_axis,
             category_line,
@@ -388,19 +644,196 @@ def plot_multiple_lines(df: pd.DataFrame, title: str, x_axis: str, y_axis: str,
         legend_list.append(LegendItem(label=category_line, renderers=[line_g], index=ind))
 
     """ hover tooltips """
+    _stage('tooltips')
     x_axis_default_format = '{%F, %A}' if x_axis_type == 'datetime' else ''
-    tooltips = [(x_axis, "@" + x_axis + kwargs.get('x_tooltip_format', x_axis_default_format))] + \
-               [("{} of {} {}".format(y_axis, category_column, y),
-                 "@" + y + kwargs.get('y_tooltip_format', '{0,0}')) for y in df_pivoted.columns]
+    tooltips = [(x_axis, "@" + x_axis + kwargs.get('x_tooltip_format', x_axis_default_format))]
+    custom_hover.formatters = {x_axis: x_axis_type}
+
+    if tooltip_mode == 'all':
+        tooltips += [("{} of {} {}".format(y_axis, category_column, y),
+                      "@" + y + kwargs.get('y_tooltip_format', '{0,0}')) for y in categories]
+    else:
+        ranks = 1 if tooltip_mode == 'nearest' else kwargs.get('tooltip_top_k', 5)
+        anchor = p.line(x_axis, _HOVER_ANCHOR, line_alpha=0, source=source)
+        tooltips += [('@{' + _HOVER_ANCHOR + '}{name ' + str(rank) + '}',
+                      '@{' + _HOVER_ANCHOR + '}{value ' + str(rank) + '}') for rank in range(ranks)]
+        custom_hover.formatters[_HOVER_ANCHOR] = _ranked_lines_formatter(source, categories, tooltip_mode)
+        custom_hover.mode = 'vline'
+        custom_hover.renderers = [anchor]
 
     custom_hover.tooltips = get_custom_hover_tooltips(tooltips)
-    custom_hover.formatters = {x_axis: x_axis_type}
 
     """ legend """
+    _stage('legend')
     legend = Legend(items=legend_list, location=kwargs.get('legend_location', (10, 10)))
     p.add_layout(legend, kwargs.get('legend_placement', 'right'))
 
     """ axis """
+    _stage('axis')
+    p.xaxis.axis_label = kwargs.get('x_axis_label', x_axis)
+    p.yaxis.axis_label = kwargs.get('y_axis_label', y_axis)
+    p = format_axis(p, **kwargs)
+    p = format_grid(p, **kwargs)
+    return p
+
+
+def _output_backend(points: int, **kwargs) -> str:
+    """
+    WebGL keeps pan and zoom smooth with many points; glyphs it cannot draw (e.g. multi_line and bars in Bokeh 1.x) and
+    browsers without WebGL, such as some headless ones, fall back to canvas.
+    :param points: number of points drawn by the glyphs of the figure
+    :param kwargs: output_backend (canvas, svg, webgl or auto; default: auto) and webgl_threshold (default:
+    WEBGL_THRESHOLD)
+    :return: output backend of the figure, auto is webgl above webgl_threshold points and canvas otherwise
+    """
+    output_backend = kwargs.get('output_backend', 'auto')
+    if output_backend not in OUTPUT_BACKENDS:
+        raise ValueError('{} is not an output backend. Select one of: {}'.format(output_backend,
+                                                                                 ', '.join(OUTPUT_BACKENDS)))
+    if output_backend == 'auto':
+        return 'webgl' if points > kwargs.get('webgl_threshold', WEBGL_THRESHOLD) else 'canvas'
+    return output_backend
+
+
+def _rollup(data: dict, x_axis: str, y_axis: str, category_column: str, max_periods: int, **kwargs) -> tuple:
+    """
+    Aggregates the dates in x_axis to the resolution in kwargs, through kwargs['rollup_cache'] or the default cache of
+    rollups.py.
+    :param data: dictionary with the x, y and category columns as NumPy arrays
+    :param max_periods: maximum number of periods for resolution='auto'
+    :param kwargs: resolution (day, week, month, year or auto), aggregation (sum, mean or max; default: sum) and
+    rollup_cache
+    :return: tuple with the dictionary of aggregated columns (first day of each period in x_axis) and the resolution
+    """
+    from rollups import auto_resolution, DEFAULT_CACHE
+
+    resolution = kwargs['resolution']
+    if resolution == 'auto':
+        resolution = auto_resolution(data[x_axis], max_periods)
+
+    cache = kwargs.get('rollup_cache')
+    if cache is None:
+        cache = DEFAULT_CACHE
+    rolled = cache.rollup_arrays(data[x_axis], data[y_axis], resolution, kwargs.get('aggregation', 'sum'),
+                                 data[category_column])
+    return {x_axis: rolled['periods'], category_column: rolled['categories'], y_axis: rolled['values']}, resolution
+
+
+def _row_max(columns: list):
+    """
+    :param columns: arrays of the same length
+    :return: maximum of each row as float64, NaN where every value is missing
+    """
+    import numpy as np
+
+    values = np.full(len(columns[0]), np.nan)
+    for column in columns:
+        values = np.fmax(values, column)
+    return values
+
+
+def _ranked_lines_formatter(source, categories: list, tooltip_mode: str):
+    """
+    Tooltip formatter that ranks the lines at the hovered row in the browser, so that the tooltip template has a fixed
+    number of rows however many lines there are. The format of each field is 'name <rank>' or 'value <rank>', where
+    the lines are ranked by distance to the cursor (nearest) or by value, highest first (top_k).
+    :param source: data source with one column per line
+    :param categories: names of the line columns
+    :param tooltip_mode: nearest or top_k
+    :return: CustomJSHover
+    """
+    import json
+    from bokeh.models import CustomJSHover
+
+    return CustomJSHover(
+        args=dict(source=source),
+        code="""
+        var categories = """ + json.dumps(categories) + """;
+        var nearest = """ + json.dumps(tooltip_mode == 'nearest') + """;
+        var i = special_vars.index;
+        var lines = [];
+        for (var j = 0; j < categories.length; j++) {
+            var y = source.data[categories[j]][i];
+            if (y != null && !isNaN(y)) {
+                lines.push({name: categories[j], y: y, rank: nearest ? Math.abs(y - special_vars.y) : -y});
+            }
+        }
+        lines.sort(function (a, b) { return a.rank - b.rank; });
+        var field = format.split(' ');
+        var line = lines[parseInt(field[1])];
+        if (line == null) {
+            return '';
+        }
+        return field[0] == 'name' ? line.name : line.y.toLocaleString(undefined, {maximumFractionDigits: 2});
+        """
+    )
+
+
+def _plot_multi_line(data: dict, title: str, x_axis: str, y_axis: str, category_column: str, x_axis_type: str,
+                     **kwargs) -> figure:
+    """
+    Multiple line chart drawn with a single multi_line glyph: one renderer and one row per category in the data source,
+    holding the x and y values of that category only, so nothing is padded with NaN whatever the number of lines.
+    :param data: dictionary with the x, y and category columns as NumPy arrays
+    :param kwargs: same extra information as plot_multiple_lines; the legend is shown if show_legend (default: only if
+    there are no more lines than Material Design colours)
+    :return: figure with the lines
+    """
+    from bokeh.plotting import figure
+    from bokeh.models import HoverTool, Legend, LegendItem
+
+    """ prepare data, still in the prepare data stage of plot_multiple_lines """
+    categories, xs, ys = _split_series(data[x_axis], data[category_column], data[y_axis])
+    categories = categories.astype(str).tolist()
+    if kwargs.get('downsample'):
+        for i, (x_values, y_values) in enumerate(zip(xs, ys)):
+            kept = _downsample({x_axis: x_values, y_axis: y_values}, x_axis, [y_axis], 800, **kwargs)
+            xs[i], ys[i] = kept[x_axis], kept[y_axis]
+
+    _stage('colours')
+    colours = create_category_colours(len(categories))
+    _stage('source')
+    source = _data_source({x_axis: xs, y_axis: ys, category_column: categories, 'colour': colours}, **kwargs)
+
+    """ Multiple line chart """
+    _stage('figure')
+    custom_hover = HoverTool(line_policy='nearest')
+    p = figure(x_axis_type=x_axis_type, title=title, plot_width=kwargs.get('plot_width', 800),
+               plot_height=kwargs.get('plot_height', 400), tools=[custom_hover, 'save'],
+               output_backend=_output_backend(sum(len(x_values) for x_values in xs), **kwargs))
+
+    _stage('glyphs')
+    lines = p.multi_line(
+        xs=x_axis,
+        ys=y_axis,
+        line_width=kwargs.get('line_width', 1),
+        line_color='colour',
+        line_alpha=kwargs.get('line_alpha', 0.9),
+        source=source
+    )
+
+    """ hover tooltips """
+    _stage('tooltips')
+    x_axis_default_format = '{%F, %A}' if x_axis_type == 'datetime' else '{0,0.00}'
+    tooltips = [
+        (category_column, '@{' + category_column + '}'),
+        (x_axis, '$data_x' + kwargs.get('x_tooltip_format', x_axis_default_format)),
+        (y_axis, '$data_y' + kwargs.get('y_tooltip_format', '{0,0}'))
+    ]
+    custom_hover.tooltips = get_custom_hover_tooltips(tooltips)
+    custom_hover.formatters = {'$data_x': 'datetime' if x_axis_type == 'datetime' else 'numeral'}
+    custom_hover.renderers = [lines]
+
+    """ legend """
+    _stage('legend')
+    if kwargs.get('show_legend', len(categories) <= len(create_multi_colour_pallete())):
+        legend = Legend(items=[LegendItem(label=category, renderers=[lines], index=i)
+                               for i, category in enumerate(categories)],
+                        location=kwargs.get('legend_location', (10, 10)))
+        p.add_layout(legend, kwargs.get('legend_placement', 'right'))
+
+    """ axis """
+    _stage('axis')
     p.xaxis.axis_label = kwargs.get('x_axis_label', x_axis)
     p.yaxis.axis_label = kwargs.get('y_axis_label', y_axis)
     p = format_axis(p, **kwargs)
@@ -408,13 +841,338 @@ def plot_multiple_lines(df: pd.DataFrame, title: str, x_axis: str, y_axis: str,
     return p
 
 
+def _split_series(x_values, category_values, y_values) -> tuple:
+    """
+    Splits long data into one pair of x and y arrays per category, each sorted by x. Rows without a category are left
+    out.
+    :param x_values: x value of each row
+    :param category_values: category of each row
+    :param y_values: y value of each row
+    :return: tuple with the sorted categories and the lists of x arrays and y arrays, one array per category
+    """
+    import numpy as np
+    import pandas as pd
+
+    codes, categories = pd.factorize(category_values, sort=True)
+    x_values, y_values = np.asarray(x_values), np.asarray(y_values)
+
+    order = np.argsort(x_values, kind='stable')
+    order = order[np.argsort(codes[order], kind='stable')]
+    order = order[codes[order] >= 0]
+
+    bounds = np.searchsorted(codes[order], np.arange(1, len(categories)))
+    return np.asarray(categories), np.split(x_values[order], bounds), np.split(y_values[order], bounds)
+
+
+def _column_arrays(df: pd.DataFrame, columns) -> dict:
+    """
+    Selects the columns a chart references, so that no other column of df ends up in its data source. Columns are read
+    as views of df and index levels as arrays of their own, so df is never modified nor copied as a whole. Dates with a
+    time zone are read as their wall time in that time zone, as Bokeh shows dates as UTC.
+
+    df can also be Arrow-backed: a pyarrow.Table (e.g. from data_loading.read_cached) or a dataframe with pyarrow
+    dtypes. Their columns are converted to NumPy one at a time, without a copy for numbers and dates without nulls.
+    :param df: dataframe or pyarrow.Table with the data
+    :param columns: column or index level names used by the glyphs, tooltips or table columns
+    :return: dictionary with the column names as keys and their values as NumPy arrays
+    """
+    arrays = {}
+    for column in dict.fromkeys(columns):
+        if column in _column_names(df):
+            values = df.column(column).to_pandas() if _is_arrow_table(df) else df[column]
+            if getattr(values.dtype, 'pyarrow_dtype', None) is not None:
+                values = values.array.__arrow_array__().to_pandas()
+            if getattr(values.dtype, 'tz', None) is not None:
+                values = values.dt.tz_localize(None)
+        elif not _is_arrow_table(df) and column in df.index.names:
+            values = df.index.get_level_values(column)
+            if getattr(values.dtype, 'tz', None) is not None:
+                values = values.tz_localize(None)
+        else:
+            raise KeyError(column)
+        arrays[column] = values.values
+    return arrays
+
+
+def _sort_order(values):
+    """
+    Checks in one vectorized pass whether values are already in ascending order, as most time series are, so that
+    they are neither sorted nor copied again.
+    :param values: NumPy array, e.g. the dates of a line
+    :return: indices that sort values (stable, missing values last), or None if they are already sorted
+    """
+    import numpy as np
+
+    if len(values) < 2 or bool((values[1:] >= values[:-1]).all()):
+        return None
+    return np.argsort(values, kind='mergesort')
+
+
+def _column_names(df) -> list:
+    """
+    :param df: dataframe or pyarrow.Table
+    :return: names of its columns
+    """
+    return list(df.column_names) if _is_arrow_table(df) else list(df.columns)
+
+
+def _is_arrow_table(df) -> bool:
+    return hasattr(df, 'column_names') and hasattr(df, 'schema')
+
+
+def _pivot_arrays(index_values, column_values, values) -> tuple:
+    """
+    Same reshape as DataFrame.pivot, done on arrays: each value is scattered into its cell of the table, without
+    building an intermediate dataframe. Rows and columns are sorted and missing cells are NaN.
+    :param index_values: value of each row used as the index of the table
+    :param column_values: value of each row used as the columns of the table
+    :param values: value of each row for the cells of the table
+    :return: tuple with the sorted index, the sorted columns and the table as a 2D array (keeps the dtype of values if
+    no cell is missing)
+    """
+    import pandas as pd
+
+    row_codes, rows = pd.factorize(index_values, sort=True)
+    column_codes, columns = pd.factorize(column_values, sort=True)
+    return _pivot_codes(row_codes, rows, column_codes, columns, values, overwrite_codes=True)
+
+
+def _pivot_columns(df: pd.DataFrame, index: str, columns: str, values: str) -> tuple:
+    """
+    Same as _pivot_arrays for columns or index levels of df. When index and columns are both sorted levels of a
+    MultiIndex, the table is filled from the codes of the levels, without reading the value of each level in each row.
+    :return: tuple with the sorted index, the sorted columns and the table as a 2D array
+    """
+    import numpy as np
+    import pandas as pd
+
+    multi_index = None if _is_arrow_table(df) else df.index
+    if (isinstance(multi_index, pd.MultiIndex) and index != columns and
+            all(name in multi_index.names and name not in _column_names(df) for name in (index, columns))):
+        levels = [multi_index.names.index(name) for name in (index, columns)]
+        if all(multi_index.levels[level].is_monotonic_increasing and
+               getattr(multi_index.levels[level].dtype, 'tz', None) is None for level in levels):
+            (row_codes, rows), (column_codes, column_values) = [
+                (np.asarray(multi_index.codes[level]), multi_index.levels[level]) for level in levels]
+            rows, column_values, table, filled = _pivot_codes(
+                row_codes, rows, column_codes, column_values, _column_arrays(df, [values])[values], return_filled=True)
+            # levels can keep values that no row uses any more, e.g. after a filter
+            used_rows, used_columns = filled.any(axis=1), filled.any(axis=0)
+            if not (used_rows.all() and used_columns.all()):
+                rows, column_values = rows[used_rows], column_values[used_columns]
+                table = table[used_rows][:, used_columns]
+            return rows, column_values, table
+
+    data = _column_arrays(df, [index, columns, values])
+    return _pivot_arrays(data[index], data[columns], data[values])
+
+
+def _pivot_codes(row_codes, rows, column_codes, columns, values, overwrite_codes: bool = False,
+                 return_filled: bool = False) -> tuple:
+    """
+    Scatters each value into the cell of its row and column code.
+    :param row_codes: position of the row of each value in rows, -1 for a missing row
+    :param rows: sorted values of the index
+    :param column_codes: position of the column of each value in columns, -1 for a missing column
+    :param columns: sorted values of the columns
+    :param values: value of each row for the cells of the table
+    :param overwrite_codes: reuse row_codes for the positions of the cells when it is an array of the type of the
+    positions
+    :param return_filled: also return the 2D boolean array of the cells that have a value
+    :return: tuple with the index, the columns and the table, as in _pivot_arrays (and the filled cells)
+    """
+    import numpy as np
+
+    rows, columns, values = np.asarray(rows), np.asarray(columns), np.asarray(values)
+
+    if (row_codes < 0).any() or (column_codes < 0).any():
+        valid = (row_codes >= 0) & (column_codes >= 0)
+        row_codes, column_codes, values = row_codes[valid], column_codes[valid], values[valid]
+        overwrite_codes = True
+
+    # positions of the cells in the flattened table, on 32 bits when they fit
+    position_type = np.int32 if len(rows) * len(columns) < 2 ** 31 else np.intp
+    if overwrite_codes and row_codes.dtype == position_type:
+        positions = row_codes
+        positions *= len(columns)
+    else:
+        positions = np.multiply(row_codes, len(columns), dtype=position_type)
+    positions += column_codes
+
+    filled = np.zeros(len(rows) * len(columns), dtype=bool)
+    filled[positions] = True
+    filled_number = np.count_nonzero(filled)
+    if filled_number != len(positions):
+        raise ValueError('Index contains duplicate entries, cannot reshape')
+    if not return_filled:
+        del filled
+
+    if filled_number == len(rows) * len(columns):
+        table = np.empty((len(rows), len(columns)), dtype=values.dtype)
+    else:
+        table = np.full((len(rows), len(columns)), np.nan)
+    table.ravel()[positions] = values
+    if return_filled:
+        return rows, columns, table, filled.reshape(table.shape)
+    return rows, columns, table
+
+
+def _downsample(source_data: dict, x_axis: str, y_columns: list, default_width: int, **kwargs) -> dict:
+    """
+    Keeps only the points that preserve the shape of the lines, chosen with the method in kwargs['downsample']. Only
+    original points are kept, so tooltips still show true values.
+    :param source_data: dictionary with the x column and the y columns as NumPy arrays
+    :param x_axis: name of the x column
+    :param y_columns: names of the y columns, each one is a line
+    :param default_width: default plot width of the chart, used if kwargs has no plot_width
+    :param kwargs: downsample (lttb or minmax), downsample_points (default: plot width in pixels)
+    :return: dictionary with the same columns and only the kept points
+    """
+    from decimation import decimate
+
+    points = kwargs.get('downsample_points', kwargs.get('plot_width', default_width))
+    kept = decimate(source_data[x_axis], [source_data[column] for column in y_columns], points, kwargs['downsample'])
+    return {column: values[kept] for column, values in source_data.items()}
+
+
+class SourceRegistry:
+    """
+    Shares data sources between the charts and tables of one document, so that a dataset shown in several views is
+    only serialized once. Pass the same registry as source_registry to every plot function of the document.
+
+    Every column is fingerprinted by its content. A requested source reuses a registered one when both have the same
+    length, share at least one column with the same content and have no column with the same name and different
+    content; columns the registered source is missing are added to it.
+    A registry must not be shared between documents, as a Bokeh model can only belong to one document. Charts of the
+    same document can be built from several threads.
+    """
+
+    def __init__(self):
+        self._entries = []
+        self._lock = threading.Lock()
+
+    def get_source(self, data: dict):
+        """
+        :param data: dictionary with the column names and the values of the source
+        :return: registered ColumnDataSource with all the columns of data, or a new one
+        """
+        from bokeh.models import ColumnDataSource
+
+        lengths = set(len(values) for values in data.values())
+        length = lengths.pop() if len(lengths) == 1 else None
+        fingerprints = {column: _fingerprint(values) for column, values in data.items()}
+
+        with self._lock:
+            for source, source_length, source_fingerprints in self._entries:
+                shared = [column for column in fingerprints if column in source_fingerprints]
+                if source_length != length or not shared:
+                    continue
+                if any(fingerprints[column] != source_fingerprints[column] for column in shared):
+                    continue
+
+                for column, values in data.items():
+                    if column not in source_fingerprints:
+                        source.add(values, column)
+                        source_fingerprints[column] = fingerprints[column]
+                return source
+
+            source = ColumnDataSource(data=data)
+            self._entries.append((source, length, fingerprints))
+            return source
+
+
+def _data_source(data: dict, **kwargs):
+    """
+    :param data: dictionary with the column names and the values of the source
+    :param kwargs: source_registry to reuse sources with the same content
+    :return: ColumnDataSource with data, arrays are converted to types Bokeh encodes in binary
+    """
+    data = {column: _typed_array(values) for column, values in data.items()}
+
+    source_registry = kwargs.get('source_registry')
+    if source_registry is not None:
+        return source_registry.get_source(data)
+
+    from bokeh.models import ColumnDataSource
+    return ColumnDataSource(data=data)
+
+
+def _typed_array(values):
+    """
+    Converts a NumPy array to a contiguous array of a type that Bokeh serializes as binary (base64) instead of a JSON
+    list: dates and durations to float64 milliseconds (NaT as NaN), integers to the smallest integer type of up to 32
+    bits that fits their values (float64 if none does). Ragged columns (lists of arrays) are converted array by array.
+    Other arrays and lists, e.g. strings and factors, are returned as they are.
+    :param values: values of a column
+    :return: values ready to be sent to a ColumnDataSource
+    """
+    import numpy as np
+
+    if isinstance(values, list) and values and all(isinstance(value, np.ndarray) for value in values):
+        return [_typed_array(value) for value in values]
+    if not isinstance(values, np.ndarray):
+        return values
+
+    kind = values.dtype.kind
+    if kind in 'mM':
+        missing = np.isnat(values)
+        milliseconds = values.astype('{}8[ms]'.format(kind)).view(np.int64)
+        # converted in the buffer of the milliseconds, which are read before being overwritten
+        values = milliseconds.view(np.float64)
+        np.copyto(values, milliseconds, casting='unsafe')
+        values[missing] = np.nan
+        return values
+    if kind in 'iu' and len(values):
+        smallest = np.promote_types(np.min_scalar_type(values.min()), np.min_scalar_type(values.max()))
+        return values.astype(smallest if smallest.itemsize <= 4 else np.float64, copy=False)
+    if kind in 'iuf':
+        return np.ascontiguousarray(values)
+    return values
+
+
+def _fingerprint(values) -> str:
+    """
+    Hashes the content of a column: arrays of numbers and dates are hashed from their buffer, object arrays and lists
+    with pandas' vectorized hash of every value, ragged columns (lists of arrays) from the hash of each array.
+    :param values: NumPy array or list
+    :return: hex digest of the dtype and the values
+    """
+    import hashlib
+    import numpy as np
+    import pandas as pd
+
+    if isinstance(values, list) and values and all(isinstance(value, np.ndarray) for value in values):
+        digest = hashlib.sha1(b'ragged')
+        for value in values:
+            digest.update(_fingerprint(value).encode())
+        return digest.hexdigest()
+
+    if not isinstance(values, np.ndarray):
+        objects = np.empty(len(values), dtype=object)
+        objects[:] = values
+        values = objects
+
+    if values.dtype == object:
+        buffer = pd.util.hash_array(values)
+    else:
+        buffer = np.ascontiguousarray(values).view(np.uint8)
+
+    digest = hashlib.sha1(str(values.dtype).encode())
+    digest.update(buffer)
+    return digest.hexdigest()
+
+
+@_profiled
 def format_axis(p: figure, **kwargs) -> figure:
+    from bokeh.models import NumeralTickFormatter
+
     p.yaxis[0].formatter = NumeralTickFormatter(format=kwargs.get("y_num_tick_formatter", '0.0'))
     p.x_range.range_padding = kwargs.get("x_range_padding", 0.1)
     p.xaxis.major_label_orientation = kwargs.get('x_label_orientation', 1)
     return p
 
 
+@_profiled
 def format_grid(p: figure, **kwargs) -> figure:
     p.xgrid.grid_line_color = kwargs.get('grid_line_colour', None)
     return p
@@ -435,47 +1193,105 @@ def get_custom_hover_tooltips(tooltips: list) -> str:
     return html_code
 
 
+@_profiled
 def plot_table(df,
                header_style="color: #757575; font-family: Courier; font-weight:800",
                table_style="color: #757575; font-family: Courier; font-weight:normal",
-               height=250):
-    source = ColumnDataSource(df)
-
-    header = Div(text="<style>.slick-header.ui-state-default{" + header_style + "}</style>")
-
-    template = """
-    <div style="{}"> 
-        <%= value %>
-    </div>
-    """.format(table_style)
-
-    columns = [
-        TableColumn(field=col,
-                    title=col,
-                    formatter=HTMLTemplateFormatter(template=template)
-                    )
-        for col in df.columns
-    ]
+               height=250,
+               columns: list = None,
+               source_registry: SourceRegistry = None):
+    """
+    Creates a scrollable Bokeh table. Cells are styled by one stylesheet and formatted by Bokeh's native formatters,
+    chosen from the dtype of each column: numbers (integers as they are, e.g. years, and floats with up to two
+    decimals), dates as dates and anything else as text.
+
+    :param df: dataframe with the data for the table
+    :param header_style: CSS style of the header
+    :param table_style: CSS style of the cells
+    :param height: height of the table in pixels
+    :param columns: column names to show in the table, only these columns are added to the data source (default: all)
+    :param source_registry: registry to share the data source with other charts of the same document
+    :return: Bokeh column with the table
+    """
+    from bokeh.models.widgets import DataTable, Div
+    from bokeh.layouts import widgetbox, Column
+
+    _stage('prepare data')
+    table_columns = _column_names(df) if columns is None else list(columns)
+    arrays = _column_arrays(df, table_columns)
+    _stage('source')
+    source = _data_source(arrays, source_registry=source_registry)
+
+    _stage('table')
+    css_class, stylesheet = _table_stylesheet(header_style, table_style)
+    header = Div(text=stylesheet)
+
     data_table = DataTable(source=source,
-                           columns=columns,
+                           columns=_table_columns(arrays),
                            fit_columns=True,
                            header_row=True,
                            index_position=None,
-                           height=height
+                           height=height,
+                           css_classes=[css_class]
                            )
     return Column(header, widgetbox(data_table))
 
 
+def _table_stylesheet(header_style: str, table_style: str) -> tuple:
+    """
+    Styles the header and the cells of the tables with the same styles through one stylesheet, scoped by a CSS class
+    so that tables with other styles in the same document keep theirs.
+    :param header_style: CSS style of the header
+    :param table_style: CSS style of the cells
+    :return: tuple with the CSS class to add to the DataTable and the HTML style element
+    """
+    import hashlib
+
+    css_class = 'catalogue-table-' + hashlib.sha1((header_style + table_style).encode()).hexdigest()[:8]
+    stylesheet = "<style>.{0} .slick-header.ui-state-default{{{1}}} .{0} .slick-cell{{{2}}}</style>".format(
+        css_class, header_style, table_style)
+    return css_class, stylesheet
+
+
+def _table_columns(arrays: dict) -> list:
+    """
+    :param arrays: dictionary with the column names of the table and their values, before they are typed for the source
+    :return: list of TableColumn, one per column, with a formatter for the dtype of the column
+    """
+    from bokeh.models.widgets import TableColumn
+
+    return [TableColumn(field=column, title=column, formatter=_table_formatter(values))
+            for column, values in arrays.items()]
+
+
+def _table_formatter(values):
+    """
+    :param values: NumPy array with the values of a column
+    :return: NumberFormatter for numbers, DateFormatter for dates (with the time if any value has one) and
+    StringFormatter for anything else
+    """
+    import numpy as np
+    from bokeh.models.widgets import DateFormatter, NumberFormatter, StringFormatter
+
+    kind = values.dtype.kind
+    if kind in 'iu':
+        return NumberFormatter(format='0')
+    if kind == 'f':
+        return NumberFormatter(format='0.[00]')
+    if kind == 'M':
+        has_time = (values.astype('M8[D]') != values)[~np.isnat(values)].any()
+        return DateFormatter(format='%Y-%m-%d %H:%M:%S' if has_time else '%Y-%m-%d')
+    return StringFormatter()
+
+
 def get_colour_hex_code(colour_name, colour_code):
     """
-    Calls for the dictionary with colour and codes from Material Design and finds the right hex code based on colour
-    name name and colour code.
-    :param colour_name: name of MD colour #@todo: add names here
-    :param colour_code:  the number of the gradient colour. #@todo: add codes here
+    Finds the hex code in the Material Design palette based on colour name and colour code.
+    :param colour_name: name of MD colour (e.g. red, indigo, bluegrey)
+    :param colour_code: the number of the gradient colour (e.g. 50, 500, a700)
     :return: hex code based on Material Design's colour name and colour code
     """
-    md_colour_dict = get_material_design_colours()
-    return md_colour_dict[colour_name][colour_code]
+    return get_material_design_palette().hex_code(colour_name, colour_code)
 
 
 def create_multi_colour_pallete(colour_name: str = 'multi_colour', colour_number: str = '500') -> list:
@@ -492,11 +1308,30 @@ def create_multi_colour_pallete(colour_name: str = 'multi_colour', colour_number
         colour palette as a list
 
     """
-    material_design_colours = pd.DataFrame(get_material_design_colours())
+    palette = get_material_design_palette()
     if colour_name == 'multi_colour':
-        return list(material_design_colours.loc[colour_number])
+        return list(palette.colours(colour_number))
     else:
-        return list(material_design_colours[colour_name])
+        return list(palette.shades(colour_name))
+
+
+def create_category_colours(number_of_colours: int, colour_number: str = '500') -> list:
+    """
+    Returns one colour per category: the Material Design colours with the given colour number first and, when there
+    are more categories than those, colours spread around the hue circle by the golden angle, so that neighbouring
+    categories always get distinct hues.
+    :param number_of_colours: number of categories
+    :param colour_number: code used for colour strength of the Material Design colours (e.g. 500)
+    :return: list of hex codes
+    """
+    from colorsys import hls_to_rgb
+
+    colours = create_multi_colour_pallete(colour_number=colour_number)[:number_of_colours]
+    for i in range(number_of_colours - len(colours)):
+        hue = (i * 0.618033988749895) % 1
+        lightness = (0.45, 0.6, 0.35)[i % 3]
+        colours.append('#{:02x}{:02x}{:02x}'.format(*(round(255 * c) for c in hls_to_rgb(hue, lightness, 0.65))))
+    return colours
 
 
 def get_material_design_colours() -> dict:
@@ -505,297 +1340,373 @@ def get_material_design_colours() -> dict:
     pink and the values are dictionaries, in which the key indicates the colour code number and the value the HEX code.
     :return: dictionary with colours, code numbers and HEX codes.
     """
-    return {
-        "red": {
-            "50": "#ffebee",
-            "100": "#ffcdd2",
-            "200": "#ef9a9a",
-            "300": "#e57373",
-            "400": "#ef5350",
-            "500": "#f44336",
-            "600": "#e53935",
-            "700": "#d32f2f",
-            "800": "#c62828",
-            "900": "#b71c1c",
-            "a100": "#ff8a80",
-            "a200": "#ff5252",
-            "a400": "#ff1744",
-            "a700": "#d50000"
-        },
-        "pink": {
-            "50": "#fce4ec",
-            "100": "#f8bbd0",
-            "200": "#f48fb1",
-            "300": "#f06292",
-            "400": "#ec407a",
-            "500": "#e91e63",
-            "600": "#d81b60",
-            "700": "#c2185b",
-            "800": "#ad1457",
-            "900": "#880e4f",
-            "a100": "#ff80ab",
-            "a200": "#ff4081",
-            "a400": "#f50057",
-            "a700": "#c51162"
-        },
-        "purple": {
-            "50": "#f3e5f5",
-            "100": "#e1bee7",
-            "200": "#ce93d8",
-            "300": "#ba68c8",
-            "400": "#ab47bc",
-            "500": "#9c27b0",
-            "600": "#8e24aa",
-            "700": "#7b1fa2",
-            "800": "#6a1b9a",
-            "900": "#4a148c",
-            "a100": "#ea80fc",
-            "a200": "#e040fb",
-            "a400": "#d500f9",
-            "a700": "#aa00ff"
-        },
-        "deeppurple": {
-            "50": "#ede7f6",
-            "100": "#d1c4e9",
-            "200": "#b39ddb",
-            "300": "#9575cd",
-            "400": "#7e57c2",
-            "500": "#673ab7",
-            "600": "#5e35b1",
-            "700": "#512da8",
-            "800": "#4527a0",
-            "900": "#311b92",
-            "a100": "#b388ff",
-            "a200": "#7c4dff",
-            "a400": "#651fff",
-            "a700": "#6200ea"
-        },
-        "indigo": {
-            "50": "#e8eaf6",
-            "100": "#c5cae9",
-            "200": "#9fa8da",
-            "300": "#7986cb",
-            "400": "#5c6bc0",
-            "500": "#3f51b5",
-            "600": "#3949ab",
-            "700": "#303f9f",
-            "800": "#283593",
-            "900": "#1a237e",
-            "a100": "#8c9eff",
-            "a200": "#536dfe",
-            "a400": "#3d5afe",
-            "a700": "#304ffe"
-        },
-        "blue": {
-            "50": "#e3f2fd",
-            "100": "#bbdefb",
-            "200": "#90caf9",
-            "300": "#64b5f6",
-            "400": "#42a5f5",
-            "500": "#2196f3",
-            "600": "#1e88e5",
-            "700": "#1976d2",
-            "800": "#1565c0",
-            "900": "#0d47a1",
-            "a100": "#82b1ff",
-            "a200": "#448aff",
-            "a400": "#2979ff",
-            "a700": "#2962ff"
-        },
-        "lightblue": {
-            "50": "#e1f5fe",
-            "100": "#b3e5fc",
-            "200": "#81d4fa",
-            "300": "#4fc3f7",
-            "400": "#29b6f6",
-            "500": "#03a9f4",
-            "600": "#039be5",
-            "700": "#0288d1",
-            "800": "#0277bd",
-            "900": "#01579b",
-            "a100": "#80d8ff",
-            "a200": "#40c4ff",
-            "a400": "#00b0ff",
-            "a700": "#0091ea"
-        },
-        "cyan": {
-            "50": "#e0f7fa",
-            "100": "#b2ebf2",
-            "200": "#80deea",
-            "300": "#4dd0e1",
-            "400": "#26c6da",
-            "500": "#00bcd4",
-            "600": "#00acc1",
-            "700": "#0097a7",
-            "800": "#00838f",
-            "900": "#006064",
-            "a100": "#84ffff",
-            "a200": "#18ffff",
-            "a400": "#00e5ff",
-            "a700": "#00b8d4"
-        },
-        "teal": {
-            "50": "#e0f2f1",
-            "100": "#b2dfdb",
-            "200": "#80cbc4",
-            "300": "#4db6ac",
-            "400": "#26a69a",
-            "500": "#009688",
-            "600": "#00897b",
-            "700": "#00796b",
-            "800": "#00695c",
-            "900": "#004d40",
-            "a100": "#a7ffeb",
-            "a200": "#64ffda",
-            "a400": "#1de9b6",
-            "a700": "#00bfa5"
-        },
-        "green": {
-            "50": "#e8f5e9",
-            "100": "#c8e6c9",
-            "200": "#a5d6a7",
-            "300": "#81c784",
-            "400": "#66bb6a",
-            "500": "#4caf50",
-            "600": "#43a047",
-            "700": "#388e3c",
-            "800": "#2e7d32",
-            "900": "#1b5e20",
-            "a100": "#b9f6ca",
-            "a200": "#69f0ae",
-            "a400": "#00e676",
-            "a700": "#00c853"
-        },
-        "lightgreen": {
-            "50": "#f1f8e9",
-            "100": "#dcedc8",
-            "200": "#c5e1a5",
-            "300": "#aed581",
-            "400": "#9ccc65",
-            "500": "#8bc34a",
-            "600": "#7cb342",
-            "700": "#689f38",
-            "800": "#558b2f",
-            "900": "#33691e",
-            "a100": "#ccff90",
-            "a200": "#b2ff59",
-            "a400": "#76ff03",
-            "a700": "#64dd17"
-        },
-        "lime": {
-            "50": "#f9fbe7",
-            "100": "#f0f4c3",
-            "200": "#e6ee9c",
-            "300": "#dce775",
-            "400": "#d4e157",
-            "500": "#cddc39",
-            "600": "#c0ca33",
-            "700": "#afb42b",
-            "800": "#9e9d24",
-            "900": "#827717",
-            "a100": "#f4ff81",
-            "a200": "#eeff41",
-            "a400": "#c6ff00",
-            "a700": "#aeea00"
-        },
-        "yellow": {
-            "50": "#fffde7",
-            "100": "#fff9c4",
-            "200": "#fff59d",
-            "300": "#fff176",
-            "400": "#ffee58",
-            "500": "#ffeb3b",
-            "600": "#fdd835",
-            "700": "#fbc02d",
-            "800": "#f9a825",
-            "900": "#f57f17",
-            "a100": "#ffff8d",
-            "a200": "#ffff00",
-            "a400": "#ffea00",
-            "a700": "#ffd600"
-        },
-        "amber": {
-            "50": "#fff8e1",
-            "100": "#ffecb3",
-            "200": "#ffe082",
-            "300": "#ffd54f",
-            "400": "#ffca28",
-            "500": "#ffc107",
-            "600": "#ffb300",
-            "700": "#ffa000",
-            "800": "#ff8f00",
-            "900": "#ff6f00",
-            "a100": "#ffe57f",
-            "a200": "#ffd740",
-            "a400": "#ffc400",
-            "a700": "#ffab00"
-        },
-        "orange": {
-            "50": "#fff3e0",
-            "100": "#ffe0b2",
-            "200": "#ffcc80",
-            "300": "#ffb74d",
-            "400": "#ffa726",
-            "500": "#ff9800",
-            "600": "#fb8c00",
-            "700": "#f57c00",
-            "800": "#ef6c00",
-            "900": "#e65100",
-            "a100": "#ffd180",
-            "a200": "#ffab40",
-            "a400": "#ff9100",
-            "a700": "#ff6d00"
-        },
-        "deeporange": {
-            "50": "#fbe9e7",
-            "100": "#ffccbc",
-            "200": "#ffab91",
-            "300": "#ff8a65",
-            "400": "#ff7043",
-            "500": "#ff5722",
-            "600": "#f4511e",
-            "700": "#e64a19",
-            "800": "#d84315",
-            "900": "#bf360c",
-            "a100": "#ff9e80",
-            "a200": "#ff6e40",
-            "a400": "#ff3d00",
-            "a700": "#dd2c00"
-        },
-        "brown": {
-            "50": "#efebe9",
-            "100": "#d7ccc8",
-            "200": "#bcaaa4",
-            "300": "#a1887f",
-            "400": "#8d6e63",
-            "500": "#795548",
-            "600": "#6d4c41",
-            "700": "#5d4037",
-            "800": "#4e342e",
-            "900": "#3e2723"
-        },
-        "grey": {
-            "50": "#fafafa",
-            "100": "#f5f5f5",
-            "200": "#eeeeee",
-            "300": "#e0e0e0",
-            "400": "#bdbdbd",
-            "500": "#9e9e9e",
-            "600": "#757575",
-            "700": "#616161",
-            "800": "#424242",
-            "900": "#212121"
-        },
-        "bluegrey": {
-            "50": "#eceff1",
-            "100": "#cfd8dc",
-            "200": "#b0bec5",
-            "300": "#90a4ae",
-            "400": "#78909c",
-            "500": "#607d8b",
-            "600": "#546e7a",
-            "700": "#455a64",
-            "800": "#37474f",
-            "900": "#263238"
-        }
+    return get_material_design_palette().to_dict()
+
+
+class MaterialDesignPalette:
+    """
+    Immutable table with the hex codes of Material Design. Rows are colour names and columns are colour codes; shades
+    that a colour does not have (e.g. brown has no accent codes) are stored as empty strings and never returned.
+    Every row and column is resolved once when the table is built, so all lookups are dictionary hits.
+    """
+    __slots__ = ('colour_names', 'colour_codes', 'table', '_name_index', '_code_index', '_shades', '_colours')
+
+    def __init__(self, colours: dict):
+        import numpy as np
+
+        colour_names = tuple(colours)
+        colour_codes = tuple(max((tuple(shades) for shades in colours.values()), key=len))
+
+        table = np.array([[colours[name].get(code, '') for code in colour_codes] for name in colour_names])
+        table.flags.writeable = False
+
+        set_slot = super().__setattr__
+        set_slot('colour_names', colour_names)
+        set_slot('colour_codes', colour_codes)
+        set_slot('table', table)
+        set_slot('_name_index', {name: i for i, name in enumerate(colour_names)})
+        set_slot('_code_index', {code: j for j, code in enumerate(colour_codes)})
+        set_slot('_shades', {name: tuple(str(hex_code) for hex_code in table[i] if hex_code)
+                             for i, name in enumerate(colour_names)})
+        set_slot('_colours', {code: tuple(str(hex_code) for hex_code in table[:, j] if hex_code)
+                              for j, code in enumerate(colour_codes)})
+
+    def __setattr__(self, name, value):
+        raise AttributeError('{} is immutable'.format(type(self).__name__))
+
+    def hex_code(self, colour_name: str, colour_code: str) -> str:
+        """
+        :param colour_name: name of MD colour (e.g. red)
+        :param colour_code: the number of the gradient colour (e.g. 500)
+        :return: hex code of the shade, raises KeyError if the colour or the code do not exist
+        """
+        hex_code = self.table[self._name_index[colour_name], self._code_index[colour_code]]
+        if not hex_code:
+            raise KeyError(colour_code)
+        return str(hex_code)
+
+    def shades(self, colour_name: str) -> tuple:
+        """
+        :param colour_name: name of MD colour (e.g. red)
+        :return: all hex codes of one colour, from the lightest to the accent shades
+        """
+        return self._shades[colour_name]
+
+    def colours(self, colour_code: str) -> tuple:
+        """
+        :param colour_code: the number of the gradient colour (e.g. 500)
+        :return: hex codes of every colour that has the given colour code
+        """
+        return self._colours[colour_code]
+
+    def to_dict(self) -> dict:
+        """
+        :return: new nested dictionary with colour names, colour codes and hex codes
+        """
+        return {name: {code: str(self.table[i, j]) for j, code in enumerate(self.colour_codes) if self.table[i, j]}
+                for i, name in enumerate(self.colour_names)}
+
+
+@lru_cache(maxsize=None)
+def get_material_design_palette() -> MaterialDesignPalette:
+    """
+    Builds the Material Design palette the first time it is needed and returns the same table afterwards.
+    :return: immutable palette with all colours, code numbers and HEX codes of Material Design
+    """
+    return MaterialDesignPalette(_MATERIAL_DESIGN_COLOURS)
+
+
+_MATERIAL_DESIGN_COLOURS = {
+    "red": {
+        "50": "#ffebee",
+        "100": "#ffcdd2",
+        "200": "#ef9a9a",
+        "300": "#e57373",
+        "400": "#ef5350",
+        "500": "#f44336",
+        "600": "#e53935",
+        "700": "#d32f2f",
+        "800": "#c62828",
+        "900": "#b71c1c",
+        "a100": "#ff8a80",
+        "a200": "#ff5252",
+        "a400": "#ff1744",
+        "a700": "#d50000"
+    },
+    "pink": {
+        "50": "#fce4ec",
+        "100": "#f8bbd0",
+        "200": "#f48fb1",
+        "300": "#f06292",
+        "400": "#ec407a",
+        "500": "#e91e63",
+        "600": "#d81b60",
+        "700": "#c2185b",
+        "800": "#ad1457",
+        "900": "#880e4f",
+        "a100": "#ff80ab",
+        "a200": "#ff4081",
+        "a400": "#f50057",
+        "a700": "#c51162"
+    },
+    "purple": {
+        "50": "#f3e5f5",
+        "100": "#e1bee7",
+        "200": "#ce93d8",
+        "300": "#ba68c8",
+        "400": "#ab47bc",
+        "500": "#9c27b0",
+        "600": "#8e24aa",
+        "700": "#7b1fa2",
+        "800": "#6a1b9a",
+        "900": "#4a148c",
+        "a100": "#ea80fc",
+        "a200": "#e040fb",
+        "a400": "#d500f9",
+        "a700": "#aa00ff"
+    },
+    "deeppurple": {
+        "50": "#ede7f6",
+        "100": "#d1c4e9",
+        "200": "#b39ddb",
+        "300": "#9575cd",
+        "400": "#7e57c2",
+        "500": "#673ab7",
+        "600": "#5e35b1",
+        "700": "#512da8",
+        "800": "#4527a0",
+        "900": "#311b92",
+        "a100": "#b388ff",
+        "a200": "#7c4dff",
+        "a400": "#651fff",
+        "a700": "#6200ea"
+    },
+    "indigo": {
+        "50": "#e8eaf6",
+        "100": "#c5cae9",
+        "200": "#9fa8da",
+        "300": "#7986cb",
+        "400": "#5c6bc0",
+        "500": "#3f51b5",
+        "600": "#3949ab",
+        "700": "#303f9f",
+        "800": "#283593",
+        "900": "#1a237e",
+        "a100": "#8c9eff",
+        "a200": "#536dfe",
+        "a400": "#3d5afe",
+        "a700": "#304ffe"
+    },
+    "blue": {
+        "50": "#e3f2fd",
+        "100": "#bbdefb",
+        "200": "#90caf9",
+        "300": "#64b5f6",
+        "400": "#42a5f5",
+        "500": "#2196f3",
+        "600": "#1e88e5",
+        "700": "#1976d2",
+        "800": "#1565c0",
+        "900": "#0d47a1",
+        "a100": "#82b1ff",
+        "a200": "#448aff",
+        "a400": "#2979ff",
+        "a700": "#2962ff"
+    },
+    "lightblue": {
+        "50": "#e1f5fe",
+        "100": "#b3e5fc",
+        "200": "#81d4fa",
+        "300": "#4fc3f7",
+        "400": "#29b6f6",
+        "500": "#03a9f4",
+        "600": "#039be5",
+        "700": "#0288d1",
+        "800": "#0277bd",
+        "900": "#01579b",
+        "a100": "#80d8ff",
+        "a200": "#40c4ff",
+        "a400": "#00b0ff",
+        "a700": "#0091ea"
+    },
+    "cyan": {
+        "50": "#e0f7fa",
+        "100": "#b2ebf2",
+        "200": "#80deea",
+        "300": "#4dd0e1",
+        "400": "#26c6da",
+        "500": "#00bcd4",
+        "600": "#00acc1",
+        "700": "#0097a7",
+        "800": "#00838f",
+        "900": "#006064",
+        "a100": "#84ffff",
+        "a200": "#18ffff",
+        "a400": "#00e5ff",
+        "a700": "#00b8d4"
+    },
+    "teal": {
+        "50": "#e0f2f1",
+        "100": "#b2dfdb",
+        "200": "#80cbc4",
+        "300": "#4db6ac",
+        "400": "#26a69a",
+        "500": "#009688",
+        "600": "#00897b",
+        "700": "#00796b",
+        "800": "#00695c",
+        "900": "#004d40",
+        "a100": "#a7ffeb",
+        "a200": "#64ffda",
+        "a400": "#1de9b6",
+        "a700": "#00bfa5"
+    },
+    "green": {
+        "50": "#e8f5e9",
+        "100": "#c8e6c9",
+        "200": "#a5d6a7",
+        "300": "#81c784",
+        "400": "#66bb6a",
+        "500": "#4caf50",
+        "600": "#43a047",
+        "700": "#388e3c",
+        "800": "#2e7d32",
+        "900": "#1b5e20",
+        "a100": "#b9f6ca",
+        "a200": "#69f0ae",
+        "a400": "#00e676",
+        "a700": "#00c853"
+    },
+    "lightgreen": {
+        "50": "#f1f8e9",
+        "100": "#dcedc8",
+        "200": "#c5e1a5",
+        "300": "#aed581",
+        "400": "#9ccc65",
+        "500": "#8bc34a",
+        "600": "#7cb342",
+        "700": "#689f38",
+        "800": "#558b2f",
+        "900": "#33691e",
+        "a100": "#ccff90",
+        "a200": "#b2ff59",
+        "a400": "#76ff03",
+        "a700": "#64dd17"
+    },
+    "lime": {
+        "50": "#f9fbe7",
+        "100": "#f0f4c3",
+        "200": "#e6ee9c",
+        "300": "#dce775",
+        "400": "#d4e157",
+        "500": "#cddc39",
+        "600": "#c0ca33",
+        "700": "#afb42b",
+        "800": "#9e9d24",
+        "900": "#827717",
+        "a100": "#f4ff81",
+        "a200": "#eeff41",
+        "a400": "#c6ff00",
+        "a700": "#aeea00"
+    },
+    "yellow": {
+        "50": "#fffde7",
+        "100": "#fff9c4",
+        "200": "#fff59d",
+        "300": "#fff176",
+        "400": "#ffee58",
+        "500": "#ffeb3b",
+        "600": "#fdd835",
+        "700": "#fbc02d",
+        "800": "#f9a825",
+        "900": "#f57f17",
+        "a100": "#ffff8d",
+        "a200": "#ffff00",
+        "a400": "#ffea00",
+        "a700": "#ffd600"
+    },
+    "amber": {
+        "50": "#fff8e1",
+        "100": "#ffecb3",
+        "200": "#ffe082",
+        "300": "#ffd54f",
+        "400": "#ffca28",
+        "500": "#ffc107",
+        "600": "#ffb300",
+        "700": "#ffa000",
+        "800": "#ff8f00",
+        "900": "#ff6f00",
+        "a100": "#ffe57f",
+        "a200": "#ffd740",
+        "a400": "#ffc400",
+        "a700": "#ffab00"
+    },
+    "orange": {
+        "50": "#fff3e0",
+        "100": "#ffe0b2",
+        "200": "#ffcc80",
+        "300": "#ffb74d",
+        "400": "#ffa726",
+        "500": "#ff9800",
+        "600": "#fb8c00",
+        "700": "#f57c00",
+        "800": "#ef6c00",
+        "900": "#e65100",
+        "a100": "#ffd180",
+        "a200": "#ffab40",
+        "a400": "#ff9100",
+        "a700": "#ff6d00"
+    },
+    "deeporange": {
+        "50": "#fbe9e7",
+        "100": "#ffccbc",
+        "200": "#ffab91",
+        "300": "#ff8a65",
+        "400": "#ff7043",
+        "500": "#ff5722",
+        "600": "#f4511e",
+        "700": "#e64a19",
+        "800": "#d84315",
+        "900": "#bf360c",
+        "a100": "#ff9e80",
+        "a200": "#ff6e40",
+        "a400": "#ff3d00",
+        "a700": "#dd2c00"
+    },
+    "brown": {
+        "50": "#efebe9",
+        "100": "#d7ccc8",
+        "200": "#bcaaa4",
+        "300": "#a1887f",
+        "400": "#8d6e63",
+        "500": "#795548",
+        "600": "#6d4c41",
+        "700": "#5d4037",
+        "800": "#4e342e",
+        "900": "#3e2723"
+    },
+    "grey": {
+        "50": "#fafafa",
+        "100": "#f5f5f5",
+        "200": "#eeeeee",
+        "300": "#e0e0e0",
+        "400": "#bdbdbd",
+        "500": "#9e9e9e",
+        "600": "#757575",
+        "700": "#616161",
+        "800": "#424242",
+        "900": "#212121"
+    },
+    "bluegrey": {
+        "50": "#eceff1",
+        "100": "#cfd8dc",
+        "200": "#b0bec5",
+        "300": "#90a4ae",
+        "400": "#78909c",
+        "500": "#607d8b",
+        "600": "#546e7a",
+        "700": "#455a64",
+        "800": "#37474f",
+        "900": "#263238"
     }
+}
@@ -0,0 +1,117 @@
+"""
+Where the time of the plot functions goes: each call is split into named stages (prepare data, colours, figure, source,
+glyphs, tooltips, legend, axis), which are timed only while a profile is collecting them:
+
+    with profile_stages() as profile:
+        p = plot_multiple_lines(df, title='Sales', x_axis='date', y_axis='sales', category_column='store')
+    for row in profile.summary():
+        print(row)
+    profile.write_jsonl('stages.jsonl')
+    pstats.Stats(profile).sort_stats('cumulative').print_stats()
+    profile.dump_stats('stages.prof')  # e.g. for snakeviz
+
+Stages of a call follow each other, so their times add up to the time of the call (minus the imports at its start).
+Plot functions called by another one (format_axis, format_grid) are nested in the stage that called them.
+"""
+import json
+import pstats
+import threading
+from contextlib import contextmanager
+
+from plot_functions import StageRecord, add_stage_callback, remove_stage_callback
+
+# File name of the entries of create_stats, shown by pstats as plot_functions:0(function/stage)
+_STATS_FILE = 'plot_functions'
+
+
+class StageProfile:
+    """
+    Collects the StageRecords of the plot functions called while it is added as a stage callback (see profile_stages),
+    from any thread.
+    """
+
+    def __init__(self):
+        self.records = []
+        self._lock = threading.Lock()
+
+    def __call__(self, record: StageRecord):
+        with self._lock:
+            self.records.append(record)
+
+    def summary(self) -> list:
+        """
+        :return: one dictionary per function (stage None) and stage, with its number of calls and total, mean and
+        maximum seconds, the slowest first
+        """
+        rows = {}
+        for record in self.records:
+            row = rows.setdefault((record.function, record.stage), dict(
+                function=record.function, stage=record.stage, calls=0, seconds=0.0, max_seconds=0.0))
+            row['calls'] += 1
+            row['seconds'] += record.seconds
+            row['max_seconds'] = max(row['max_seconds'], record.seconds)
+        for row in rows.values():
+            row['mean_seconds'] = row['seconds'] / row['calls']
+        return sorted(rows.values(), key=lambda row: row['seconds'], reverse=True)
+
+    def write_jsonl(self, path: str):
+        """
+        Writes one JSON object per record, with the fields of StageRecord.
+        :param path: path of the file, which is replaced
+        """
+        with open(path, 'w') as records_file:
+            for record in self.records:
+                records_file.write(json.dumps(record._asdict()) + '\n')
+
+    def create_stats(self):
+        """
+        Fills self.stats in the format of cProfile, so that pstats.Stats(profile) can sort, print and dump the stages:
+        each call of a function and each stage is an entry, whose caller is the function (for a stage) or the stage of
+        the plot function that called it. Own time is the time not spent in nested entries.
+        """
+        entries = {}
+        nested_seconds = {}
+        for record in self.records:
+            name = record.function if record.stage is None else '{}/{}'.format(record.function, record.stage)
+            caller = record.parent if record.stage is None else record.function
+            entry = entries.setdefault(name, dict(calls=0, seconds=0.0, callers={}))
+            entry['calls'] += 1
+            entry['seconds'] += record.seconds
+            if caller is not None:
+                calls, seconds = entry['callers'].get(caller, (0, 0.0))
+                entry['callers'][caller] = (calls + 1, seconds + record.seconds)
+                nested_seconds[caller] = nested_seconds.get(caller, 0.0) + record.seconds
+
+        self.stats = {}
+        for name, entry in entries.items():
+            own_seconds = max(entry['seconds'] - nested_seconds.get(name, 0.0), 0.0)
+            own_share = own_seconds / entry['seconds'] if entry['seconds'] else 0.0
+            callers = {(_STATS_FILE, 0, caller): (calls, calls, seconds * own_share, seconds)
+                       for caller, (calls, seconds) in entry['callers'].items()}
+            self.stats[(_STATS_FILE, 0, name)] = (entry['calls'], entry['calls'], own_seconds, entry['seconds'],
+                                                  callers)
+
+    def dump_stats(self, path: str):
+        """
+        Writes the stages in the binary format of cProfile, readable by pstats and profile viewers.
+        :param path: path of the file
+        """
+        pstats.Stats(self).dump_stats(path)
+
+
+@contextmanager
+def profile_stages(callback=None):
+    """
+    Collects the stages of the plot functions called inside the block, in any thread.
+    :param callback: function also called with each StageRecord as soon as its stage ends (e.g. to log slow stages)
+    :return: StageProfile with the records
+    """
+    profile = StageProfile()
+    callbacks = [profile] if callback is None else [profile, callback]
+    for stage_callback in callbacks:
+        add_stage_callback(stage_callback)
+    try:
+        yield profile
+    finally:
+        for stage_callback in callbacks:
+            remove_stage_callback(stage_callback)
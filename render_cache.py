@@ -0,0 +1,267 @@
+"""
+Cache of serialized charts, keyed by the content of the columns a chart uses and by its parameters.
+
+Dashboards that draw the same chart from the same data many times a day get the JSON item (for `Bokeh.embed.embed_item`)
+or the standalone HTML from memory instead of building and serializing the figure again:
+
+    cache = RenderCache(max_bytes=64 * 2 ** 20, cache_dir='/tmp/chart_cache')
+    item = cache.render(plot_single_line, df, x_axis='date', y_axis='sales', title='Total sales')
+    print(cache.stats)
+"""
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+import sys
+import threading
+from collections import OrderedDict, namedtuple
+from functools import lru_cache
+
+from plot_functions import _column_arrays, _column_names, _fingerprint
+
+CacheStats = namedtuple('CacheStats', ['hits', 'disk_hits', 'misses', 'evictions', 'items', 'bytes'])
+
+OUTPUT_FORMATS = ('json', 'html')
+
+# Parameters of each plot function that name the columns it reads
+COLUMN_PARAMETERS = {
+    'plot_single_line': ('x_axis', 'y_axis'),
+    'plot_multiple_lines': ('x_axis', 'y_axis', 'category_column'),
+    'plot_multiple_bar_chart': ('x_axis', 'y_axis', 'x_axis_categories'),
+    'plot_dual_axis_dual_bar_line': ('groups_name', 'bar_value_name', 'bar_variable_name', 'line_variable_name'),
+    'plot_table': ('columns',),
+}
+
+# Parameters that change how a chart is computed but not the chart itself, left out of the cache key
+IGNORED_PARAMETERS = ('rollup_cache',)
+
+# Part of every cache key, together with the source of the module of the plot function: raise it when charts change
+# through code that is not in that module, so that charts cached before are not served again
+CACHE_VERSION = 1
+
+
+class RenderCache:
+    """
+    Size-bounded LRU of serialized charts in memory, with an optional directory as a second tier that is shared
+    between processes and survives restarts.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 2 ** 20, cache_dir: str = None):
+        """
+        :param max_bytes: maximum size of the charts kept in memory, in bytes of UTF-8 (default: 64 MB)
+        :param cache_dir: directory for the on-disk tier, created if it does not exist (default: memory only)
+        """
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+        self._items = OrderedDict()
+        self._sizes = {}
+        self._bytes = 0
+        self._counts = dict(hits=0, disk_hits=0, misses=0, evictions=0)
+        self._lock = threading.Lock()
+
+    @property
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(items=len(self._items), bytes=self._bytes, **self._counts)
+
+    def clear(self):
+        """ Empties the memory tier and resets the statistics; files in cache_dir are kept """
+        with self._lock:
+            self._items.clear()
+            self._sizes.clear()
+            self._bytes = 0
+            self._counts = dict.fromkeys(self._counts, 0)
+
+    def render(self, plot_function, df, *args, output: str = 'json', **kwargs) -> str:
+        """
+        Returns the serialized chart of plot_function(df, *args, **kwargs), building it only if it is not cached.
+        :param plot_function: one of the plot functions in plot_functions.py
+        :param df: dataframe passed to the plot function
+        :param output: json (json_item of the chart, as a string) or html (standalone page)
+        :return: serialized chart
+        """
+        key = self.key(plot_function, df, *args, output=output, **kwargs)
+
+        serialized = self._get(key, output)
+        if serialized is not None:
+            return serialized
+
+        title = _parameters(plot_function, df, *args, **kwargs).get('title') or ''
+        serialized = _serialize(plot_function(df, *args, **kwargs), output, title)
+        with self._lock:
+            self._counts['misses'] += 1
+        self._put(key, serialized)
+        self._write(key, output, serialized)
+        return serialized
+
+    def wrap(self, plot_function, output: str = 'json'):
+        """
+        :param plot_function: one of the plot functions in plot_functions.py
+        :param output: json or html
+        :return: function with the same parameters as plot_function that returns the cached serialized chart
+        """
+        def cached_plot_function(df, *args, **kwargs):
+            return self.render(plot_function, df, *args, output=output, **kwargs)
+
+        cached_plot_function.__name__ = 'cached_' + plot_function.__name__
+        cached_plot_function.__doc__ = plot_function.__doc__
+        return cached_plot_function
+
+    @staticmethod
+    def key(plot_function, df, *args, output: str = 'json', **kwargs) -> str:
+        """
+        Fingerprints the columns that plot_function reads from df (not the whole frame) together with the normalized
+        parameters: defaults are filled in, and arrays, series and dataframes passed as parameters are keyed by their
+        content. Other parameters that are not JSON values raise ValueError, as they cannot be keyed in the same way
+        in every process. The key also covers the Bokeh version, the source of the module of plot_function and
+        CACHE_VERSION, so that charts cached by another version of the code are not served.
+        :return: cache key as a hex digest
+        """
+        import bokeh
+
+        if output not in OUTPUT_FORMATS:
+            raise ValueError('{} is not an output format. Select one of: {}'.format(output, ', '.join(OUTPUT_FORMATS)))
+        if kwargs.get('source_registry') is not None:
+            raise ValueError('Charts with a source_registry belong to a document and cannot be cached on their own')
+
+        name = plot_function.__name__
+        parameters = _parameters(plot_function, df, *args, **kwargs)
+        for parameter in IGNORED_PARAMETERS:
+            parameters.pop(parameter, None)
+
+        columns = []
+        for parameter in COLUMN_PARAMETERS.get(name, ()):
+            value = parameters.get(parameter)
+            if value is None:
+                columns.extend(_column_names(df))
+            elif isinstance(value, str):
+                columns.append(value)
+            else:
+                columns.extend(value)
+
+        fingerprints = {str(column): _fingerprint(values) for column, values in _column_arrays(df, columns).items()}
+
+        description = json.dumps(
+            dict(function=name, output=output, bokeh=bokeh.__version__, columns=fingerprints, parameters=parameters,
+                 code=_source_digest(plot_function.__module__), version=CACHE_VERSION),
+            sort_keys=True,
+            default=_parameter_content
+        )
+        return hashlib.sha1(description.encode()).hexdigest()
+
+    def _get(self, key: str, output: str):
+        with self._lock:
+            serialized = self._items.get(key)
+            if serialized is not None:
+                self._items.move_to_end(key)
+                self._counts['hits'] += 1
+                return serialized
+
+        serialized = self._read(key, output)
+        if serialized is not None:
+            with self._lock:
+                self._counts['disk_hits'] += 1
+            self._put(key, serialized)
+        return serialized
+
+    def _put(self, key: str, serialized: str):
+        size = len(serialized.encode('utf-8'))
+        with self._lock:
+            if key in self._items:
+                return
+            self._items[key] = serialized
+            self._sizes[key] = size
+            self._bytes += size
+            while self._bytes > self.max_bytes and len(self._items) > 1:
+                evicted, _ = self._items.popitem(last=False)
+                self._bytes -= self._sizes.pop(evicted)
+                self._counts['evictions'] += 1
+
+    def _path(self, key: str, output: str) -> str:
+        return os.path.join(self.cache_dir, '{}.{}'.format(key, output))
+
+    def _read(self, key: str, output: str):
+        if self.cache_dir is None:
+            return None
+        try:
+            with open(self._path(key, output), encoding='utf-8') as cached_file:
+                return cached_file.read()
+        except FileNotFoundError:
+            return None
+
+    def _write(self, key: str, output: str, serialized: str):
+        if self.cache_dir is None:
+            return
+        descriptor, temporary_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        with os.fdopen(descriptor, 'w', encoding='utf-8') as cached_file:
+            cached_file.write(serialized)
+        os.replace(temporary_path, self._path(key, output))
+
+
+def _parameters(plot_function, df, *args, **kwargs) -> dict:
+    """
+    :return: parameters of the call plot_function(df, *args, **kwargs) by name, with defaults filled in and the extra
+    keyword arguments merged in, without df
+    """
+    bound = inspect.signature(plot_function).bind(df, *args, **kwargs)
+    bound.apply_defaults()
+    parameters = dict(bound.arguments)
+    parameters.pop('df')
+    parameters.update(parameters.pop('kwargs', {}))
+    return parameters
+
+
+@lru_cache(maxsize=None)
+def _source_digest(module_name: str) -> str:
+    """
+    :param module_name: name of a loaded module
+    :return: hash of the source file of the module, or an empty string if it has none
+    """
+    try:
+        source = inspect.getsource(sys.modules[module_name])
+    except (KeyError, OSError, TypeError):
+        return ''
+    return hashlib.sha1(source.encode('utf-8')).hexdigest()
+
+
+def _parameter_content(value):
+    """
+    Stands for a parameter that is not a JSON value in the description of a cache key.
+    :param value: parameter of a plot function
+    :return: fingerprint of the content of arrays, series and dataframes, the value of NumPy scalars, ISO format of
+    dates
+    """
+    import numpy as np
+    import pandas as pd
+
+    if isinstance(value, pd.DataFrame):
+        return dict(frame={str(column): _fingerprint(values)
+                           for column, values in _column_arrays(value, _column_names(value)).items()})
+    if isinstance(value, (np.ndarray, pd.Series, pd.Index)):
+        return dict(array=_fingerprint(np.asarray(value)))
+    if isinstance(value, np.generic):
+        return dict(scalar=str(value), dtype=str(value.dtype))
+    if hasattr(value, 'isoformat'):
+        return dict(date=value.isoformat())
+    raise ValueError('{} parameters cannot be cached, pass JSON values, arrays or dataframes'.format(
+        type(value).__name__))
+
+
+def _serialize(model, output: str, title: str) -> str:
+    """
+    :param model: Bokeh figure or layout
+    :param output: json or html
+    :param title: title of the HTML page
+    :return: serialized model
+    """
+    if output == 'html':
+        from bokeh.embed import file_html
+        from bokeh.resources import CDN
+        return file_html(model, CDN, title)
+
+    from bokeh.embed import json_item
+    return json.dumps(json_item(model))
@@ -0,0 +1,388 @@
+"""
+Reports described in a YAML or JSON spec instead of a script: the frames they use (datasets of data_loading and the
+frames derived from them) and the headers, charts and tables of the page, from top to bottom:
+
+    title: Sales by store
+    frames:
+      stores:
+        dataset: daily_sales_by_store
+        steps:
+          - query: store < 6
+      weekly:
+        from: stores
+        steps:
+          - rollup: {date_column: date, value_column: sales, resolution: week, by: store}
+    layout:
+      - header: Weekly sales
+      - chart: plot_multiple_lines
+        data: weekly
+        options: {title: Total sales, x_axis: date, y_axis: sales, category_column: store}
+      - header: Data used in graph
+        text: Scrollable table
+      - chart: plot_table
+        data: stores
+
+compile_report turns a spec into a ReportPlan. Each dataset is read once whatever the number of frames read from it
+and frames with the same definition are derived once. Frames and charts are built in a pool of threads, and the charts
+of a report share their data sources as the charts of one document. Frames are kept by their definition in a store
+that can be shared by the reports of a run, so that hundreds of pages read and derive each frame once:
+
+    python reports.py report_plot/*.yaml --output-dir reports --jobs 4
+"""
+import argparse
+import glob
+import hashlib
+import html
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from data_loading import DATASETS, read_cached
+from plot_functions import (SourceRegistry, plot_dual_axis_dual_bar_line, plot_multiple_bar_chart,
+                            plot_multiple_lines, plot_single_line, plot_table)
+
+# Plot functions a chart of a spec can use, by name
+CHART_FUNCTIONS = {
+    'plot_single_line': plot_single_line,
+    'plot_multiple_lines': plot_multiple_lines,
+    'plot_multiple_bar_chart': plot_multiple_bar_chart,
+    'plot_dual_axis_dual_bar_line': plot_dual_axis_dual_bar_line,
+    'plot_table': plot_table,
+}
+
+REPORT_KEYS = ('title', 'output_file', 'frames', 'layout', 'share_sources')
+FRAME_KEYS = ('dataset', 'columns', 'dtypes', 'parse_dates', 'from', 'steps')
+
+_HEADER_TEMPLATE = "<h2 style='margin-block-end:0'> {} </h2>"
+_TEXT_TEMPLATE = "<span style='color: #616161'><i>{}</i></span>"
+
+
+def _query(df, expression: str):
+    return df.query(expression)
+
+
+def _rename(df, columns: dict):
+    return df.rename(columns=columns)
+
+
+def _select(df, columns: list):
+    return df[list(columns)]
+
+
+def _sort(df, by):
+    return df.sort_values(by=by, kind='mergesort')
+
+
+def _melt(df, arguments: dict):
+    return df.melt(**arguments)
+
+
+def _pivot(df, arguments: dict):
+    """ Wide frame with one column per value of arguments['columns'], named by its text, and the index as a column """
+    wide = df.pivot(**arguments)
+    wide.columns = [str(column) for column in wide.columns]
+    return wide.reset_index()
+
+
+def _rollup(df, arguments: dict):
+    from rollups import rollup
+
+    return rollup(df, **arguments)
+
+
+# Operations of the steps of a derived frame, each one called with the frame and the value of its step
+STEPS = {
+    'query': _query,
+    'rename': _rename,
+    'select': _select,
+    'sort': _sort,
+    'melt': _melt,
+    'pivot': _pivot,
+    'rollup': _rollup,
+}
+
+
+class ReportPlan:
+    """
+    Compiled report: the frames to read and derive, the charts and their layout. Frames are grouped in levels, each
+    level only depends on the previous ones. Created by compile_report.
+    """
+
+    def __init__(self, title: str, output_file: str, levels: list, charts: list, layout: list,
+                 share_sources: bool = True):
+        """
+        :param title: title of the page
+        :param output_file: name of the HTML page
+        :param levels: lists of frames, as dictionaries with their key, names, and either the dataset and read arguments
+        or the key of their parent frame and their steps
+        :param charts: charts as dictionaries with the name of their plot function, the key of their frame and options
+        :param layout: items of the page: ('header', header, text), ('chart', index in charts) or ('row', items)
+        :param share_sources: pass one SourceRegistry to every chart
+        """
+        self.title = title
+        self.output_file = output_file
+        self.levels = levels
+        self.charts = charts
+        self.layout = layout
+        self.share_sources = share_sources
+
+    def describe(self) -> list:
+        """ :return: one line of text per dataset read, frame derived and chart built, in the order of the plan """
+        frames = [frame for level in self.levels for frame in level]
+        labels = {frame['key']: ', '.join(frame['names']) or frame['dataset'] or frame['key'][:8] for frame in frames}
+        lines = []
+        for frame in frames:
+            if frame['parent'] is None:
+                lines.append('read {} from {}'.format(labels[frame['key']], frame['dataset']))
+            else:
+                steps = ', '.join(operation for step in frame['steps'] for operation in step)
+                lines.append('derive {} from {}: {}'.format(labels[frame['key']], labels[frame['parent']], steps))
+        for chart in self.charts:
+            lines.append('build {} from {}'.format(chart['function'], labels[chart['frame']]))
+        return lines
+
+    def run(self, store: dict = None, jobs: int = None):
+        """
+        Reads and derives the frames missing from store, builds the charts and lays them out.
+        :param store: frames already computed, by key; the new frames are added to it (default: a new dictionary)
+        :param jobs: number of threads (default: the default of ThreadPoolExecutor)
+        :return: Bokeh layout of the report
+        """
+        from bokeh.layouts import Column, layout
+
+        store = {} if store is None else store
+        sources = SourceRegistry() if self.share_sources else None
+
+        def compute(frame):
+            if frame['parent'] is None:
+                return read_cached(frame['dataset'], **frame['read'])
+            df = store[frame['parent']]
+            for step in frame['steps']:
+                (operation, argument), = step.items()
+                df = STEPS[operation](df, argument)
+            return df
+
+        def build(chart):
+            options = dict(chart['options'])
+            if sources is not None:
+                options['source_registry'] = sources
+            return CHART_FUNCTIONS[chart['function']](store[chart['frame']], **options)
+
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            # frames of a level only read frames of the previous levels
+            for level in self.levels:
+                missing = [frame for frame in level if frame['key'] not in store]
+                for frame, df in zip(missing, executor.map(compute, missing)):
+                    store[frame['key']] = df
+            figures = list(executor.map(build, self.charts))
+
+        return layout(Column(*[_layout_item(item, figures) for item in self.layout]))
+
+    def render(self, store: dict = None, jobs: int = None) -> str:
+        """
+        Same as run, as a standalone HTML page that loads BokehJS from the CDN.
+        :return: HTML of the page
+        """
+        from bokeh.embed import file_html
+        from bokeh.resources import CDN
+
+        return file_html(self.run(store, jobs), CDN, self.title)
+
+
+def _layout_item(item: tuple, figures: list):
+    from bokeh.layouts import Row
+    from bokeh.models.widgets import Div
+
+    if item[0] == 'chart':
+        return figures[item[1]]
+    if item[0] == 'row':
+        return Row(*[_layout_item(child, figures) for child in item[1]])
+    _, header, text = item
+    parts = [_HEADER_TEMPLATE.format(html.escape(header))] if header else []
+    if text:
+        parts.append(_TEXT_TEMPLATE.format(html.escape(text)))
+    return Div(text='\n'.join(parts))
+
+
+def load_spec(path: str) -> dict:
+    """
+    :param path: path of a JSON file, or of a YAML file (.yaml or .yml, needs PyYAML)
+    :return: spec of the report
+    """
+    with open(path, encoding='utf-8') as spec_file:
+        if os.path.splitext(path)[1].lower() not in ('.yaml', '.yml'):
+            return json.load(spec_file)
+        try:
+            import yaml
+        except ImportError:
+            raise ImportError('PyYAML is needed to read {}, or write the spec in JSON'.format(path))
+        return yaml.safe_load(spec_file)
+
+
+def compile_report(spec: dict, base_dir: str = None) -> ReportPlan:
+    """
+    Checks a spec and plans its work: frames used by no chart are left out, and frames with the same definition
+    (same dataset and read arguments, or same parent and steps) become one frame whatever their names.
+    :param spec: spec of the report, as read by load_spec
+    :param base_dir: folder of the CSV files given by a relative path (default: the working directory)
+    :return: ReportPlan of the report
+    """
+    unknown = [key for key in spec if key not in REPORT_KEYS]
+    if unknown:
+        raise ValueError('{} are not keys of a report. Select from: {}'.format(
+            ', '.join(unknown), ', '.join(REPORT_KEYS)))
+
+    frame_specs = spec.get('frames') or {}
+    frames = {}
+    frame_keys = {}
+
+    def resolve(name: str, path: tuple) -> str:
+        """ :return: key of the frame called name, after adding it and the frames it depends on to frames """
+        if name in frame_keys:
+            return frame_keys[name]
+        if name in path:
+            raise ValueError('Frames depend on each other: {}'.format(' -> '.join(path + (name,))))
+        if name not in frame_specs:
+            raise ValueError('{} is not a frame of the report. Select one of: {}'.format(
+                name, ', '.join(frame_specs)))
+
+        frame_spec = frame_specs[name] or {}
+        unknown = [key for key in frame_spec if key not in FRAME_KEYS]
+        if unknown or ('dataset' in frame_spec) == ('from' in frame_spec):
+            raise ValueError('Frame {} must have either a dataset or from, and keys from: {}'.format(
+                name, ', '.join(FRAME_KEYS)))
+
+        if 'dataset' in frame_spec:
+            dataset = frame_spec['dataset']
+            if dataset not in DATASETS and base_dir is not None and not os.path.isabs(dataset):
+                dataset = os.path.join(base_dir, dataset)
+            read = {argument: frame_spec[argument] for argument in ('columns', 'dtypes', 'parse_dates')
+                    if frame_spec.get(argument) is not None}
+            key = _frame_key('read', dataset, read)
+            frames.setdefault(key, dict(key=key, names=[], depth=0, dataset=dataset, read=read, parent=None, steps=[]))
+        else:
+            if any(argument in frame_spec for argument in ('columns', 'dtypes', 'parse_dates')):
+                raise ValueError('Frame {} is derived from {}, select its columns with a step'.format(
+                    name, frame_spec['from']))
+            key = resolve(frame_spec['from'], path + (name,))
+
+        steps = frame_spec.get('steps') or []
+        for step in steps:
+            if not isinstance(step, dict) or len(step) != 1 or next(iter(step)) not in STEPS:
+                raise ValueError('Steps of frame {} must each have one operation from: {}'.format(
+                    name, ', '.join(STEPS)))
+        if steps:
+            parent, key = key, _frame_key('derive', key, steps)
+            frames.setdefault(key, dict(key=key, names=[], depth=frames[parent]['depth'] + 1, dataset=None, read=None,
+                                        parent=parent, steps=steps))
+        frames[key]['names'].append(name)
+        frame_keys[name] = key
+        return key
+
+    for name in frame_specs:
+        resolve(name, ())
+
+    charts = []
+
+    def compile_item(item) -> tuple:
+        if not isinstance(item, dict):
+            raise ValueError('Items of the layout must be dictionaries with a header, chart or row')
+        if 'row' in item:
+            return 'row', [compile_item(child) for child in item['row']]
+        if 'chart' in item:
+            if item['chart'] not in CHART_FUNCTIONS:
+                raise ValueError('{} is not a chart function. Select one of: {}'.format(
+                    item['chart'], ', '.join(CHART_FUNCTIONS)))
+            options = item.get('options') or {}
+            if 'df' in options or 'source_registry' in options:
+                raise ValueError('df and source_registry of {} are set by the report'.format(item['chart']))
+            charts.append(dict(function=item['chart'], frame=resolve(item.get('data'), ()), options=options))
+            return 'chart', len(charts) - 1
+        if 'header' in item or 'text' in item:
+            return 'header', item.get('header'), item.get('text')
+        raise ValueError('Items of the layout must be dictionaries with a header, chart or row')
+
+    items = [compile_item(item) for item in spec.get('layout') or []]
+
+    used = set()
+    for chart in charts:
+        key = chart['frame']
+        while key is not None and key not in used:
+            used.add(key)
+            key = frames[key]['parent']
+    levels = []
+    for frame in frames.values():
+        if frame['key'] in used:
+            levels += [[] for _ in range(frame['depth'] + 1 - len(levels))]
+            levels[frame['depth']].append(frame)
+
+    title = spec.get('title') or 'Bokeh Plot'
+    return ReportPlan(title, spec.get('output_file'), levels, charts, items, spec.get('share_sources', True))
+
+
+def _frame_key(*definition) -> str:
+    """ :return: hash of the definition of a frame, the same for frames defined in the same way in any report """
+    return hashlib.sha1(json.dumps(definition, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def build_reports(paths: list, output_dir: str = None, jobs: int = None) -> list:
+    """
+    Renders each spec to an HTML page, sharing the frames of all the reports.
+    :param paths: paths of the specs
+    :param output_dir: directory for the HTML pages (default: next to each spec)
+    :param jobs: number of threads of each report (default: the default of ThreadPoolExecutor)
+    :return: list with the page, time in seconds, size in bytes and number of frames computed and reused of each spec
+    """
+    store = {}
+    results = []
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    for path in paths:
+        start = time.perf_counter()
+        plan = compile_report(load_spec(path), base_dir=os.path.dirname(os.path.abspath(path)))
+        frame_count = sum(len(level) for level in plan.levels)
+        stored = len(store)
+        page = plan.render(store, jobs)
+
+        output_file = plan.output_file or os.path.splitext(os.path.basename(path))[0] + '.html'
+        output_path = os.path.join(output_dir or os.path.dirname(path), output_file)
+        with open(output_path, 'w', encoding='utf-8') as output:
+            output.write(page)
+        results.append(dict(
+            spec=path,
+            output_path=output_path,
+            seconds=time.perf_counter() - start,
+            bytes=len(page.encode('utf-8')),
+            frames_computed=len(store) - stored,
+            frames_reused=frame_count - (len(store) - stored)
+        ))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('specs', nargs='+', help='YAML or JSON specs of the reports (glob patterns are expanded)')
+    parser.add_argument('--jobs', type=int, default=None, help='number of threads of each report')
+    parser.add_argument('--output-dir', default=None, help='directory for the HTML pages (default: next to specs)')
+    parser.add_argument('--plan', action='store_true', help='print the plan of each report instead of building it')
+    args = parser.parse_args()
+
+    paths = [path for pattern in args.specs for path in sorted(glob.glob(pattern)) or [pattern]]
+    if args.plan:
+        for path in paths:
+            print(path)
+            plan = compile_report(load_spec(path), base_dir=os.path.dirname(os.path.abspath(path)))
+            for line in plan.describe():
+                print('  ' + line)
+        return
+
+    print('{:<50} {:>8} {:>10} {:>9} {:>7}'.format('report', 'time', 'KB', 'computed', 'reused'))
+    for result in build_reports(paths, output_dir=args.output_dir, jobs=args.jobs):
+        print('{:<50} {:>7.2f}s {:>10.1f} {:>9} {:>7}'.format(
+            result['output_path'], result['seconds'], result['bytes'] / 1e3, result['frames_computed'],
+            result['frames_reused']))
+
+
+if __name__ == '__main__':
+    main()
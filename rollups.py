@@ -0,0 +1,242 @@
+"""
+Rollups of long data (one row per date and category) to a coarser time resolution, done before plotting so that long
+daily histories can be drawn from the raw data:
+
+    yearly = rollup(df, date_column='date', value_column='sales', resolution='year', by='store')
+
+The plot functions use them through kwargs, e.g. plot_multiple_lines(df, ..., resolution='auto', aggregation='mean')
+draws the finest resolution that fits the plot width. Results are cached per column content, resolution and
+aggregation in a RollupCache.
+"""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+RESOLUTIONS = ('day', 'week', 'month', 'year')
+AGGREGATIONS = ('sum', 'mean', 'max')
+
+# Average length of each resolution in days, to estimate the number of periods of a date range
+_RESOLUTION_DAYS = {'day': 1, 'week': 7, 'month': 30.44, 'year': 365.25}
+# Labels of the periods when they are used as categories, e.g. the bars of plot_multiple_bar_chart
+_LABEL_FORMATS = {'day': '%Y-%m-%d', 'week': '%Y-%m-%d', 'month': '%Y-%m', 'year': '%Y'}
+
+
+def period_start(dates, resolution: str) -> np.ndarray:
+    """
+    :param dates: dates as datetime64 values or strings
+    :param resolution: day, week (starting on Monday), month or year
+    :return: first day of the period of each date, as datetime64[ns]
+    """
+    import pandas as pd
+
+    _check_resolution(resolution)
+    dates = np.asarray(dates)
+    if dates.dtype.kind != 'M':
+        dates = np.asarray(pd.to_datetime(dates))
+
+    periods = _period_dates(_period_numbers(dates, resolution), resolution)
+    periods[np.isnat(dates)] = np.datetime64('NaT')
+    return periods
+
+
+def _period_numbers(dates: np.ndarray, resolution: str) -> np.ndarray:
+    """
+    :param dates: datetime64 values
+    :return: new array with the number of the period of each date since 1970 (in days for day and week), undefined for
+    NaT
+    """
+    if resolution in ('day', 'week'):
+        numbers = dates.astype('M8[D]').view(np.int64)
+        if resolution == 'week':
+            # 1970-01-01 was a Thursday, 3 days after the Monday that starts its week
+            weekdays = numbers + 3
+            weekdays %= 7
+            numbers -= weekdays
+        return numbers
+    return dates.astype('M8[{}]'.format({'month': 'M', 'year': 'Y'}[resolution])).view(np.int64)
+
+
+def _period_dates(numbers: np.ndarray, resolution: str) -> np.ndarray:
+    """ :return: first day of the periods numbered by _period_numbers, as datetime64[ns] """
+    unit = {'day': 'D', 'week': 'D', 'month': 'M', 'year': 'Y'}[resolution]
+    return numbers.view('M8[{}]'.format(unit)).astype('M8[ns]')
+
+
+def period_labels(periods, resolution: str) -> np.ndarray:
+    """
+    :param periods: first day of each period, as returned by period_start
+    :param resolution: day, week, month or year
+    :return: label of each period as a string (e.g. 2013-01 for a month)
+    """
+    import pandas as pd
+
+    _check_resolution(resolution)
+    return np.asarray(pd.DatetimeIndex(periods).strftime(_LABEL_FORMATS[resolution]))
+
+
+def auto_resolution(dates, max_periods: int) -> str:
+    """
+    Picks the finest resolution whose number of periods between the first and the last date is not above max_periods.
+    :param dates: dates of the data as datetime64 values
+    :param max_periods: maximum number of periods, e.g. the plot width in pixels
+    :return: day, week, month or year (year if no resolution fits)
+    """
+    import pandas as pd
+
+    dates = np.asarray(dates)
+    if dates.dtype.kind != 'M':
+        dates = np.asarray(pd.to_datetime(dates))
+    missing = np.isnat(dates)
+    if missing.any():
+        dates = dates[~missing]
+    del missing
+    if not len(dates):
+        return RESOLUTIONS[0]
+
+    days = (dates.max() - dates.min()) / np.timedelta64(1, 'D') + 1
+    for resolution in RESOLUTIONS:
+        if days / _RESOLUTION_DAYS[resolution] <= max_periods:
+            return resolution
+    return RESOLUTIONS[-1]
+
+
+def rollup_arrays(dates, values, resolution: str, aggregation: str = 'sum', categories=None) -> dict:
+    """
+    Aggregates the values of each period (and category) with a single groupby over one integer key per row, computed
+    in place from the period number of each date, so that memory stays within a few bytes per row. Rows without a date
+    or a category are left out, missing values are skipped by the aggregation.
+    :param dates: date of each row
+    :param values: value of each row
+    :param resolution: day, week, month or year
+    :param aggregation: sum, mean or max
+    :param categories: category of each row, or None to aggregate all rows of a period together
+    :return: dictionary with the sorted 'periods' (first day, as datetime64[ns]), the 'categories' (None if not given)
+    and the aggregated 'values', one per period and category that has rows
+    """
+    import pandas as pd
+
+    if aggregation not in AGGREGATIONS:
+        raise ValueError('{} is not an aggregation. Select one of: {}'.format(aggregation, ', '.join(AGGREGATIONS)))
+
+    _check_resolution(resolution)
+    dates, values = np.asarray(dates), np.asarray(values)
+    if dates.dtype.kind != 'M':
+        dates = np.asarray(pd.to_datetime(dates))
+
+    keys = _period_numbers(dates, resolution)
+    missing = np.isnat(dates)
+    if categories is None:
+        category_values = np.array([None])
+    else:
+        category_codes, category_values = pd.factorize(categories, sort=True)
+        missing |= category_codes < 0
+    first = np.min(keys, where=~missing, initial=np.iinfo(np.int64).max)
+
+    # key of each row: period number from the first period, times the number of categories, plus the category code
+    keys -= first
+    if categories is not None:
+        keys *= len(category_values)
+        keys += category_codes
+        del category_codes
+    if missing.any():
+        keys, values = keys[~missing], values[~missing]
+    del missing
+
+    aggregated = pd.Series(values, copy=False).groupby(keys, sort=True).agg(aggregation)
+    del keys
+    keys = aggregated.index.values
+
+    return dict(
+        periods=_period_dates(keys // len(category_values) + first, resolution),
+        categories=None if categories is None else np.asarray(category_values)[keys % len(category_values)],
+        values=aggregated.values
+    )
+
+
+def rollup(df: pd.DataFrame, date_column: str, value_column: str, resolution: str, aggregation: str = 'sum',
+           by: str = None) -> pd.DataFrame:
+    """
+    :param df: long dataframe with one row per date (and category)
+    :param date_column: column with the dates
+    :param value_column: column with the values to aggregate
+    :param resolution: day, week, month or year
+    :param aggregation: sum, mean or max
+    :param by: column with the categories aggregated separately (default: none)
+    :return: new dataframe with the first day of each period in date_column, the categories in by and the aggregated
+    values in value_column
+    """
+    import pandas as pd
+
+    rolled = rollup_arrays(df[date_column].values, df[value_column].values, resolution, aggregation,
+                           None if by is None else df[by].values)
+    columns = {date_column: rolled['periods']}
+    if by is not None:
+        columns[by] = rolled['categories']
+    columns[value_column] = rolled['values']
+    return pd.DataFrame(columns)
+
+
+class RollupCache:
+    """
+    Keeps the latest rollups, keyed by the content of the date, value and category columns, the resolution and the
+    aggregation, so that a chart redrawn at another resolution or from the same data again does not group the raw
+    rows again. Pass it as rollup_cache to the plot functions.
+    """
+
+    def __init__(self, max_entries: int = 32):
+        """
+        :param max_entries: number of rollups kept, the least recently used is dropped first
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.hits = self.misses = 0
+
+    def rollup_arrays(self, dates, values, resolution: str, aggregation: str = 'sum', categories=None) -> dict:
+        """
+        Same as rollup_arrays of this module, computed once per content of the columns, resolution and aggregation.
+        The returned arrays are shared between calls and must not be modified.
+        """
+        from plot_functions import _fingerprint
+
+        key = (_fingerprint(np.asarray(dates)), _fingerprint(np.asarray(values)),
+               None if categories is None else _fingerprint(np.asarray(categories)), resolution, aggregation)
+        with self._lock:
+            rolled = self._items.get(key)
+            if rolled is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return rolled
+
+        rolled = rollup_arrays(dates, values, resolution, aggregation, categories)
+        with self._lock:
+            self.misses += 1
+            self._items[key] = rolled
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+        return rolled
+
+
+# Cache used by the plot functions when no rollup_cache is given
+DEFAULT_CACHE = RollupCache()
+
+
+def _check_resolution(resolution: str):
+    if resolution not in RESOLUTIONS:
+        raise ValueError('{} is not a resolution. Select one of: {}'.format(resolution, ', '.join(RESOLUTIONS)))
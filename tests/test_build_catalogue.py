@@ -0,0 +1,32 @@
+"""
+Pages of build_catalogue.py: the same layout gives the same page, whatever the ids Bokeh gave its models.
+
+Run from the root of the repository:
+    python -m pytest tests
+"""
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from build_catalogue import DOCUMENT_ID, ROOT_ELEMENT_ID, render_html  # noqa: E402
+from plot_functions import plot_single_line, plot_table  # noqa: E402
+
+
+def create_layout():
+    from bokeh.layouts import column
+
+    df = pd.DataFrame({'date': pd.date_range('2013-01-01', periods=30), 'sales': range(30)})
+    return column(plot_single_line(df, x_axis='date', y_axis='sales', title='Sales'), plot_table(df))
+
+
+def test_same_layout_gives_same_page():
+    first, second = create_layout(), create_layout()
+    # the models of the second layout were given other ids
+    assert first.id != second.id
+
+    page = render_html(first, 'Sales')
+    assert render_html(second, 'Sales') == page
+    assert page.count(DOCUMENT_ID) == 2 and page.count(ROOT_ELEMENT_ID) == 2
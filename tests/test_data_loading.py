@@ -0,0 +1,34 @@
+"""
+Chunked reads of data_loading.py: read_decimated keeps the lines of a file apart, whatever the chunks.
+
+Run from the root of the repository:
+    python -m pytest tests
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_loading import read_decimated  # noqa: E402
+
+
+def test_read_decimated_leaves_out_rows_without_a_line(tmp_path):
+    random = np.random.RandomState(0)
+    df = pd.DataFrame({
+        'x': np.tile(np.arange(100), 2),
+        'store': np.repeat([1.0, 2.0], 100),
+        'sales': random.randint(0, 1000, 200),
+    })
+    # rows without a store, with values far from the lines: merged into a line they would be kept as its extremes
+    df.loc[[10, 150], 'store'] = np.nan
+    df.loc[[10, 150], 'sales'] = 10 ** 6
+    path = str(tmp_path / 'sales.csv')
+    df.to_csv(path, index=False)
+
+    kept = read_decimated(path, 'x', 'sales', points=10, method='minmax', by='store', chunksize=64)
+    assert kept['store'].notna().all() and sorted(kept['store'].unique()) == [1.0, 2.0]
+    assert kept['sales'].max() < 1000
+    assert (read_decimated(path, 'x', 'sales', points=10, by='store', chunksize=64)['store'].notna()).all()
@@ -0,0 +1,41 @@
+"""
+Example scripts of the catalogue: the views of the same rows share one data source in the output document.
+
+Run from the root of the repository:
+    python -m pytest tests
+"""
+import importlib.util
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from build_catalogue import discover_charts  # noqa: E402
+
+# data sources written by each example: one per distinct table of rows, whatever the number of charts and tables
+SOURCES = {
+    'line_plot/line_chart.py': 1,
+    'multiple_bar_plot/multiple_bar_chart.py': 1,
+    # the bars and the table share the rows of each group and age group, the line has one point per group
+    'dual_axis_bar_line_plot/dual_axis_multiple_bar_line_chart.py': 2,
+    # the lines are drawn from one wide column per store, the table shows the long rows
+    'multiple_line_plot/multiple_line_chart.py': 2,
+}
+
+
+@pytest.mark.parametrize('chart', discover_charts(), ids=lambda chart: chart['name'])
+def test_views_share_sources(chart):
+    from bokeh.document import Document
+    from bokeh.models import ColumnDataSource
+
+    spec = importlib.util.spec_from_file_location('catalogue_chart', chart['script'])
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    document = Document()
+    document.add_root(module.create_layout())
+
+    sources = list(document.select({'type': ColumnDataSource}))
+    assert len(sources) == SOURCES[chart['name'].replace(os.sep, '/')]
@@ -0,0 +1,126 @@
+"""
+Data preparation of the grouped bar charts: _interleave_grouped_bars (plot_dual_axis_dual_bar_line) and the pivots of
+plot_multiple_bar_chart, checked against pandas.
+
+Run from the root of the repository:
+    python -m pytest tests
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from plot_functions import _interleave_grouped_bars, _pivot_arrays, _pivot_columns  # noqa: E402
+
+BAR_COLOURS = ["#8c9eff", "#536dfe"]
+
+
+def make_long_data(group_number: int) -> pd.DataFrame:
+    """ :return: long dataframe shaped like the melted max_profit_by_age_group.csv, groups in no particular order """
+    random = np.random.RandomState(0)
+    groups = np.array(['Group{}'.format(i) for i in random.permutation(group_number)], dtype=object)
+    profit = random.randint(500, 800, group_number)
+    return pd.DataFrame({
+        'IntervationName': np.tile(groups, 2),
+        'Profit': np.tile(profit, 2),
+        'GroupName': np.repeat(['+ 40', '< 40'], group_number),
+        'TruePositiveRate': random.rand(2 * group_number).round(2)
+    })
+
+
+def interleave(df: pd.DataFrame) -> dict:
+    return _interleave_grouped_bars(
+        groups=df['IntervationName'].values,
+        bar_variables=df['GroupName'].values,
+        bar_values=df['TruePositiveRate'].values,
+        line_values=df['Profit'].values,
+        bar_colours=BAR_COLOURS
+    )
+
+
+def test_interleave_matches_pivot():
+    df = make_long_data(50)
+    bars = interleave(df)
+
+    groups, variables = list(df['IntervationName'].unique()), list(df['GroupName'].unique())
+    expected = df.pivot(index='IntervationName', columns='GroupName', values='TruePositiveRate').loc[groups, variables]
+    assert bars['groups'] == groups and bars['bar_variables'] == variables
+    assert bars['x'] == [(group, variable) for group in groups for variable in variables]
+    assert np.array_equal(bars['bar_values'], expected.values.ravel())
+    profit = df.drop_duplicates('IntervationName').set_index('IntervationName')['Profit'].loc[groups].values
+    assert np.array_equal(bars['group_line_values'], profit)
+    assert np.array_equal(bars['line_values'], np.repeat(profit, 2))
+    assert list(bars['colours']) == BAR_COLOURS * len(groups)
+
+
+def test_interleave_leaves_out_rows_without_group_or_variable():
+    df = make_long_data(3)
+    missing = df.copy()
+    missing.loc[3, 'IntervationName'] = np.nan
+    missing.loc[4, 'GroupName'] = np.nan
+    expected = interleave(df)['bar_values']
+    # rows 3 and 4 are the second bar variable of the first two groups
+    expected[[1, 3]] = np.nan
+
+    bars = interleave(missing)
+    assert bars['groups'] == interleave(df)['groups'] and bars['bar_variables'] == ['+ 40', '< 40']
+    assert np.allclose(bars['bar_values'], expected, equal_nan=True)
+
+
+def test_interleave_rejects_duplicate_bars():
+    df = make_long_data(3)
+    with pytest.raises(ValueError):
+        interleave(pd.concat([df, df.iloc[[2]]]))
+
+
+def make_yearly_data() -> pd.DataFrame:
+    """ :return: frame like yearly_sales_by_store.csv, in no particular order and with one missing cell """
+    random = np.random.RandomState(1)
+    df = pd.DataFrame({
+        'year': np.repeat(np.arange(2013, 2018), 4),
+        'store': np.tile([3, 1, 4, 2], 5),
+        'sales': random.randint(500000, 1000000, 20)
+    }).drop(index=6)
+    return df.iloc[random.permutation(len(df))].reset_index(drop=True)
+
+
+def test_pivot_arrays_matches_pivot():
+    df = make_yearly_data()
+    expected = df.pivot(index='year', columns='store', values='sales')
+
+    rows, columns, table = _pivot_arrays(df['year'].values, df['store'].values, df['sales'].values)
+    assert list(rows) == list(expected.index) and list(columns) == list(expected.columns)
+    assert np.allclose(table, expected.values, equal_nan=True)
+
+
+def test_pivot_arrays_leaves_out_missing_keys_and_rejects_duplicates():
+    df = make_yearly_data().astype({'store': float})
+    df.loc[0, 'store'] = np.nan
+    expected = df.dropna().pivot(index='year', columns='store', values='sales')
+    rows, columns, table = _pivot_arrays(df['year'].values, df['store'].values, df['sales'].values)
+    assert list(columns) == list(expected.columns)
+    assert np.allclose(table, expected.values, equal_nan=True)
+
+    df = make_yearly_data()
+    with pytest.raises(ValueError):
+        _pivot_arrays(np.append(df['year'].values, df['year'][0]), np.append(df['store'].values, df['store'][0]),
+                      np.append(df['sales'].values, 1))
+
+
+@pytest.mark.parametrize('indexed', [False, True])
+def test_pivot_columns_of_levels_matches_pivot(indexed):
+    df = make_yearly_data()
+    expected = df.pivot(index='year', columns='store', values='sales')
+    if indexed:
+        # levels keep the year 2013 after the filter, it must not become an empty row
+        df = df.set_index(['year', 'store']).sort_index()
+        df = df[df.index.get_level_values('year') > 2013]
+        expected = expected.loc[2014:]
+
+    rows, columns, table = _pivot_columns(df, 'year', 'store', 'sales')
+    assert list(rows) == list(expected.index) and list(columns) == list(expected.columns)
+    assert np.allclose(table, expected.values, equal_nan=True)
@@ -0,0 +1,52 @@
+"""
+Keys and sizes of RenderCache: the code of the charts is part of the key, and the memory tier is bounded in bytes.
+
+Run from the root of the repository:
+    python -m pytest tests
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import render_cache  # noqa: E402
+from plot_functions import plot_multiple_bar_chart, plot_single_line  # noqa: E402
+from render_cache import RenderCache  # noqa: E402
+
+
+def make_daily_sales() -> pd.DataFrame:
+    return pd.DataFrame({'date': pd.date_range('2013-01-01', periods=30), 'sales': np.arange(30)})
+
+
+def test_key_covers_the_code_version(monkeypatch):
+    df = make_daily_sales()
+    key = RenderCache.key(plot_single_line, df, x_axis='date', y_axis='sales', title='Sales')
+    assert RenderCache.key(plot_single_line, df, 'date', 'sales', 'Sales') == key
+
+    monkeypatch.setattr(render_cache, 'CACHE_VERSION', render_cache.CACHE_VERSION + 1)
+    assert RenderCache.key(plot_single_line, df, x_axis='date', y_axis='sales', title='Sales') != key
+
+    monkeypatch.setattr(render_cache, '_source_digest', lambda module_name: 'edited')
+    assert RenderCache.key(plot_single_line, df, x_axis='date', y_axis='sales', title='Sales') != key
+
+
+def test_html_title_passed_by_position():
+    df = pd.DataFrame({'year': [2013, 2013, 2014, 2014], 'store': [1, 2, 1, 2], 'sales': [1, 2, 3, 4]})
+    html = RenderCache().render(plot_multiple_bar_chart, df, 'Ventes par magasin', 'year', 'sales', 'store',
+                                output='html')
+    assert '<title>Ventes par magasin</title>' in html
+
+
+def test_max_bytes_counts_encoded_bytes():
+    df = make_daily_sales()
+    cache = RenderCache()
+    html = cache.render(plot_single_line, df, x_axis='date', y_axis='sales', title='Ventes €', output='html')
+    assert len(html.encode('utf-8')) > len(html) and cache.stats.bytes == len(html.encode('utf-8'))
+
+    cache = RenderCache(max_bytes=len(html.encode('utf-8')))
+    for title in ('Ventes €', 'Ventes £'):
+        cache.render(plot_single_line, df, x_axis='date', y_axis='sales', title=title, output='html')
+    assert cache.stats.items == 1 and cache.stats.evictions == 1
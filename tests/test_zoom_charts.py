@@ -0,0 +1,65 @@
+"""
+Zoom charts: the figure is drawn from the first window of the series, which is only sorted and reduced once.
+
+Run from the root of the repository:
+    python -m pytest tests
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import zoom_charts  # noqa: E402
+from zoom_charts import zoom_multiple_lines, zoom_single_line  # noqa: E402
+
+ROWS = 10000
+POINTS = 200
+
+
+def make_sales_by_store() -> pd.DataFrame:
+    """ :return: long frame with 3 stores in no particular order, store 3 without sales in the second half """
+    random = np.random.RandomState(0)
+    df = pd.DataFrame({
+        'date': np.repeat(pd.date_range('2017-01-01', periods=ROWS, freq='min').values, 3),
+        'store': np.tile([1, 2, 3], ROWS),
+        'sales': random.gamma(4, 25, 3 * ROWS).round(2)
+    })
+    df = df[(df['store'] != 3) | (df.index < 3 * ROWS // 2)]
+    return df.iloc[random.permutation(len(df))]
+
+
+@pytest.mark.parametrize('multiple', [False, True])
+def test_figure_drawn_from_first_window(monkeypatch, multiple):
+    calls = []
+    plot_function = 'plot_multiple_lines' if multiple else 'plot_single_line'
+    original = getattr(zoom_charts, plot_function)
+
+    def recorded(df, **kwargs):
+        calls.append((len(df), kwargs))
+        return original(df, **kwargs)
+
+    monkeypatch.setattr(zoom_charts, plot_function, recorded)
+    df = make_sales_by_store()
+    if multiple:
+        chart = zoom_multiple_lines(df, title='Sales', x_axis='date', y_axis='sales', category_column='store',
+                                    points=POINTS)
+    else:
+        df = df[df['store'] == 1]
+        chart = zoom_single_line(df, x_axis='date', y_axis='sales', title='Sales', points=POINTS)
+
+    (rows, kwargs), = calls
+    lines = len(chart.lines)
+    assert 'downsample' not in kwargs and rows <= 2 * POINTS * lines * lines
+    assert lines == (3 if multiple else 1) and chart.window == (0, ROWS)
+
+    # the source holds the first window, in the columns the figure draws
+    data = chart.source.data
+    assert len(data['date']) == len(chart.rows) <= 2 * POINTS * lines
+    for renderer in chart.figure.renderers:
+        assert renderer.data_source is chart.source and renderer.glyph.y in data
+    for line, values in chart.lines.items():
+        assert np.allclose(data[line], values[chart.rows], equal_nan=True)
@@ -0,0 +1,229 @@
+"""
+Line charts for Bokeh server apps that keep the full series in the server and only send the points needed to draw the
+visible x range at the width of the plot. Zooming in shows the original points again:
+
+    chart = zoom_multiple_lines(df, title='Sales', x_axis='date', y_axis='sales', category_column='store')
+    curdoc().add_root(chart.figure)
+
+When the x range changes (pan, zoom or reset), the new window is found with a binary search on the sorted x values and
+reduced to the minimum and maximum of each pixel bucket. The minimums and maximums of blocks of 2, 4, 8... rows are
+computed once, so that each update reads about two points per pixel and line whatever the length of the series and
+of the window. The figure is drawn from the first window, taken from the same blocks, so the full series is only
+sorted and reduced once. Updates are debounced: only the last range of a burst of changes is drawn.
+"""
+from __future__ import annotations
+
+import math
+from typing import TYPE_CHECKING
+
+from plot_functions import plot_single_line, plot_multiple_lines, _column_arrays, _pivot_arrays, _row_max, \
+    _sort_order, _typed_array, _HOVER_ANCHOR
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+
+class ZoomLineChart:
+    """
+    Handle of a line chart built by zoom_single_line or zoom_multiple_lines: its figure, its data source and the full
+    series the visible window is taken from.
+    """
+
+    def __init__(self, figure, source, x_axis: str, x_values: np.ndarray, lines: dict, debounce: int = 150,
+                 points: int = None, range_padding: float = 0.1, levels: dict = None):
+        """
+        :param figure: Bokeh figure with the lines, drawn from source
+        :param source: data source of the lines, with the x column and one column per line
+        :param x_axis: column of the source with the x values
+        :param x_values: sorted x values of the full series, as numbers (milliseconds for dates, as in the source)
+        :param lines: dictionary with the column of each line in the source and its y values for every x value (NaN
+        where the line has no value)
+        :param debounce: milliseconds without range changes before the window is updated
+        :param points: points per line of each window (default: the width of the plot in pixels)
+        :param range_padding: part of the full x range added around it when the chart is reset
+        :param levels: minimums and maximums of each line in blocks of 2, 4, 8... rows, from _minmax_levels (default:
+        computed from lines)
+        """
+        import numpy as np
+        from bokeh.models import BoxZoomTool, PanTool, Range1d, ResetTool, WheelZoomTool
+
+        self.figure = figure
+        self.source = source
+        self.x_axis = x_axis
+        self.x_values = x_values
+        self.lines = lines
+        self.debounce = debounce
+        self.points = points
+        self._levels = levels if levels is not None else \
+            {line: _minmax_levels(values) for line, values in lines.items()}
+        self._pending_update = None
+
+        # A fixed range, so that the browser does not fit the range to the window it was sent and reset goes back to
+        # the full series
+        if len(x_values):
+            padding = (x_values[-1] - x_values[0]) * range_padding / 2 or 1
+            figure.x_range = Range1d(x_values[0] - padding, x_values[-1] + padding)
+        figure.add_tools(PanTool(dimensions='width'), WheelZoomTool(dimensions='width'),
+                         BoxZoomTool(dimensions='width'), ResetTool())
+        figure.x_range.on_change('start', self._range_changed)
+        figure.x_range.on_change('end', self._range_changed)
+
+        self.window = (0, len(x_values))
+        self.rows = np.arange(0)
+        self.set_range(figure.x_range.start, figure.x_range.end)
+
+    def set_range(self, start: float = None, end: float = None):
+        """
+        Sends the points of the x range from start to end to the browser, reduced to the width of the plot.
+        :param start: first x value, as a number (milliseconds for dates); None for the first x value of the series
+        :param end: last x value, as a number; None for the last x value of the series
+        """
+        import numpy as np
+
+        length = len(self.x_values)
+        first = 0 if start is None else max(int(np.searchsorted(self.x_values, start, side='left')) - 1, 0)
+        last = length if end is None else min(int(np.searchsorted(self.x_values, end, side='right')) + 1, length)
+        points = self.points or self.figure.inner_width or self.figure.plot_width
+        rows = _window_rows(self._levels, first, last, points)
+
+        self.window, self.rows = (first, last), rows
+        data = {self.x_axis: self.x_values[rows]}
+        data.update({line: values[rows] for line, values in self.lines.items()})
+        if _HOVER_ANCHOR in self.source.data:
+            data[_HOVER_ANCHOR] = _row_max([data[line] for line in self.lines])
+        self.source.data = data
+
+    def _range_changed(self, attr, old, new):
+        """ Schedules the update of the window, replacing the one scheduled by the previous change if any """
+        document = self.figure.document
+        if document is None:
+            self.set_range(self.figure.x_range.start, self.figure.x_range.end)
+            return
+        if self._pending_update is not None:
+            document.remove_timeout_callback(self._pending_update)
+        self._pending_update = document.add_timeout_callback(self._apply_range, self.debounce)
+
+    def _apply_range(self):
+        self._pending_update = None
+        self.set_range(self.figure.x_range.start, self.figure.x_range.end)
+
+
+def zoom_single_line(df: pd.DataFrame, x_axis: str, y_axis: str, title: str, debounce: int = 150, points: int = None,
+                     **kwargs) -> ZoomLineChart:
+    """
+    Creates a single line chart that shows the points of the visible x range in a Bokeh server app.
+    :param df: dataframe with the full series
+    :param debounce: milliseconds without range changes before the chart is updated
+    :param points: points of each window (default: the width of the plot in pixels)
+    :param kwargs: same parameters as plot_single_line, except downsample and source_registry
+    :return: ZoomLineChart with the figure
+    """
+    import numpy as np
+    import pandas as pd
+
+    _check_zoom_kwargs(kwargs)
+    data = _column_arrays(df, [x_axis, y_axis])
+    order = _sort_order(data[x_axis])
+    if order is not None:
+        data = {column: values.take(order) for column, values in data.items()}
+    x_values = _typed_array(data[x_axis]).astype(np.float64)
+    lines = {y_axis: data[y_axis].astype(np.float64)}
+    levels = {y_axis: _minmax_levels(lines[y_axis])}
+
+    # the figure is drawn from the first window only, which the chart sends again in its own columns
+    rows = _window_rows(levels, 0, len(x_values), points or kwargs.get('plot_width', 700))
+    p = plot_single_line(pd.DataFrame({column: values[rows] for column, values in data.items()}),
+                         x_axis=x_axis, y_axis=y_axis, title=title, **kwargs)
+    return ZoomLineChart(p, p.renderers[0].data_source, x_axis, x_values, lines, debounce=debounce, points=points,
+                         range_padding=kwargs.get('x_range_padding', 0.1), levels=levels)
+
+
+def zoom_multiple_lines(df: pd.DataFrame, title: str, x_axis: str, y_axis: str, category_column: str,
+                        debounce: int = 150, points: int = None, **kwargs) -> ZoomLineChart:
+    """
+    Creates a multiple line chart that shows the points of the visible x range in a Bokeh server app.
+    :param df: dataframe with the full series
+    :param debounce: milliseconds without range changes before the chart is updated
+    :param points: points per line of each window (default: the width of the plot in pixels)
+    :param kwargs: same parameters as plot_multiple_lines, except downsample, source_registry, multi_line and
+    resolution
+    :return: ZoomLineChart with the figure
+    """
+    import numpy as np
+    import pandas as pd
+
+    _check_zoom_kwargs(kwargs)
+    for option in ('multi_line', 'resolution'):
+        if kwargs.get(option):
+            raise ValueError('{} cannot be used in a zoom chart, it draws one line per category'.format(option))
+    data = _column_arrays(df, [x_axis, category_column, y_axis])
+    x_values, categories, table = _pivot_arrays(data[x_axis], data[category_column], data[y_axis])
+    lines = {category: table[:, i].astype(np.float64) for i, category in enumerate(categories.astype(str).tolist())}
+    levels = {line: _minmax_levels(values) for line, values in lines.items()}
+
+    # the figure is drawn from the first window only, in long rows again; rows without a value keep every category
+    # in the figure even if it has no value in the window
+    rows = _window_rows(levels, 0, len(x_values), points or kwargs.get('plot_width', 800))
+    window = pd.DataFrame({
+        x_axis: np.repeat(x_values[rows], len(categories)),
+        category_column: np.tile(categories, len(rows)),
+        y_axis: table[rows].ravel()
+    })
+    p = plot_multiple_lines(window, title=title, x_axis=x_axis, y_axis=y_axis, category_column=category_column,
+                            multi_line=False, **kwargs)
+    return ZoomLineChart(p, p.renderers[0].data_source, x_axis, _typed_array(x_values).astype(np.float64), lines,
+                         debounce=debounce, points=points, range_padding=kwargs.get('x_range_padding', 0.1),
+                         levels=levels)
+
+
+def _window_rows(levels: dict, first: int, last: int, points: int) -> np.ndarray:
+    """
+    :param levels: minimums and maximums of each line in blocks of 2, 4, 8... rows, from _minmax_levels
+    :return: sorted rows of the minimum and maximum of each line in about points / 2 blocks of equal length between the
+    rows first and last (all the rows if there are no more than points)
+    """
+    import numpy as np
+
+    if last - first <= points:
+        return np.arange(first, last)
+
+    # smallest level whose blocks split the window in no more buckets than half the points
+    level = max(math.ceil(math.log2((last - first) / max(points // 2, 1))), 1)
+    first_block, last_block = first >> level, ((last - 1) >> level) + 1
+    kept = [np.array([first, last - 1])]
+    for line_levels in levels.values():
+        minimums, maximums = line_levels[min(level, len(line_levels)) - 1]
+        kept += [minimums[first_block:last_block], maximums[first_block:last_block]]
+    return np.unique(np.concatenate(kept))
+
+
+def _minmax_levels(values: np.ndarray) -> list:
+    """
+    Rows of the minimum and maximum of each block of 2, 4, 8... rows, each level computed from the previous one. NaN
+    values are only kept if a block has nothing else.
+    :param values: y values of a line
+    :return: list with one (minimum rows, maximum rows) pair per level, starting with blocks of 2 rows
+    """
+    import numpy as np
+
+    lows = np.where(np.isnan(values), np.inf, values)
+    highs = np.where(np.isnan(values), -np.inf, values)
+    minimums = maximums = np.arange(len(values))
+    levels = []
+    while len(minimums) > 1:
+        if len(minimums) % 2:
+            minimums, maximums = np.append(minimums, minimums[-1]), np.append(maximums, maximums[-1])
+        left, right = minimums[0::2], minimums[1::2]
+        minimums = np.where(lows[right] < lows[left], right, left)
+        left, right = maximums[0::2], maximums[1::2]
+        maximums = np.where(highs[right] > highs[left], right, left)
+        levels.append((minimums, maximums))
+    return levels
+
+
+def _check_zoom_kwargs(kwargs: dict):
+    """ Raises ValueError for the options of the plot functions that are replaced by the windows of a zoom chart """
+    for option in ('downsample', 'downsample_points', 'source_registry'):
+        if kwargs.get(option):
+            raise ValueError('{} cannot be used in a zoom chart, its source is replaced by each window'.format(option))
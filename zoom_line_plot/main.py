@@ -0,0 +1,54 @@
+"""
+Bokeh server app with a year of sales per minute (about 1.5 million rows, generated from the daily sales by store):
+zoom and pan to see the minutes of any day while the browser never holds more than a few points per pixel.
+
+Run from the root of the repository:
+    bokeh serve --show zoom_line_plot
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from bokeh.io import curdoc
+from bokeh.layouts import Column
+from bokeh.models.widgets import Div
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from data_loading import read_cached  # noqa: E402
+from zoom_charts import zoom_multiple_lines  # noqa: E402
+
+STORES = 3
+MINUTES_PER_DAY = 24 * 60
+
+daily = read_cached('daily_sales_by_store')
+daily = daily[(daily['store'] <= STORES) & (daily['date'].dt.year == 2017)].sort_values(['store', 'date'])
+
+# Spreads the sales of each day over its minutes with some noise
+random = np.random.RandomState(0)
+minutes = pd.to_timedelta(np.arange(MINUTES_PER_DAY), unit='min').values
+df = pd.DataFrame({
+    'date': (daily['date'].values[:, None] + minutes).ravel(),
+    'store': np.repeat(daily['store'].values, MINUTES_PER_DAY),
+    'sales': (np.repeat(daily['sales'].values / MINUTES_PER_DAY, MINUTES_PER_DAY) *
+              random.gamma(4, 0.25, len(daily) * MINUTES_PER_DAY)).round(2)
+})
+
+chart = zoom_multiple_lines(
+    df,
+    title='Sales per minute by store',
+    x_axis='date',
+    y_axis='sales',
+    category_column='store',
+    plot_width=900,
+    tooltip_mode='nearest',
+    y_tooltip_format='{0,0.00}'
+)
+
+curdoc().add_root(Column(
+    Div(text="<h2 style='margin-block-end:0'> Sales per minute ({:,} rows) </h2>".format(len(df))),
+    chart.figure
+))
+curdoc().title = 'Zoomable line chart'